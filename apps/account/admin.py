@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from unfold.admin import ModelAdmin 
+
+from apps.core.exports import export_actions
+from .exports import export_customers
 from .models import Customer, CustomerAddress, PasswordResetCode
 
 
@@ -11,6 +14,7 @@ class CustomerAdmin(BaseUserAdmin, ModelAdmin):  # Combine both
     list_filter = ('is_active', 'is_staff', 'is_superuser')
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('-date_joined',)
+    actions = export_actions(export_customers)
 
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
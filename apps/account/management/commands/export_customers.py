@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.exports import CHUNK_SIZE, FORMATS, export_lines
+from apps.account.exports import CUSTOMER_COLUMNS, customer_rows, filter_customers
+from apps.account.models import Customer
+
+
+class Command(BaseCommand):
+    help = "Stream customers with their order count and spend as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--since", help="Customers who joined on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Customers who joined on or before this date (YYYY-MM-DD)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since = options["since"] and date.fromisoformat(options["since"])
+            until = options["until"] and date.fromisoformat(options["until"])
+        except ValueError:
+            raise CommandError("--since/--until must be YYYY-MM-DD")
+
+        customers = filter_customers(Customer.objects.all(), since=since, until=until)
+        lines = export_lines(options["format"], CUSTOMER_COLUMNS, customer_rows(customers, chunk_size=options["chunk_size"]))
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as out:
+                out.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Customers written to {options['output']}"))
+        else:
+            # OutputWrapper passes writelines() straight to the stream
+            self.stdout.writelines(lines)
@@ -53,6 +53,10 @@ class Customer(AbstractBaseUser, PermissionsMixin):
         verbose_name = _("customer")
         verbose_name_plural = _("customers")
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['-date_joined'], name='customer_joined_idx'),
+            models.Index(fields=['is_guest'], name='customer_is_guest_idx'),
+        ]
 
 
 # Customer Address Model
@@ -85,6 +89,12 @@ class PasswordResetCode(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['email'], name='reset_code_email_idx'),
+            models.Index(fields=['reset_token'], name='reset_code_token_idx'),
+        ]
+
     def is_expired(self):
         return timezone.now() > self.created_at + timedelta(minutes=10)
 
@@ -0,0 +1,13 @@
+from django.core.mail import send_mail
+
+from apps.tasks.queue import task
+
+
+@task(max_attempts=3)
+def send_reset_code(email, code):
+    send_mail(
+        subject="Your OTP Code",
+        message=f"Your code is: {code}",
+        from_email="noreply@example.com",
+        recipient_list=[email]
+    )
@@ -1,3 +1,27 @@
+import csv
+import io
+from decimal import Decimal
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from apps.orders.models import Order
+from .models import Customer
+
+
+class CustomerExportTests(TestCase):
+    def test_export_includes_order_totals(self):
+        buyer = Customer.objects.create_user(email="buyer@example.com", password="pw", first_name="Bo")
+        Customer.objects.create_user(email="idle@example.com", password="pw")
+        for total, status in (("100.00", "delivered"), ("50.00", "pending"), ("70.00", "cancelled")):
+            Order.objects.create(
+                customer=buyer, subtotal_amount=Decimal(total), total_amount=Decimal(total),
+                payment_type="COD", status=status,
+            )
+
+        out = io.StringIO()
+        call_command("export_customers", stdout=out)
+        rows = {r["email"]: r for r in csv.DictReader(io.StringIO(out.getvalue()))}
+        self.assertEqual((rows["buyer@example.com"]["orders"], rows["buyer@example.com"]["total_spent"]), ("2", "150.00"))
+        self.assertEqual((rows["idle@example.com"]["orders"], rows["idle@example.com"]["total_spent"]), ("0", "0.00"))
+        self.assertEqual(rows["idle@example.com"]["first_name"], "")
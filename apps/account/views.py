@@ -4,8 +4,9 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
+from apps.cart.services import cart_from_token, merge_into_user_cart, request_token
 from .models import Customer, PasswordResetCode, CustomerAddress
+from .tasks import send_reset_code
 from .serializers import (
     CustomerRegisterSerializer,
     CustomerSerializer,
@@ -46,7 +47,7 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        return self._handle_login(request.data)
+        return self._handle_login(request.data, request)
 
     def get(self, request):
         email = request.query_params.get("email")
@@ -59,14 +60,20 @@ class LoginView(APIView):
                 "message": "Email and password are required in query parameters"
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        return self._handle_login({"email": email, "password": password})
+        return self._handle_login({"email": email, "password": password}, request)
 
-    def _handle_login(self, credentials):
+    def _handle_login(self, credentials, request):
         serializer = LoginSerializer(data=credentials)
         if serializer.is_valid():
             user = serializer.validated_data['user']
             refresh = RefreshToken.for_user(user)
 
+            # Carry the guest cart (if the client sent its token) into the account
+            token = request_token(request)
+            anonymous = cart_from_token(token) if token else None
+            if anonymous is not None:
+                merge_into_user_cart(anonymous, user)
+
             return Response({
                 "status": status.HTTP_200_OK,
                 "success": True,
@@ -281,14 +288,8 @@ class SendResetCodeView(APIView):
         PasswordResetCode.objects.filter(email=email).delete()
 
         code = str(random.randint(100000, 999999))
-        PasswordResetCode.objects.create(email=email, user=user, code=code)
-
-        send_mail(
-            subject="Your OTP Code",
-            message=f"Your code is: {code}",
-            from_email="noreply@example.com",
-            recipient_list=[email]
-        )
+        reset = PasswordResetCode.objects.create(email=email, user=user, code=code)
+        send_reset_code.enqueue(email, code, idempotency_key=f"reset-code:{reset.pk}")
 
         return Response({
             "status": status.HTTP_200_OK,
@@ -11,7 +11,7 @@ class CartItemInline(admin.TabularInline):
 @admin.register(Cart)
 class CartAdmin(ModelAdmin):
     list_display = ('id', 'user', 'created_at', 'updated_at')
-    list_filter = ('created_at',)
+    list_filter = ('created_at', ('user', admin.EmptyFieldListFilter))
     search_fields = ('user__email',)
     inlines = [CartItemInline]
 
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.cart.services import sweep_anonymous_carts
+
+
+class Command(BaseCommand):
+    help = "Delete anonymous carts idle for ANONYMOUS_CART_TTL and return their held stock (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        deleted = sweep_anonymous_carts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} anonymous carts"))
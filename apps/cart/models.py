@@ -6,12 +6,19 @@ User = get_user_model()
 
 
 class Cart(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='carts')
+    # No user: an anonymous cart, reached through a signed cart token
+    # (apps.cart.services.cart_token) and merged into the user's cart at login
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='carts', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='cart_user_updated_idx'),
+        ]
+
     def __str__(self):
-        return f"Cart {self.id} for {self.user.email}"
+        return f"Cart {self.id} for {self.user.email if self.user else 'anonymous'}"
 
 
 class CartItem(models.Model):
@@ -26,4 +33,4 @@ class CartItem(models.Model):
         return f"{self.product_variant} x {self.quantity}"
 
     def total_price(self):
-        return (self.product_variant.price_override or self.product_variant.product.price) * self.quantity
+        return self.product_variant.effective_price * self.quantity
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Cart, CartItem
+from apps.orders.pricing import money
 from apps.products.serializers import ProductVariantSerializer
 
 
@@ -9,10 +10,18 @@ class CartItemSerializer(serializers.ModelSerializer):
         queryset=CartItem._meta.get_field('product_variant').related_model.objects.all(),
         source='product_variant', write_only=True
     )
+    unit_price = serializers.SerializerMethodField()
+    line_total = serializers.SerializerMethodField()
 
     class Meta:
         model = CartItem
-        fields = ['id', 'product_variant', 'product_variant_id', 'quantity']
+        fields = ['id', 'product_variant', 'product_variant_id', 'quantity', 'unit_price', 'line_total']
+
+    def get_unit_price(self, obj):
+        return str(money(obj.product_variant.effective_price))
+
+    def get_line_total(self, obj):
+        return str(money(obj.product_variant.effective_price) * obj.quantity)
 
 
 class CartSerializer(serializers.ModelSerializer):
@@ -0,0 +1,257 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from apps.core.cache import cached_value, invalidate_group, product_group
+from apps.orders.inventory import release_carts, set_cart_holds
+from apps.orders.models import StockReservation
+from apps.orders.pricing import ZERO, Pricer
+from apps.products.models import ProductVariant, ProductVariantValue
+from .models import Cart, CartItem
+from .serializers import CartSerializer
+
+OPERATIONS = ("add", "update", "remove")
+TOKEN_HEADER = "X-Cart-Token"
+_TOKEN_SALT = "apps.cart.token"
+
+
+class CartError(Exception):
+    pass
+
+
+def get_cart(user):
+    cart = Cart.objects.filter(user=user).order_by("pk").first()
+    return cart or Cart.objects.create(user=user)
+
+
+def cart_token(cart):
+    """Signed token naming an anonymous cart; clients send it back in X-Cart-Token."""
+    return signing.dumps(cart.pk, salt=_TOKEN_SALT)
+
+
+def cart_from_token(token):
+    try:
+        pk = signing.loads(token, salt=_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    return Cart.objects.filter(pk=pk, user__isnull=True).first()
+
+
+def request_token(request):
+    if request.headers.get(TOKEN_HEADER):
+        return request.headers[TOKEN_HEADER]
+    return request.data.get("cart_token") if hasattr(request.data, "get") else None
+
+
+def resolve_cart(request, create=False):
+    """
+    The cart a request works on: the user's cart when logged in, else the
+    anonymous cart named by its token. With `create`, a missing anonymous
+    cart is created; otherwise None is returned.
+    """
+    if request.user.is_authenticated:
+        return get_cart(request.user)
+    token = request_token(request)
+    cart = cart_from_token(token) if token else None
+    if cart is None and create:
+        cart = Cart.objects.create()
+    return cart
+
+
+def _group(cart):
+    return f"cart:{cart.pk}"
+
+
+def invalidate(cart):
+    invalidate_group(_group(cart))
+
+
+def cart_items_prefetch():
+    """Everything CartItemSerializer renders, in a fixed number of queries."""
+    return Prefetch(
+        "items",
+        queryset=CartItem.objects.select_related("product_variant__product").prefetch_related(
+            Prefetch(
+                "product_variant__variant_values",
+                queryset=ProductVariantValue.objects.select_related("attribute_value__attribute"),
+            )
+        ).order_by("pk"),
+    )
+
+
+def snapshot(cart):
+    """
+    The serialized cart with line and cart totals. Cached per cart until
+    it changes (invalidate()) or one of its products does (price, stock;
+    see apps.core.cache.product_group). No cart (an anonymous visitor who
+    never added anything) is an empty cart.
+    """
+    if cart is None:
+        return {"id": None, "user": None, "items": [], "summary": Pricer().totals(ZERO).as_dict()}
+
+    def build():
+        loaded = Cart.objects.prefetch_related(cart_items_prefetch()).get(pk=cart.pk)
+        items = list(loaded.items.all())
+        data = CartSerializer(loaded).data
+        data["summary"] = Pricer().quote([(item.product_variant, item.quantity) for item in items]).as_dict()
+        return data
+
+    product_ids = cached_value("cart-products", [_group(cart)], (cart.pk,), lambda: sorted(set(
+        CartItem.objects.filter(cart=cart).values_list("product_variant__product_id", flat=True)
+    )))
+    groups = ["attributes", _group(cart), *(product_group(pk) for pk in product_ids)]
+    return cached_value("cart", groups, (cart.pk,), build)
+
+
+def with_coupon(data, pricer, code):
+    """Snapshot data with its summary re-totalled for coupon `code` (CouponError if it does not apply)."""
+    summary = pricer.totals(
+        Decimal(data["summary"]["subtotal"]), code, line_count=len(data["items"]),
+    ).as_dict()
+    return {**data, "summary": summary}
+
+
+def _parse(index, operation, items_by_id):
+    kind = operation.get("op")
+    if kind not in OPERATIONS:
+        raise CartError(f"Operation {index}: op must be one of {', '.join(OPERATIONS)}")
+    try:
+        if operation.get("item_id") is not None:
+            item = items_by_id.get(int(operation["item_id"]))
+            if item is None:
+                raise CartError(f"Operation {index}: cart item not found")
+            variant_id = item.product_variant_id
+        elif operation.get("product_variant_id") is not None:
+            variant_id = int(operation["product_variant_id"])
+        else:
+            raise CartError(f"Operation {index}: item_id or product_variant_id is required")
+        quantity = int(operation.get("quantity", 1 if kind == "add" else 0))
+    except (TypeError, ValueError):
+        raise CartError(f"Operation {index}: ids and quantity must be integers")
+    if quantity < (1 if kind == "add" else 0):
+        raise CartError(f"Operation {index}: invalid quantity {quantity}")
+    return kind, variant_id, quantity
+
+
+@transaction.atomic
+def apply_operations(cart, operations):
+    """
+    Apply [{"op": "add"|"update"|"remove", "product_variant_id" or
+    "item_id", "quantity"}] to the cart as one unit: a bad operation
+    or short stock (InsufficientStock) rolls the whole batch back. The
+    queries do not grow with the number of operations.
+    """
+    if not operations:
+        raise CartError("No operations given")
+    items = {item.product_variant_id: item for item in cart.items.all()}
+    items_by_id = {item.pk: item for item in items.values()}
+
+    wanted = {vid: item.quantity for vid, item in items.items()}
+    for index, operation in enumerate(operations, 1):
+        if not isinstance(operation, dict):
+            raise CartError(f"Operation {index}: must be an object")
+        kind, variant_id, quantity = _parse(index, operation, items_by_id)
+        if kind == "add":
+            wanted[variant_id] = wanted.get(variant_id, 0) + quantity
+        elif kind == "update":
+            wanted[variant_id] = quantity
+        else:
+            wanted[variant_id] = 0
+
+    new_ids = {vid for vid, qty in wanted.items() if qty and vid not in items}
+    missing = new_ids - set(ProductVariant.objects.filter(pk__in=new_ids).values_list("pk", flat=True))
+    if missing:
+        raise CartError(f"Invalid product variant ID: {min(missing)}")
+
+    changed = {vid: qty for vid, qty in wanted.items() if qty != (items[vid].quantity if vid in items else 0)}
+    if not changed:
+        return cart
+    # Cart lines hold their stock until checkout or STOCK_HOLD_TTL
+    set_cart_holds(cart, changed)
+
+    removed = [vid for vid, qty in changed.items() if qty == 0 and vid in items]
+    updated = [items[vid] for vid, qty in changed.items() if qty and vid in items]
+    for item in updated:
+        item.quantity = changed[item.product_variant_id]
+    if removed:
+        CartItem.objects.filter(cart=cart, product_variant_id__in=removed).delete()
+    if updated:
+        CartItem.objects.bulk_update(updated, ["quantity"])
+    CartItem.objects.bulk_create(
+        CartItem(cart=cart, product_variant_id=vid, quantity=qty)
+        for vid, qty in changed.items() if qty and vid not in items
+    )
+    Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+    invalidate(cart)
+    return cart
+
+
+@transaction.atomic
+def merge_into_user_cart(anonymous, user):
+    """
+    Move an anonymous cart into the user's cart at login, adding up lines
+    both carts have. Stock holds move with their lines (the units stay
+    taken), so nothing is re-checked against stock. Runs in a fixed number
+    of queries whatever the cart sizes.
+    """
+    cart = get_cart(user)
+    mine = {item.product_variant_id: item for item in cart.items.all()}
+    theirs = list(anonymous.items.all())
+    shared = [item for item in theirs if item.product_variant_id in mine]
+    for item in shared:
+        mine[item.product_variant_id].quantity += item.quantity
+    CartItem.objects.bulk_update([mine[item.product_variant_id] for item in shared], ["quantity"])
+    CartItem.objects.filter(cart=anonymous).exclude(product_variant_id__in=list(mine)).update(cart=cart)
+
+    my_holds = {
+        hold.product_variant_id: hold
+        for hold in StockReservation.objects.filter(cart=cart, status="held")
+    }
+    their_holds = list(StockReservation.objects.filter(cart=anonymous, status="held"))
+    now = timezone.now()
+    for hold in their_holds:
+        if hold.product_variant_id in my_holds:
+            mine_hold = my_holds[hold.product_variant_id]
+            mine_hold.quantity += hold.quantity
+            mine_hold.expires_at = max(mine_hold.expires_at, hold.expires_at)
+            mine_hold.updated_at = now
+    StockReservation.objects.bulk_update(
+        [my_holds[h.product_variant_id] for h in their_holds if h.product_variant_id in my_holds],
+        ["quantity", "expires_at", "updated_at"],
+    )
+    # Merged holds are absorbed into the user's; the rest change carts
+    StockReservation.objects.filter(
+        pk__in=[h.pk for h in their_holds if h.product_variant_id in my_holds]
+    ).delete()
+    StockReservation.objects.filter(cart=anonymous, status="held").update(cart=cart, updated_at=now)
+
+    anonymous.delete()
+    Cart.objects.filter(pk=cart.pk).update(updated_at=now)
+    invalidate(cart)
+    return cart
+
+
+def sweep_anonymous_carts(batch_size=500):
+    """
+    Delete anonymous carts untouched for ANONYMOUS_CART_TTL, returning
+    their held stock first. Returns the number of carts deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "ANONYMOUS_CART_TTL", 7 * 24 * 60 * 60))
+    deleted = 0
+    while True:
+        ids = list(
+            Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff)
+            .order_by("updated_at").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            # Re-checked inside the transaction: skip carts used since the select
+            ids = list(Cart.objects.filter(pk__in=ids, updated_at__lt=cutoff).values_list("pk", flat=True))
+            release_carts(ids)
+            deleted += Cart.objects.filter(pk__in=ids).delete()[1].get(Cart._meta.label, 0)
@@ -1,3 +1,162 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.orders.models import Order, StockReservation
+from apps.orders.tests import checkout_payload, make_variants
+from apps.products.models import ProductVariant
+from .models import Cart, CartItem
+from .services import apply_operations
+
+
+class CartServiceTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="cart@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.variants = make_variants(12, stock=5, price="12.50")
+
+    def patch(self, *operations):
+        return self.client.patch("/api/cart/", {"operations": list(operations)}, format="json")
+
+    def test_batch_operations_and_totals(self):
+        a, b, c = self.variants[:3]
+        response = self.patch(
+            {"op": "add", "product_variant_id": a.pk, "quantity": 2},
+            {"op": "add", "product_variant_id": b.pk},
+            {"op": "add", "product_variant_id": c.pk, "quantity": 3},
+            {"op": "update", "product_variant_id": c.pk, "quantity": 1},
+            {"op": "remove", "product_variant_id": b.pk},
+        )
+        self.assertEqual(response.status_code, 200, response.json())
+        data = response.json()["data"]
+        self.assertEqual([(i["product_variant"]["id"], i["quantity"]) for i in data["items"]], [(a.pk, 2), (c.pk, 1)])
+        self.assertEqual(data["items"][0]["line_total"], "25.00")
+        self.assertEqual(data["summary"]["subtotal"], "37.50")
+        self.assertEqual(ProductVariant.objects.get(pk=a.pk).stock, 3)
+        self.assertEqual(ProductVariant.objects.get(pk=b.pk).stock, 5)
+
+    def test_a_bad_operation_rolls_back_the_batch(self):
+        a, b = self.variants[:2]
+        response = self.patch(
+            {"op": "add", "product_variant_id": a.pk, "quantity": 2},
+            {"op": "add", "product_variant_id": b.pk, "quantity": 6},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Only 5 left", response.json()["message"])
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(ProductVariant.objects.get(pk=a.pk).stock, 5)
+
+        response = self.patch({"op": "explode", "product_variant_id": a.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Operation 1", response.json()["message"])
+
+    def test_snapshot_is_cached_until_the_cart_changes(self):
+        def get_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get("/api/cart/")
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries), response.json()["data"]
+
+        self.patch(*({"op": "add", "product_variant_id": v.pk} for v in self.variants[:2]))
+        few, _ = get_queries()
+        self.assertEqual(get_queries()[0], 1)  # finding the user's cart
+
+        self.patch(*({"op": "add", "product_variant_id": v.pk} for v in self.variants[2:]))
+        many, data = get_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(len(data["items"]), 12)
+
+    def test_snapshot_survives_other_carts_but_not_its_products_changing(self):
+        mine, other = self.variants[:2]
+        self.patch({"op": "add", "product_variant_id": mine.pk})
+        self.client.get("/api/cart/")
+
+        bob = APIClient()
+        bob.force_authenticate(get_user_model().objects.create_user(email="bob@example.com", password="pw"))
+        bob.post("/api/cart/add/", {"product_variant_id": other.pk, "quantity": 1}, format="json")
+        with self.assertNumQueries(1):
+            self.client.get("/api/cart/")
+
+        product = mine.product
+        product.price = "20.00"
+        product.save()
+        self.assertEqual(self.client.get("/api/cart/").json()["data"]["items"][0]["unit_price"], "20.00")
+
+
+class AnonymousCartTests(TestCase):
+    def setUp(self):
+        self.a, self.b = make_variants(2, stock=5)
+        self.client = APIClient()
+
+    def add(self, variant, quantity, token=None):
+        headers = {"HTTP_X_CART_TOKEN": token} if token else {}
+        return self.client.post(
+            "/api/cart/add/", {"product_variant_id": variant.pk, "quantity": quantity}, format="json", **headers,
+        )
+
+    def stock(self, variant):
+        return ProductVariant.objects.get(pk=variant.pk).stock
+
+    def test_guest_cart_lives_behind_its_token(self):
+        self.assertEqual(self.client.get("/api/cart/").json()["data"]["items"], [])
+        self.assertFalse(Cart.objects.exists())
+
+        token = self.add(self.a, 2)["X-Cart-Token"]
+        self.add(self.b, 1, token=token)
+        body = self.client.get("/api/cart/", HTTP_X_CART_TOKEN=token).json()
+        self.assertEqual(len(body["data"]["items"]), 2)
+        self.assertEqual(body["cart_token"], token)
+        self.assertEqual(self.client.get("/api/cart/", HTTP_X_CART_TOKEN=token + "x").json()["data"]["items"], [])
+
+    def test_login_merges_the_guest_cart(self):
+        user = get_user_model().objects.create_user(email="merge@example.com", password="pw")
+        mine = Cart.objects.create(user=user)
+        apply_operations(mine, [{"op": "add", "product_variant_id": self.a.pk, "quantity": 1}])
+        token = self.add(self.a, 2)["X-Cart-Token"]
+        self.add(self.b, 1, token=token)
+
+        response = self.client.post(
+            "/api/login/", {"email": user.email, "password": "pw", "cart_token": token}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Cart.objects.get().pk, mine.pk)
+        self.assertEqual(
+            sorted(mine.items.values_list("product_variant_id", "quantity")), [(self.a.pk, 3), (self.b.pk, 1)],
+        )
+        holds = sorted(StockReservation.objects.filter(cart=mine, status="held").values_list("product_variant_id", "quantity"))
+        self.assertEqual(holds, [(self.a.pk, 3), (self.b.pk, 1)])
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (2, 4))
+
+    def test_guest_checkout_from_the_cart(self):
+        token = self.add(self.a, 2)["X-Cart-Token"]
+        response = self.client.post(
+            "/api/orders/checkout/", checkout_payload([]), format="json", HTTP_X_CART_TOKEN=token,
+        )
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(Order.objects.get().items.get().quantity, 2)
+        self.assertEqual(StockReservation.objects.get(status="converted").quantity, 2)
+        self.assertEqual(self.stock(self.a), 3)
+
+        # The cart is emptied: checking it out again has nothing to order
+        self.assertEqual(self.client.get("/api/cart/", HTTP_X_CART_TOKEN=token).json()["data"]["items"], [])
+        response = self.client.post(
+            "/api/orders/checkout/", checkout_payload([]), format="json", HTTP_X_CART_TOKEN=token,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.stock(self.a), 3)
 
-# Create your tests here.
+    def test_sweeper_deletes_idle_guest_carts(self):
+        self.add(self.a, 2)
+        user_cart = Cart.objects.create(user=get_user_model().objects.create_user(email="u@example.com", password="pw"))
+        Cart.objects.update(updated_at=timezone.now() - timedelta(days=30))
+        call_command("sweep_anonymous_carts", stdout=open("/dev/null", "w"))
+        self.assertEqual(list(Cart.objects.all()), [user_cart])
+        self.assertEqual(self.stock(self.a), 5)
@@ -1,28 +1,91 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from .models import Cart, CartItem
-from .serializers import CartSerializer, CartItemSerializer
-from apps.products.models import ProductVariant
+from rest_framework.permissions import AllowAny
+from .models import CartItem
+from .serializers import CartItemSerializer
+from .services import (
+    TOKEN_HEADER, CartError, apply_operations, cart_token, resolve_cart, snapshot, with_coupon,
+)
+from apps.marketing.coupons import CouponError
+from apps.orders.inventory import InsufficientStock
+from apps.orders.pricing import pricer_for
+
+
+def _bad_request(e):
+    return Response({
+        "code": 400,
+        "success": False,
+        "message": str(e)
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _not_found():
+    return Response({
+        "code": 404,
+        "success": False,
+        "message": "Cart item not found"
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+def _cart_data(request, cart):
+    """The cached cart snapshot, re-totalled for ?coupon=CODE if it is valid."""
+    data = snapshot(cart)
+    code = request.query_params.get("coupon")
+    if code:
+        try:
+            data = with_coupon(data, pricer_for(request), code)
+        except CouponError as e:
+            data = {**data, "summary": {**data["summary"], "coupon_error": str(e)}}
+    return data
+
+
+def _with_token(response, cart):
+    # Anonymous carts are only reachable through their token: hand it back
+    if cart is not None and cart.user_id is None:
+        token = cart_token(cart)
+        response.data["cart_token"] = token
+        response[TOKEN_HEADER] = token
+    return response
 
 
 class CartView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def get(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart)
-        return Response({
+        cart = resolve_cart(request)
+        return _with_token(Response({
             "code": 200,
             "success": True,
             "message": "Cart fetched successfully",
-            "data": serializer.data
-        })
+            "data": _cart_data(request, cart)
+        }), cart)
+
+    def patch(self, request):
+        """Apply a batch of add/update/remove operations in one transaction."""
+        try:
+            operations = request.data.get("operations")
+            if not isinstance(operations, list):
+                raise CartError("operations must be a list")
+            cart = apply_operations(resolve_cart(request, create=True), operations)
+            return _with_token(Response({
+                "code": 200,
+                "success": True,
+                "message": "Cart updated",
+                "data": _cart_data(request, cart)
+            }), cart)
+        except (CartError, InsufficientStock) as e:
+            return _bad_request(e)
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "success": False,
+                "message": f"Error updating cart: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class AddToCartAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def post(self, request):
         try:
@@ -36,68 +99,53 @@ class AddToCartAPIView(APIView):
                     "message": "Product variant ID is required"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            variant = ProductVariant.objects.get(id=variant_id)
-            cart, _ = Cart.objects.get_or_create(user=request.user)
-            item, created = CartItem.objects.get_or_create(cart=cart, product_variant=variant)
-
-            if not created:
-                item.quantity += quantity
-            else:
-                item.quantity = quantity
-            item.save()
+            cart = apply_operations(resolve_cart(request, create=True), [
+                {"op": "add", "product_variant_id": variant_id, "quantity": quantity}
+            ])
+            item = CartItem.objects.select_related("product_variant").get(cart=cart, product_variant_id=variant_id)
 
-            return Response({
+            return _with_token(Response({
                 "code": 201,
                 "success": True,
                 "message": "Item added to cart successfully",
                 "data": CartItemSerializer(item).data
-            }, status=status.HTTP_201_CREATED)
-        except ProductVariant.DoesNotExist:
-            return Response({
-                "code": 400,
-                "success": False,
-                "message": "Invalid product variant ID"
-            }, status=status.HTTP_400_BAD_REQUEST)
+            }, status=status.HTTP_201_CREATED), cart)
+        except (CartError, InsufficientStock) as e:
+            return _bad_request(e)
 
 
 class RemoveFromCartAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def delete(self, request, item_id):
-        try:
-            item = CartItem.objects.get(id=item_id, cart__user=request.user)
-            item.delete()
-            return Response({
-                "code": 200,
-                "success": True,
-                "message": "Item removed from cart"
-            })
-        except CartItem.DoesNotExist:
-            return Response({
-                "code": 404,
-                "success": False,
-                "message": "Cart item not found"
-            }, status=status.HTTP_404_NOT_FOUND)
+        cart = resolve_cart(request)
+        if cart is None or not CartItem.objects.filter(id=item_id, cart=cart).exists():
+            return _not_found()
+        apply_operations(cart, [{"op": "remove", "item_id": item_id}])
+        return Response({
+            "code": 200,
+            "success": True,
+            "message": "Item removed from cart"
+        })
 
 
 class UpdateCartItemAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def patch(self, request, item_id):
         try:
-            item = CartItem.objects.get(id=item_id, cart__user=request.user)
+            cart = resolve_cart(request)
+            item = CartItem.objects.get(id=item_id, cart=cart)
             quantity = int(request.data.get("quantity", item.quantity))
-            item.quantity = quantity
-            item.save()
+            apply_operations(cart, [{"op": "update", "item_id": item.pk, "quantity": quantity}])
+            item = CartItem.objects.select_related("product_variant").filter(pk=item.pk).first()
             return Response({
                 "code": 200,
                 "success": True,
-                "message": "Cart item updated",
-                "data": CartItemSerializer(item).data
+                "message": "Cart item updated" if item else "Item removed from cart",
+                "data": CartItemSerializer(item).data if item else None
             })
+        except (CartError, InsufficientStock) as e:
+            return _bad_request(e)
         except CartItem.DoesNotExist:
-            return Response({
-                "code": 404,
-                "success": False,
-                "message": "Cart item not found"
-            }, status=status.HTTP_404_NOT_FOUND)
+            return _not_found()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0003_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogauthor',
+            name='profile_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='homesection',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0004_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-created_at'], name='blogpost_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homesection',
+            index=models.Index(fields=['order'], name='home_section_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['-created_at'], name='testimonial_newest_idx'),
+        ),
+    ]
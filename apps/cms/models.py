@@ -8,6 +8,11 @@ class Testimonial(models.Model):
     rating = models.PositiveIntegerField(default=5)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='testimonial_newest_idx'),
+        ]
+
     def __str__(self):
         return f"{self.customer_name} ({self.rating}★)"
 
@@ -16,6 +21,7 @@ class BlogAuthor(models.Model):
     name = models.CharField(max_length=255)
     bio = models.TextField(blank=True)
     profile_image = models.ImageField(upload_to="blog/authors/", blank=True, null=True)
+    profile_image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.name
@@ -27,7 +33,12 @@ class BlogPost(models.Model):
     content = models.TextField()
     author = models.ForeignKey(BlogAuthor, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='blogpost_newest_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -51,8 +62,14 @@ class HomeSection(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField(blank=True)
     image = models.ImageField(upload_to="home/sections/", blank=True, null=True)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['order'], name='home_section_order_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.core.images import SrcsetField
 from .models import Testimonial, BlogPost, BlogAuthor, InfoPage, HomeSection, ContactMessage
 
 
@@ -9,9 +10,11 @@ class TestimonialSerializer(serializers.ModelSerializer):
 
 
 class BlogAuthorSerializer(serializers.ModelSerializer):
+    profile_image_srcset = SrcsetField(source='profile_image_derivatives')
+
     class Meta:
         model = BlogAuthor
-        fields = ['id', 'name', 'bio', 'profile_image']
+        fields = ['id', 'name', 'bio', 'profile_image', 'profile_image_srcset']
 
 
 class BlogPostSerializer(serializers.ModelSerializer):
@@ -29,9 +32,11 @@ class InfoPageSerializer(serializers.ModelSerializer):
 
 
 class HomeSectionSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(source='image_derivatives')
+
     class Meta:
         model = HomeSection
-        fields = ['id', 'title', 'content', 'image', 'order']
+        fields = ['id', 'title', 'content', 'image', 'image_srcset', 'order']
 
 
 class ContactMessageSerializer(serializers.ModelSerializer):
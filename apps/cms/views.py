@@ -1,6 +1,8 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from apps.core.cache import cached_response
+from apps.core.conditional import conditional_get, latest_update
 from apps.cms.models import Testimonial, BlogPost, InfoPage, HomeSection
 from apps.cms.serializers import (
     TestimonialSerializer, BlogPostSerializer, InfoPageSerializer, HomeSectionSerializer, ContactMessageSerializer
@@ -9,6 +11,8 @@ from apps.cms.serializers import (
 
 
 class TestimonialListAPIView(APIView):
+    @conditional_get('cms')
+    @cached_response('cms')
     def get(self, request):
         try:
             testimonials = Testimonial.objects.all().order_by('-created_at')
@@ -29,6 +33,8 @@ class TestimonialListAPIView(APIView):
 
 
 class BlogListAPIView(APIView):
+    @conditional_get('cms', last_modified=latest_update(BlogPost))
+    @cached_response('cms')
     def get(self, request):
         try:
             blogs = BlogPost.objects.all().order_by('-created_at')
@@ -49,6 +55,8 @@ class BlogListAPIView(APIView):
 
 
 class BlogDetailAPIView(APIView):
+    @conditional_get('cms', last_modified=latest_update(BlogPost))
+    @cached_response('cms')
     def get(self, request, slug):
         try:
             blog = BlogPost.objects.get(slug=slug)
@@ -75,6 +83,8 @@ class BlogDetailAPIView(APIView):
 
 
 class InfoPageDetailAPIView(APIView):
+    @conditional_get('cms')
+    @cached_response('cms')
     def get(self, request, slug):
         try:
             page = InfoPage.objects.get(slug=slug)
@@ -101,6 +111,8 @@ class InfoPageDetailAPIView(APIView):
 
 
 class HomeSectionListAPIView(APIView):
+    @conditional_get('cms')
+    @cached_response('cms')
     def get(self, request):
         try:
             sections = HomeSection.objects.all().order_by('order')
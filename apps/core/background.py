@@ -0,0 +1,49 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "BACKGROUND_WORKERS", 2),
+                    thread_name_prefix="background",
+                )
+    return _executor
+
+
+def _run(fn, args, kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", getattr(fn, "__name__", fn))
+
+
+def _run_in_worker(fn, args, kwargs):
+    try:
+        _run(fn, args, kwargs)
+    finally:
+        # Worker threads hold their own DB connections
+        close_old_connections()
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Run `fn` on the in-process worker pool, off the request path.
+    With BACKGROUND_SYNC = True (tests) it runs inline instead.
+    """
+    if getattr(settings, "BACKGROUND_SYNC", False):
+        _run(fn, args, kwargs)
+        return None
+    return _get_executor().submit(_run_in_worker, fn, args, kwargs)
@@ -0,0 +1,90 @@
+from apps.cms.models import HomeSection, Testimonial
+from apps.cms.serializers import HomeSectionSerializer, TestimonialSerializer
+from apps.marketing.models import FeaturedProduct
+from apps.marketing.serializers import FeaturedProductSerializer
+from apps.products.models import Product
+from apps.products.serializers import ProductSerializer, serialize_category_tree
+from apps.site_config.models import SiteConfiguration, SocialLink
+from apps.site_config.serializers import SiteConfigurationSerializer, SocialLinkSerializer
+
+from .cache import cached_value
+
+
+class BootstrapContext:
+    """
+    Data shared between sections built in the same request: social links are
+    read once for site_config and social_links, and the products behind both
+    featured lists are loaded and serialized once.
+    """
+
+    def __init__(self):
+        self._social_links = None
+        self._products = None
+
+    def social_links(self):
+        if self._social_links is None:
+            self._social_links = SocialLinkSerializer(SocialLink.objects.all(), many=True).data
+        return self._social_links
+
+    def products(self):
+        if self._products is None:
+            ids = set(Product.objects.filter(is_featured=True).values_list("pk", flat=True))
+            ids.update(FeaturedProduct.objects.values_list("product_id", flat=True))
+            products = Product.objects.for_listing().filter(pk__in=ids)
+            self._products = {row["id"]: row for row in ProductSerializer(products, many=True).data}
+        return self._products
+
+
+def build_site_config(ctx):
+    config = SiteConfiguration.objects.first()
+    if not config:
+        return None
+    return SiteConfigurationSerializer(config, context={"social_links": ctx.social_links()}).data
+
+
+def build_social_links(ctx):
+    return ctx.social_links()
+
+
+def build_categories(ctx):
+    return serialize_category_tree()
+
+
+def build_featured_products(ctx):
+    products = ctx.products()
+    featured = Product.objects.filter(is_featured=True).order_by("pk").values_list("pk", flat=True)
+    return [products[pk] for pk in featured if pk in products]
+
+
+def build_featured(ctx):
+    entries = FeaturedProduct.objects.order_by("display_order")
+    return FeaturedProductSerializer(entries, many=True, context={"products": ctx.products()}).data
+
+
+def build_home_sections(ctx):
+    return HomeSectionSerializer(HomeSection.objects.order_by("order"), many=True).data
+
+
+def build_testimonials(ctx):
+    return TestimonialSerializer(Testimonial.objects.order_by("-created_at"), many=True).data
+
+
+# name -> (cache groups, builder)
+SECTIONS = {
+    "site_config": (("site",), build_site_config),
+    "social_links": (("site",), build_social_links),
+    "categories": (("catalog",), build_categories),
+    "featured_products": (("catalog",), build_featured_products),
+    "featured": (("catalog", "marketing"), build_featured),
+    "home_sections": (("cms",), build_home_sections),
+    "testimonials": (("cms",), build_testimonials),
+}
+
+
+def build_bootstrap(names):
+    ctx = BootstrapContext()
+    data = {}
+    for name in names:
+        groups, builder = SECTIONS[name]
+        data[name] = cached_value(f"bootstrap:{name}", groups, (), lambda: builder(ctx))
+    return data
@@ -0,0 +1,233 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .background import submit
+
+
+# Cached responses are tagged with the version of every group they read from.
+# Saving or deleting any model of a group bumps its version, which orphans all
+# entries built from the old data (they simply age out of the cache).
+CACHE_GROUPS = {
+    "catalog": [
+        "products.Category",
+        "products.Product",
+        "products.ProductImage",
+        "products.ProductVariant",
+        "products.ProductVariantValue",
+        "products.Attribute",
+        "products.AttributeValue",
+    ],
+    "attributes": [
+        "products.Attribute",
+        "products.AttributeValue",
+    ],
+    "marketing": [
+        "marketing.FeaturedProduct",
+    ],
+    "cms": [
+        "cms.Testimonial",
+        "cms.BlogAuthor",
+        "cms.BlogPost",
+        "cms.InfoPage",
+        "cms.HomeSection",
+    ],
+    "site": [
+        "site_config.SiteConfiguration",
+        "site_config.SocialLink",
+    ],
+}
+
+_stat_names = set()
+
+
+def get_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _version_key(group):
+    return f"cachever:{group}"
+
+
+def group_versions(groups):
+    cache = get_cache()
+    keys = [_version_key(group) for group in groups]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            # Seed from the clock rather than 1 so an evicted version key can
+            # never collide with entries cached under an earlier version.
+            cache.add(key, time.time_ns() // 1000, None)
+            version = cache.get(key)
+        versions.append(version)
+    return versions
+
+
+def bump_group(group):
+    cache = get_cache()
+    key = _version_key(group)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns() // 1000, None)
+    cache.set(_changed_key(group), time.time(), None)
+
+
+def _changed_key(group):
+    return f"cachechanged:{group}"
+
+
+def group_changed_at(groups, default=None):
+    """
+    Unix time of the last change to each group. Unknown groups (cold or
+    evicted cache) are seeded from `default()` when given, else from now.
+    """
+    cache = get_cache()
+    keys = [_changed_key(group) for group in groups]
+    found = cache.get_many(keys)
+    stamps = []
+    for key in keys:
+        stamp = found.get(key)
+        if stamp is None:
+            seed = default() if default is not None else None
+            cache.add(key, seed if seed is not None else time.time(), None)
+            stamp = cache.get(key)
+        stamps.append(stamp)
+    return stamps
+
+
+def invalidate_group(group):
+    # Bump now and again after commit: the second bump drops anything a
+    # concurrent request cached from the pre-commit state.
+    bump_group(group)
+    transaction.on_commit(lambda: bump_group(group))
+
+
+def product_group(product_id):
+    """
+    Per-product group, for entries that depend on a few products only (cart
+    snapshots). Bumped by product/variant edits and by stock movements,
+    which leave the global "catalog" group alone.
+    """
+    return f"product:{product_id}"
+
+
+def invalidate_products(product_ids):
+    for product_id in set(product_ids):
+        invalidate_group(product_group(product_id))
+
+
+def groups_for_model(model):
+    label = model._meta.label
+    return [group for group, labels in CACHE_GROUPS.items() if label in labels]
+
+
+def record(name, outcome):
+    _stat_names.add(name)
+    cache = get_cache()
+    key = f"cachestats:{name}:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def cache_stats():
+    cache = get_cache()
+    names = sorted(_stat_names)
+    found = cache.get_many([f"cachestats:{name}:{outcome}" for name in names for outcome in ("hit", "miss")])
+    stats = {}
+    for name in names:
+        hits = found.get(f"cachestats:{name}:hit", 0)
+        misses = found.get(f"cachestats:{name}:miss", 0)
+        stats[name] = {"hits": hits, "misses": misses}
+    return stats
+
+
+def cached_value(name, groups, parts, builder, timeout=None):
+    """
+    Return builder() cached under `name` + `parts`, scoped to the current
+    versions of `groups`.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+    versions = group_versions(groups)
+    # Versions go into the digest: a cart snapshot depends on one group per product
+    digest = hashlib.md5(repr((versions, parts)).encode()).hexdigest()
+    key = f"resp:{name}:{digest}"
+
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        record(name, "hit")
+        return value
+    record(name, "miss")
+    value = builder()
+    if value is not None:
+        cache.set(key, value, timeout)
+    return value
+
+
+def stale_while_revalidate(key, builder, ttl, max_stale, refresh=False):
+    """
+    Return (value, computed_at) for builder(), cached under `key`. Fresh for
+    `ttl` seconds; after that the stale value is still returned while one
+    background job (apps.core.background) recomputes it. Values older than
+    ttl + max_stale are gone from the cache and rebuilt inline, as is
+    everything when `refresh` is set.
+    """
+    cache = get_cache()
+    entry = None if refresh else cache.get(key)
+    if entry is None:
+        entry = _rebuild(key, builder, ttl + max_stale)
+    elif time.time() - entry["at"] > ttl and cache.add(f"{key}:refreshing", 1, ttl or 60):
+        # cache.add is the lock: only the first request past the TTL refreshes
+        submit(_rebuild, key, builder, ttl + max_stale, release=True)
+    return entry["value"], entry["at"]
+
+
+def _rebuild(key, builder, timeout, release=False):
+    cache = get_cache()
+    try:
+        entry = {"value": builder(), "at": time.time()}
+        cache.set(key, entry, timeout)
+        return entry
+    finally:
+        if release:
+            cache.delete(f"{key}:refreshing")
+
+
+def cached_response(*groups, timeout=None):
+    """
+    Cache successful responses of a public APIView GET handler, keyed by
+    endpoint, path and query parameters.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            # Qualified: products and marketing both have a FeaturedProductListAPIView
+            name = f"{type(view).__module__}.{type(view).__qualname__}"
+            query = urlencode(sorted(request.query_params.lists()), doseq=True)
+            responses = {}
+
+            def build():
+                response = method(view, request, *args, **kwargs)
+                responses["live"] = response
+                if response.status_code != 200:
+                    return None
+                return {"data": response.data, "status": response.status_code}
+
+            cached = cached_value(name, groups, (request.path, query), build, timeout)
+            if "live" in responses:
+                return responses["live"]
+            return Response(cached["data"], status=cached["status"])
+        return wrapper
+    return decorator
@@ -0,0 +1,56 @@
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import group_changed_at, group_versions
+
+
+def latest_update(model, field="updated_at"):
+    """Last-Modified source: newest `field` across a table."""
+    def lookup(request, *args, **kwargs):
+        return model._default_manager.aggregate(latest=Max(field))["latest"]
+    return lookup
+
+
+def conditional_get(*groups, last_modified=None):
+    """
+    Add strong ETag and Last-Modified headers to an APIView GET handler and
+    answer If-None-Match / If-Modified-Since with 304 before the handler runs,
+    so unchanged resources are never queried, serialized or re-sent.
+
+    Both validators come from the cache bookkeeping of `groups` (version and
+    last change time, bumped on every save/delete), so revalidation costs no
+    queries. `last_modified` reads the updated_at column and is only used to
+    seed the change time when the cache has lost it.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            def seed():
+                modified = last_modified(request, *args, **kwargs) if last_modified else None
+                return modified.timestamp() if modified else None
+
+            timestamp = int(max(group_changed_at(groups, default=seed)))
+
+            query = urlencode(sorted(request.query_params.lists()), doseq=True)
+            versions = ".".join(str(v) for v in group_versions(groups))
+            raw = f"{view.__class__.__name__}|{request.path}|{query}|{versions}|{timestamp}"
+            etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers["ETag"] = etag
+                response.headers["Last-Modified"] = http_date(timestamp)
+                # Let clients store the response but revalidate before reuse
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
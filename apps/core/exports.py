@@ -0,0 +1,71 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Exports are generators of text lines, so an export of any size is written
+# (to a response or a file) a line at a time. Rows should come from
+# QuerySet.iterator(chunk_size=...) to keep the database side bounded too.
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+CHUNK_SIZE = 2000
+
+
+class _Line:
+    """File-like target for csv.writer: writerow() returns the line."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheets run cells starting with these as formulas; customer-typed
+# text (names, addresses, attributes) must not be able to inject one
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([csv_cell(value) for value in row])
+
+
+def jsonl_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(fmt, columns, rows):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (use {', '.join(FORMATS)})")
+    return csv_lines(columns, rows) if fmt == "csv" else jsonl_lines(columns, rows)
+
+
+def streaming_export(filename, fmt, columns, rows):
+    response = StreamingHttpResponse(export_lines(fmt, columns, rows), content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def export_actions(export):
+    """
+    CSV and JSONL admin actions for `export(queryset, fmt)`, which returns a
+    streaming response.
+    """
+    def make(fmt):
+        def action(modeladmin, request, queryset):
+            return export(queryset, fmt)
+        action.__name__ = f"export_{fmt}"
+        action.short_description = f"Export selected as {fmt.upper()}"
+        return action
+    return [make(fmt) for fmt in FORMATS]
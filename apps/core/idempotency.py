@@ -0,0 +1,116 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def _setting(name, default):
+    return timedelta(seconds=getattr(settings, name, default))
+
+
+def _error(code, message):
+    return Response({"code": code, "success": False, "message": message}, status=code)
+
+
+def _digest(*parts):
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _claim(key, scope, request_hash):
+    """
+    Insert the in-progress row for `key`, or return the row already there.
+    Expired rows and abandoned in-progress rows (older than
+    IDEMPOTENCY_LOCK_TIMEOUT, e.g. the worker died) are taken over.
+    """
+    while True:
+        now = timezone.now()
+        existing = IdempotencyKey.objects.filter(key=key).first()
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    IdempotencyKey.objects.create(
+                        key=key, scope=scope, request_hash=request_hash, locked_at=now,
+                        expires_at=now + _setting("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60),
+                    )
+                return None
+            except IntegrityError:
+                continue  # a concurrent retry inserted it first
+        stale = now - _setting("IDEMPOTENCY_LOCK_TIMEOUT", 60)
+        if existing.expires_at <= now or (existing.status == "in_progress" and existing.locked_at < stale):
+            # Conditional delete: of two racing retries only one gets to re-insert
+            IdempotencyKey.objects.filter(pk=existing.pk, locked_at=existing.locked_at).delete()
+            continue
+        return existing
+
+
+def idempotent(scope):
+    """
+    Make an APIView POST handler safe to retry. A request carrying an
+    Idempotency-Key header runs once; repeats with the same key (from the
+    same user) get the stored response back instead of running again.
+    A repeat that arrives while the first is still running gets 409, and
+    reusing a key for a different request body gets 422. Server errors are
+    not stored, so the client can retry them.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            client_key = request.headers.get(HEADER)
+            if not client_key:
+                return method(view, request, *args, **kwargs)
+            if len(client_key) > 255:
+                return _error(400, f"{HEADER} must be at most 255 characters")
+
+            caller = request.user.pk if request.user.is_authenticated else "anonymous"
+            key = _digest(scope, caller, client_key)
+            request_hash = _digest(request.path, json.dumps(request.data, sort_keys=True, default=str))
+
+            existing = _claim(key, scope, request_hash)
+            if existing is not None:
+                if existing.request_hash != request_hash:
+                    return _error(422, f"{HEADER} was already used for a different request")
+                if existing.status != "completed":
+                    response = _error(409, "A request with this Idempotency-Key is still being processed")
+                    response["Retry-After"] = "1"
+                    return response
+                response = Response(existing.response_body, status=existing.response_status)
+                response[REPLAY_HEADER] = "true"
+                return response
+
+            try:
+                response = method(view, request, *args, **kwargs)
+            except Exception:
+                IdempotencyKey.objects.filter(key=key).delete()
+                raise
+            if response.status_code >= 500:
+                IdempotencyKey.objects.filter(key=key).delete()
+            else:
+                IdempotencyKey.objects.filter(key=key).update(
+                    status="completed", response_status=response.status_code, response_body=response.data,
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys in batches. Returns the number deleted."""
+    deleted = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,147 @@
+import hashlib
+import io
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+from .cache import groups_for_model, invalidate_group
+
+# model label -> (image field, JSONField holding the derivative manifest)
+IMAGE_FIELDS = {
+    "products.ProductImage": ("image", "derivatives"),
+    "cms.HomeSection": ("image", "image_derivatives"),
+    "cms.BlogAuthor": ("profile_image", "profile_image_derivatives"),
+    "site_config.SiteConfiguration": ("logo_url", "logo_derivatives"),
+}
+
+DEFAULT_WIDTHS = (320, 640, 1024, 1600)
+DEFAULT_FORMATS = ("avif", "webp", "jpeg")
+QUALITY = {"avif": 60, "webp": 80, "jpeg": 82}
+EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+# Part of the content hash: bump when encoder settings change to re-render everything
+PIPELINE_VERSION = "1"
+
+
+def derivative_widths():
+    return tuple(sorted(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", DEFAULT_WIDTHS)))
+
+
+def derivative_formats():
+    # Formats the local Pillow build cannot encode are skipped
+    wanted = getattr(settings, "IMAGE_DERIVATIVE_FORMATS", DEFAULT_FORMATS)
+    return tuple(fmt for fmt in wanted if fmt == "jpeg" or features.check(fmt))
+
+
+def _content_hash(data):
+    digest = hashlib.sha256(data)
+    digest.update(f"|{PIPELINE_VERSION}|{derivative_widths()}|{sorted(QUALITY.items())}".encode())
+    return digest.hexdigest()
+
+
+def _encode(image, fmt):
+    if fmt == "jpeg" and image.mode != "RGB":
+        # Flatten transparency onto white; JPEG has no alpha channel
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    buffer = io.BytesIO()
+    options = {"quality": QUALITY[fmt]}
+    if fmt == "jpeg":
+        options.update(optimize=True, progressive=True)
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(field_file):
+    """
+    Render every configured width (narrower than the original) in every
+    format. Files live under derivatives/<hash>/ keyed on the source bytes,
+    so re-uploads of the same photo reuse the existing renders.
+    Returns the manifest stored on the model.
+    """
+    field_file.open("rb")
+    try:
+        data = field_file.read()
+    finally:
+        field_file.close()
+
+    digest = _content_hash(data)
+    prefix = f"derivatives/{digest[:2]}/{digest}"
+    with Image.open(io.BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        width, height = source.size
+        widths = [w for w in derivative_widths() if w < width] or [width]
+
+        formats = {}
+        for fmt in derivative_formats():
+            renders = []
+            for target in widths:
+                path = f"{prefix}/{target}w.{EXTENSIONS[fmt]}"
+                if not default_storage.exists(path):
+                    size = (target, max(1, round(height * target / width)))
+                    resized = source if size == source.size else source.resize(size, Image.LANCZOS)
+                    default_storage.save(path, ContentFile(_encode(resized, fmt)))
+                renders.append([target, path])
+            formats[fmt] = renders
+
+    return {
+        "source": field_file.name,
+        "hash": digest,
+        "width": width,
+        "height": height,
+        "formats": formats,
+    }
+
+
+def needs_derivatives(instance):
+    image_field, manifest_field = IMAGE_FIELDS[instance._meta.label]
+    image = getattr(instance, image_field)
+    manifest = getattr(instance, manifest_field) or {}
+    return bool(image) and manifest.get("source") != image.name
+
+
+def build_derivatives(label, pk):
+    """Worker job: render derivatives for one row and store the manifest."""
+    model = apps.get_model(label)
+    image_field, manifest_field = IMAGE_FIELDS[label]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not getattr(instance, image_field):
+        return None
+    manifest = generate_derivatives(getattr(instance, image_field))
+    # update() skips save signals (no re-trigger), so invalidate caches by hand
+    model.objects.filter(pk=pk).update(**{manifest_field: manifest})
+    for group in groups_for_model(model):
+        invalidate_group(group)
+    return manifest
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """
+    Renders a derivative manifest as {"width", "height", "srcset": {fmt: "url 320w, ..."}}.
+    Null until the worker has rendered the image; clients then fall back to the original.
+    """
+
+    def to_representation(self, manifest):
+        if not manifest or not manifest.get("formats"):
+            return None
+        request = self.context.get("request")
+
+        def url(path):
+            location = default_storage.url(path)
+            return request.build_absolute_uri(location) if request else location
+
+        return {
+            "width": manifest["width"],
+            "height": manifest["height"],
+            "srcset": {
+                fmt: ", ".join(f"{url(path)} {width}w" for width, path in renders)
+                for fmt, renders in manifest["formats"].items()
+            },
+        }
@@ -0,0 +1,181 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Request latency histogram buckets, in ms (the last bucket is "slower")
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RequestProfile:
+    """
+    SQL issued while handling one request, recorded through
+    connection.execute_wrapper. Queries are kept as (sql, ms); the SQL has
+    placeholders rather than values, so it doubles as the query's signature.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.render_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - start) * 1000))
+
+    @property
+    def db_ms(self):
+        return sum(ms for _, ms in self.queries)
+
+    def duplicates(self, threshold):
+        """{sql: times} for signatures run at least `threshold` times (N+1 suspects)."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: n for sql, n in counts.most_common() if n >= threshold}
+
+
+class EndpointStats:
+    def __init__(self, window):
+        self.count = 0
+        self.total_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.with_duplicates = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=window)
+
+    def add(self, total_ms, queries, db_ms, duplicates):
+        self.count += 1
+        self.total_ms += total_ms
+        self.queries += queries
+        self.db_ms += db_ms
+        self.with_duplicates += bool(duplicates)
+        self.buckets[next((i for i, edge in enumerate(BUCKETS_MS) if total_ms <= edge), len(BUCKETS_MS))] += 1
+        self.recent.append(total_ms)
+
+    def snapshot(self):
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 2) if recent else None
+
+        labels = [f"<={edge}ms" for edge in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(recent[-1], 2) if recent else None,
+            "avg_queries": round(self.queries / self.count, 2),
+            "avg_db_ms": round(self.db_ms / self.count, 2),
+            "requests_with_duplicates": self.with_duplicates,
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+# Per process: with several workers, each reports the requests it served
+_endpoints = {}
+_lock = threading.Lock()
+
+
+def record(name, total_ms, queries, db_ms, duplicates):
+    with _lock:
+        stats = _endpoints.get(name)
+        if stats is None:
+            stats = _endpoints[name] = EndpointStats(getattr(settings, "METRICS_WINDOW", 500))
+        stats.add(total_ms, queries, db_ms, duplicates)
+
+
+def endpoint_metrics():
+    """Latency and SQL figures per URL name; percentiles cover the last METRICS_WINDOW requests."""
+    with _lock:
+        return {name: stats.snapshot() for name, stats in sorted(_endpoints.items())}
+
+
+def reset_metrics():
+    with _lock:
+        _endpoints.clear()
+
+
+def endpoint_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "unresolved"
+
+
+def server_timing(total_ms, profile, duplicates):
+    parts = [
+        f'db;dur={profile.db_ms:.1f};desc="{len(profile.queries)} queries"',
+        f"render;dur={profile.render_ms:.1f}",
+        f"total;dur={total_ms:.1f}",
+    ]
+    if duplicates:
+        parts.append(f'dup;desc="{sum(duplicates.values())} repeated queries"')
+    return ", ".join(parts)
+
+
+def log_slow_request(request, name, total_ms, profile, duplicates):
+    lines = [
+        f"Slow request {request.method} {request.path} ({name}): {total_ms:.1f} ms, "
+        f"{len(profile.queries)} queries in {profile.db_ms:.1f} ms, render {profile.render_ms:.1f} ms"
+    ]
+    for sql, times in duplicates.items():
+        lines.append(f"  repeated x{times}: {sql}")
+    for sql, ms in sorted(profile.queries, key=lambda q: q[1], reverse=True)[:5]:
+        lines.append(f"  {ms:.1f} ms: {sql}")
+    logger.warning("\n".join(lines))
+
+
+class InstrumentationMiddleware:
+    """
+    Profiles a sample of requests (INSTRUMENTATION_SAMPLE_RATE): SQL count
+    and time, repeated queries and render time go out as a Server-Timing
+    header and into per-endpoint stats (endpoint_metrics). Requests slower
+    than SLOW_REQUEST_MS are logged with their slowest and repeated SQL.
+    Unsampled requests pass straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 0)
+        if not rate or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        profile = request._profile = RequestProfile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        name = endpoint_name(request)
+        duplicates = profile.duplicates(getattr(settings, "DUPLICATE_QUERY_THRESHOLD", 3))
+        record(name, total_ms, len(profile.queries), profile.db_ms, duplicates)
+        response["Server-Timing"] = server_timing(total_ms, profile, duplicates)
+        if total_ms >= getattr(settings, "SLOW_REQUEST_MS", 500):
+            log_slow_request(request, name, total_ms, profile, duplicates)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to JSON) after the view
+        # returns; time that step too
+        profile = getattr(request, "_profile", None)
+        if profile is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                profile.render_ms = (time.perf_counter() - started) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
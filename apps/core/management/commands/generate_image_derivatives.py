@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.core.images import IMAGE_FIELDS, build_derivatives, needs_derivatives
+
+
+def _build(label, pk):
+    try:
+        return build_derivatives(label, pk)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Render responsive image derivatives for existing uploads (missing or stale ones by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", action="append", choices=sorted(IMAGE_FIELDS), help="Limit to these models")
+        parser.add_argument("--force", action="store_true", help="Re-render images that already have derivatives")
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        labels = options["model"] or list(IMAGE_FIELDS)
+        jobs = []
+        for label in labels:
+            model = apps.get_model(label)
+            image_field, _ = IMAGE_FIELDS[label]
+            for instance in model.objects.exclude(**{image_field: ""}).exclude(**{f"{image_field}__isnull": True}).iterator():
+                if options["force"] or needs_derivatives(instance):
+                    jobs.append((label, instance.pk))
+
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS("All images already have derivatives"))
+            return
+
+        self.stdout.write(f"Rendering derivatives for {len(jobs)} images with {options['workers']} workers...")
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            futures = {pool.submit(_build, label, pk): (label, pk) for label, pk in jobs}
+            for future in as_completed(futures):
+                label, pk = futures[future]
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"  {label} #{pk}: {e}")
+                if (done + failed) % 50 == 0:
+                    self.stdout.write(f"  {done + failed}/{len(jobs)}")
+
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(f"Rendered {done} images, {failed} failed"))
+        if failed:
+            raise CommandError(f"{failed} images could not be rendered")
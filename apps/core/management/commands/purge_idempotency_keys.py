@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses past IDEMPOTENCY_KEY_TTL (run from cron)"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys"))
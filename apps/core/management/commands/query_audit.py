@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.query_audit import audit
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot query shapes (apps.core.query_audit) and flag full scans and temp sorts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the plan of every query")
+        parser.add_argument("--strict", action="store_true", help="Exit with an error if anything is flagged")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("query_audit reads SQLite's EXPLAIN QUERY PLAN output")
+
+        flagged = 0
+        for name, plan, problems in audit():
+            if problems:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"{name}: {'; '.join(problems)}"))
+            elif options["verbose_plans"]:
+                self.stdout.write(f"{name}: ok")
+            if options["verbose_plans"] or problems:
+                for line in plan:
+                    self.stdout.write(f"    {line}")
+
+        if flagged and options["strict"]:
+            raise CommandError(f"{flagged} query shape(s) need an index")
+        style = self.style.WARNING if flagged else self.style.SUCCESS
+        self.stdout.write(style(f"{flagged} query shape(s) flagged"))
@@ -0,0 +1,33 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored outcome of a request sent with an Idempotency-Key header
+    (see apps.core.idempotency). Rows expire after IDEMPOTENCY_KEY_TTL.
+    """
+    STATUS_CHOICES = [
+        ('in_progress', 'In progress'),
+        ('completed', 'Completed'),
+    ]
+
+    # sha256 of scope + caller + client key, so keys never collide across
+    # endpoints or users
+    key = models.CharField(max_length=64, unique=True)
+    scope = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    locked_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key[:12]} ({self.status})"
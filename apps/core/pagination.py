@@ -0,0 +1,104 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, page_size):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    def meta(self):
+        return {
+            "next_cursor": self.next_cursor,
+            "page_size": self.page_size,
+            "has_next": self.next_cursor is not None,
+        }
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a fixed ordering, e.g. ('-created_at', 'id').
+
+    The cursor holds the ordering values of the last row of the page, so every
+    page is a single indexed range query instead of an OFFSET scan. The last
+    field of the ordering must be unique (normally the primary key).
+    """
+    default_page_size = 20
+    max_page_size = 100
+
+    def __init__(self, ordering, default_page_size=None, max_page_size=None):
+        self.ordering = tuple(ordering)
+        if default_page_size:
+            self.default_page_size = default_page_size
+        if max_page_size:
+            self.max_page_size = max_page_size
+
+    def get_page_size(self, raw):
+        if raw in (None, ""):
+            return self.default_page_size
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            raise InvalidCursor("page_size must be an integer")
+        return max(1, min(size, self.max_page_size))
+
+    def paginate(self, queryset, cursor=None, page_size=None):
+        page_size = self.get_page_size(page_size)
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(queryset.model, self.decode(queryset.model, cursor)))
+
+        rows = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = self.encode(rows[-1])
+        return KeysetPage(rows, next_cursor, page_size)
+
+    def paginate_request(self, queryset, request):
+        return self.paginate(
+            queryset,
+            cursor=request.query_params.get("cursor"),
+            page_size=request.query_params.get("page_size"),
+        )
+
+    # ---- cursor encoding
+
+    def _fields(self):
+        return [(name.lstrip("-"), name.startswith("-")) for name in self.ordering]
+
+    def encode(self, obj):
+        values = []
+        for name, _ in self._fields():
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, model, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            fields = self._fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
+        except Exception:
+            raise InvalidCursor("Invalid cursor")
+
+    def _after(self, model, values):
+        # (a, b, c) > (x, y, z)  ==  a > x  OR  (a = x AND b > y)  OR  (a = x AND b = y AND c > z)
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
@@ -0,0 +1,106 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from apps.cart.models import Cart, CartItem
+from apps.cms.models import BlogPost, HomeSection, Testimonial
+from apps.account.models import CustomerAddress, PasswordResetCode
+from apps.marketing.models import Coupon, CouponUsage, CouponUserCounter, FeaturedProduct
+from apps.orders.models import DailySales, Order, OrderItem, StockReservation
+from apps.products.models import Category, Product, ProductVariant
+from apps.tasks.models import Task
+
+# The query shapes behind the API, the admin and the background jobs, with
+# placeholder values. `manage.py query_audit` runs EXPLAIN QUERY PLAN on each
+# and flags tables that are read by a full scan or sorted in a temp b-tree.
+# Add a shape here whenever a new hot query is introduced.
+
+
+def query_shapes():
+    User = get_user_model()
+    now = timezone.now()
+    week_ago = now - timedelta(days=7)
+    return {
+        # catalog
+        "products: newest page": Product.objects.order_by("-created_at", "id")[:20],
+        "products: cheapest page": Product.objects.order_by("min_price", "id")[:20],
+        "products: in stock by price": Product.objects.filter(in_stock=True).order_by("min_price", "id")[:20],
+        "products: featured": Product.objects.filter(is_featured=True).order_by("pk"),
+        "products: by slug": Product.objects.filter(slug="x"),
+        "products: changed since": Product.objects.filter(updated_at__gt=week_ago),
+        "variants: of products": ProductVariant.objects.filter(product_id__in=[1, 2]),
+        "categories: by slug": Category.objects.filter(slug="x"),
+        # orders
+        "orders: customer history": Order.objects.filter(customer_id=1).order_by("-created_at", "-id")[:20],
+        "orders: customer detail": Order.objects.filter(pk=1, customer_id=1),
+        "orders: by status, newest": Order.objects.filter(status="pending").order_by("-created_at")[:100],
+        "orders: date range": Order.objects.filter(created_at__gte=week_ago, created_at__lt=now),
+        "orders: recent": Order.objects.order_by("-created_at")[:10],
+        "order items: of orders": OrderItem.objects.filter(order_id__in=[1, 2]),
+        "reservations: expired holds": StockReservation.objects.filter(status="held", expires_at__lte=now),
+        "reservations: cart holds": StockReservation.objects.filter(cart_id=1, status="held"),
+        "rollups: last 7 days": DailySales.objects.filter(day__gte=week_ago.date()),
+        # customers
+        "customers: by email": User.objects.filter(email="x@example.com"),
+        "customers: guests": User.objects.filter(is_guest=True).order_by().values("pk"),
+        "customers: joined since": User.objects.filter(date_joined__gte=week_ago).order_by().values("pk"),
+        "customers: admin list": User.objects.order_by("-date_joined")[:100],
+        "addresses: of customer": CustomerAddress.objects.filter(customer_id=1),
+        "reset codes: by email": PasswordResetCode.objects.filter(email="x@example.com"),
+        "reset codes: by token": PasswordResetCode.objects.filter(reset_token="x", is_used=True),
+        "reset codes: by user": PasswordResetCode.objects.filter(user_id=1, code="123456", is_used=False),
+        # carts
+        "carts: of user": Cart.objects.filter(user_id=1).order_by("pk")[:1],
+        "carts: idle anonymous": Cart.objects.filter(user__isnull=True, updated_at__lt=week_ago).order_by("updated_at")[:500],
+        "cart items: of cart": CartItem.objects.filter(cart_id=1),
+        # marketing
+        "coupons: by code": Coupon.objects.filter(code="SAVE10"),
+        "coupons: per-user count": CouponUserCounter.objects.filter(coupon_id=1, user_id=1),
+        "coupons: usage of coupon": CouponUsage.objects.filter(coupon_id=1, user_id=1).values("pk"),
+        "featured entries: ordered": FeaturedProduct.objects.order_by("display_order"),
+        # cms
+        "home sections: ordered": HomeSection.objects.order_by("order"),
+        "testimonials: newest": Testimonial.objects.order_by("-created_at"),
+        "blog: newest": BlogPost.objects.order_by("-created_at"),
+        "blog: by slug": BlogPost.objects.filter(slug="x"),
+        # task queue
+        "tasks: due": Task.objects.filter(status="queued", run_at__lte=now).order_by("run_at", "id")[:10],
+        "tasks: stuck": Task.objects.filter(status="running", locked_at__lt=week_ago),
+    }
+
+
+# SCAN lines without an index are full table scans. SQLite 3.36+ prints
+# "SCAN t", older versions "SCAN TABLE t".
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def explain(queryset):
+    """EXPLAIN QUERY PLAN detail lines for a queryset (SQLite only)."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(plan):
+    found = []
+    for line in plan:
+        match = FULL_SCAN.match(line)
+        if match:
+            found.append(f"full scan of {match.group(1)}")
+        elif line.startswith(TEMP_SORT):
+            found.append(line.lower())
+    return found
+
+
+def audit(shapes=None):
+    """[(name, plan lines, problems)] for every shape."""
+    results = []
+    for name, queryset in (shapes or query_shapes()).items():
+        plan = explain(queryset)
+        results.append((name, plan, problems(plan)))
+    return results
@@ -0,0 +1,57 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .background import submit
+from .cache import CACHE_GROUPS, invalidate_group, invalidate_products
+from .images import IMAGE_FIELDS, build_derivatives, needs_derivatives
+
+
+def _make_invalidator(group):
+    def handler(sender, **kwargs):
+        invalidate_group(group)
+    return handler
+
+
+def connect_cache_invalidation():
+    for group, labels in CACHE_GROUPS.items():
+        handler = _make_invalidator(group)
+        for label in labels:
+            model = apps.get_model(label)
+            uid = f"cache-invalidate:{group}:{label}"
+            post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+            post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+def _product_ids(sender, instance):
+    if sender._meta.label == "products.Product":
+        return [instance.pk]
+    if sender._meta.label == "products.ProductVariantValue":
+        # The variant may already be gone when a cascade deletes its values;
+        # its own delete bumps the product then
+        variant_model = sender._meta.get_field("variant").related_model
+        return list(variant_model.objects.filter(pk=instance.variant_id).values_list("product_id", flat=True))
+    return [instance.product_id]
+
+
+def _invalidate_product(sender, instance, **kwargs):
+    invalidate_products(_product_ids(sender, instance))
+
+
+def connect_product_invalidation():
+    for label in ("products.Product", "products.ProductImage", "products.ProductVariant", "products.ProductVariantValue"):
+        model = apps.get_model(label)
+        uid = f"product-invalidate:{label}"
+        post_save.connect(_invalidate_product, sender=model, dispatch_uid=uid)
+        post_delete.connect(_invalidate_product, sender=model, dispatch_uid=uid)
+
+
+def _schedule_derivatives(sender, instance, **kwargs):
+    if needs_derivatives(instance):
+        label, pk = sender._meta.label, instance.pk
+        transaction.on_commit(lambda: submit(build_derivatives, label, pk), robust=True)
+
+
+def connect_image_derivatives():
+    for label in IMAGE_FIELDS:
+        post_save.connect(_schedule_derivatives, sender=apps.get_model(label), dispatch_uid=f"image-derivatives:{label}")
@@ -0,0 +1,267 @@
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.cms.models import BlogPost
+from apps.marketing.models import FeaturedProduct
+from apps.products.models import Category, Product, ProductImage
+from apps.site_config.models import SiteConfiguration, SocialLink
+from .cache import cache_stats, stale_while_revalidate
+from .instrumentation import RequestProfile, reset_metrics
+from .query_audit import audit
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Sheets")
+        Product.objects.create(name="Cotton Sheet", category=self.category, price=Decimal("10.00"))
+
+    def test_repeated_get_is_served_without_queries(self):
+        first = self.client.get("/api/products/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/products/")
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(cache_stats()["apps.products.views.ProductListAPIView"], {"hits": 1, "misses": 1})
+
+    def test_views_with_the_same_class_name_are_counted_apart(self):
+        self.client.get("/api/products/featured/")
+        self.client.get("/api/marketing/featured/")
+        stats = cache_stats()
+        self.assertEqual(stats["apps.products.views.FeaturedProductListAPIView"], {"hits": 0, "misses": 1})
+        self.assertEqual(stats["apps.marketing.views.FeaturedProductListAPIView"], {"hits": 0, "misses": 1})
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.client.get("/api/products/?min_price=5")
+        response = self.client.get("/api/products/?min_price=50")
+        self.assertEqual(response.json()["data"], [])
+
+    def test_saving_a_model_invalidates_its_group(self):
+        self.client.get("/api/products/")
+        Product.objects.create(name="Linen Sheet", category=self.category, price=Decimal("20.00"))
+        self.assertEqual(len(self.client.get("/api/products/").json()["data"]), 2)
+
+    def test_other_groups_stay_cached(self):
+        self.client.get("/api/products/")
+        BlogPost.objects.create(title="News", content="...")
+        with self.assertNumQueries(0):
+            self.client.get("/api/products/")
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get("/api/products/missing/").status_code, 404)
+        self.assertEqual(self.client.get("/api/products/missing/").status_code, 404)
+        self.assertEqual(cache_stats()["apps.products.views.ProductDetailAPIView"], {"hits": 0, "misses": 2})
+
+
+@override_settings(BACKGROUND_SYNC=True)
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        self.builds = []
+        patcher = mock.patch("time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build(self):
+        self.builds.append(self.now)
+        return len(self.builds)
+
+    def get(self, **kwargs):
+        return stale_while_revalidate("swr-test", self.build, ttl=60, max_stale=600, **kwargs)
+
+    def test_fresh_then_stale_then_refreshed(self):
+        self.assertEqual(self.get(), (1, 1000.0))
+        self.now += 30
+        self.assertEqual(self.get(), (1, 1000.0))
+
+        # Past the TTL the old value is served and refreshed behind it
+        self.now += 60
+        self.assertEqual(self.get(), (1, 1000.0))
+        self.assertEqual(self.get(), (2, 1090.0))
+        self.assertEqual(len(self.builds), 2)
+
+    def test_too_stale_or_forced_is_rebuilt_inline(self):
+        self.get()
+        self.now += 1000
+        self.assertEqual(self.get(), (2, 2000.0))
+        self.assertEqual(self.get(refresh=True), (3, 2000.0))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Sheets")
+        self.product = Product.objects.create(name="Cotton Sheet", category=self.category, price=Decimal("10.00"))
+
+    def test_matching_etag_returns_304_without_queries(self):
+        response = self.client.get("/api/products/")
+        etag = response.headers["ETag"]
+        self.assertIn("Last-Modified", response.headers)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_etag_changes_when_data_changes(self):
+        etag = self.client.get(f"/api/products/{self.product.slug}/").headers["ETag"]
+        self.product.price = Decimal("12.00")
+        self.product.save()
+        response = self.client.get(f"/api/products/{self.product.slug}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get("/api/categories/").headers["Last-Modified"]
+        response = self.client.get("/api/categories/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class BootstrapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Sheets")
+        product = Product.objects.create(name="Cotton Sheet", category=category, price=Decimal("10.00"), is_featured=True)
+        FeaturedProduct.objects.create(product=product, display_order=1)
+        SiteConfiguration.objects.create(site_name="Shop")
+        SocialLink.objects.create(platform="facebook", url="https://facebook.com/shop")
+
+    def test_all_sections_in_one_response(self):
+        data = self.client.get("/api/bootstrap/").json()["data"]
+        self.assertEqual(set(data), {
+            "site_config", "social_links", "categories", "featured_products",
+            "featured", "home_sections", "testimonials",
+        })
+        self.assertEqual(data["site_config"]["social_links"], data["social_links"])
+        self.assertEqual(data["featured"][0]["product"], data["featured_products"][0])
+        self.assertEqual(data["featured"], self.client.get("/api/marketing/featured/").json()["data"])
+
+    def test_section_selector(self):
+        data = self.client.get("/api/bootstrap/?sections=site_config,categories").json()["data"]
+        self.assertEqual(set(data), {"site_config", "categories"})
+        self.assertEqual(self.client.get("/api/bootstrap/?sections=nope").status_code, 400)
+
+    def test_sections_are_cached_individually(self):
+        self.client.get("/api/bootstrap/?sections=categories")
+        with self.assertNumQueries(0):
+            self.client.get("/api/bootstrap/?sections=categories")
+        with self.assertNumQueries(1):
+            self.client.get("/api/bootstrap/?sections=categories,home_sections")
+
+
+def png_bytes(size=(700, 400), color=(200, 30, 30, 128)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media, BACKGROUND_SYNC=True,
+            IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1024), IMAGE_DERIVATIVE_FORMATS=("webp", "jpeg"),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.product = Product.objects.create(
+            name="Sheet", category=Category.objects.create(name="Sheets"), price=Decimal("10.00"),
+        )
+
+    def upload(self, name="photo.png", data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile(name, data or png_bytes(), "image/png"),
+            )
+        image.refresh_from_db()
+        return image
+
+    def test_renders_narrower_widths_after_commit(self):
+        image = self.upload()
+        manifest = image.derivatives
+        self.assertEqual((manifest["width"], manifest["height"]), (700, 400))
+        self.assertEqual([w for w, _ in manifest["formats"]["webp"]], [320, 640])
+        for renders in manifest["formats"].values():
+            for width, path in renders:
+                with Image.open(os.path.join(self.media, path)) as render:
+                    self.assertEqual(render.width, width)
+
+    def test_identical_uploads_share_renders(self):
+        first, second = self.upload("a.png"), self.upload("b.png")
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(first.derivatives["formats"], second.derivatives["formats"])
+
+    def test_srcset_in_product_payload(self):
+        self.upload()
+        cache.clear()
+        data = self.client.get(f"/api/products/{self.product.slug}/").json()["data"]
+        srcset = data["images"][0]["srcset"]
+        self.assertEqual(srcset["width"], 700)
+        self.assertRegex(srcset["srcset"]["webp"], r"^/media/derivatives/.+/320w\.webp 320w, .+ 640w$")
+
+
+class QueryAuditTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command("query_audit", "--strict", stdout=out)
+        self.assertIn("0 query shape(s) flagged", out.getvalue())
+
+    def test_full_scans_and_temp_sorts_are_flagged(self):
+        (name, plan, problems), = audit({
+            "links by url": SocialLink.objects.filter(url="x").order_by("platform"),
+        })
+        self.assertEqual(problems, ["full scan of site_config_sociallink", "use temp b-tree for order by"])
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1, SLOW_REQUEST_MS=0)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+        Product.objects.create(name="Cotton Sheet", category=Category.objects.create(name="Sheets"), price=Decimal("10.00"))
+
+    def test_server_timing_metrics_and_slow_log(self):
+        with self.assertLogs("apps.core.instrumentation", "WARNING") as logs:
+            response = self.client.get("/api/products/")
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn("Slow request GET /api/products/ (product-list)", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser(email="ops@example.com", password="pw"))
+        with self.assertLogs("apps.core.instrumentation", "WARNING"):
+            stats = client.get("/api/metrics/").json()["data"]["product-list"]
+        self.assertEqual(stats["count"], 1)
+        self.assertEqual(sum(stats["histogram"].values()), 1)
+        self.assertGreater(stats["avg_queries"], 0)
+
+    def test_repeated_queries_are_reported(self):
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            for pk in range(4):
+                list(Product.objects.filter(pk=pk))
+            list(Category.objects.all())
+        (sql, times), = profile.duplicates(3).items()
+        self.assertEqual(times, 4)
+        self.assertIn("products_product", sql)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get("/api/products/")
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import BootstrapAPIView, CacheStatsAPIView, MetricsAPIView
+
+urlpatterns = [
+    path('bootstrap/', BootstrapAPIView.as_view(), name='bootstrap'),
+    path('cache/stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
+]
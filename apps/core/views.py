@@ -0,0 +1,80 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+
+from .bootstrap import SECTIONS, build_bootstrap
+from .cache import cache_stats
+from .conditional import conditional_get
+from .instrumentation import endpoint_metrics, reset_metrics
+
+
+class CacheStatsAPIView(APIView):
+    """
+    Hits and misses per cached endpoint, keyed by module-qualified view name.
+    Only covers the endpoints this serving process has cached since it
+    started; other worker processes keep their own list.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "code": status.HTTP_200_OK,
+            "success": True,
+            "message": "Cache stats fetched successfully",
+            "data": cache_stats()
+        }, status=status.HTTP_200_OK)
+
+
+class MetricsAPIView(APIView):
+    # Latency and SQL stats of the requests sampled by InstrumentationMiddleware
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "code": status.HTTP_200_OK,
+            "success": True,
+            "message": "Request metrics fetched successfully",
+            "data": endpoint_metrics()
+        }, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        reset_metrics()
+        return Response({
+            "code": status.HTTP_200_OK,
+            "success": True,
+            "message": "Request metrics reset",
+        }, status=status.HTTP_200_OK)
+
+
+class BootstrapAPIView(APIView):
+    """
+    Everything the storefront needs for first paint in one round trip.
+    ?sections=site_config,categories limits the payload to the listed sections.
+    """
+
+    @conditional_get('catalog', 'marketing', 'cms', 'site')
+    def get(self, request):
+        raw = request.query_params.get('sections')
+        names = [n.strip() for n in raw.split(',') if n.strip()] if raw else list(SECTIONS)
+        unknown = [n for n in names if n not in SECTIONS]
+        if unknown:
+            return Response({
+                "code": status.HTTP_400_BAD_REQUEST,
+                "success": False,
+                "message": f"Unknown sections: {', '.join(unknown)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response({
+                "code": status.HTTP_200_OK,
+                "success": True,
+                "message": "Bootstrap data fetched successfully",
+                "data": build_bootstrap(names)
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "success": False,
+                "message": f"Error fetching bootstrap data: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -2,12 +2,13 @@ from django.contrib import admin
 from .models import NewsletterSubscriber, FeaturedProduct
 
 from django.contrib import admin
-from .models import Coupon, CouponUsage
+from .models import Coupon, CouponUsage, CouponUserCounter, NewsletterDelivery
 from unfold.admin import ModelAdmin
 
 @admin.register(Coupon)
 class CouponAdmin(ModelAdmin):
-    list_display = ('code', 'discount_type', 'discount_value', 'start_date', 'end_date', 'active')
+    list_display = ('code', 'discount_type', 'discount_value', 'times_used', 'usage_limit', 'start_date', 'end_date', 'active')
+    readonly_fields = ('times_used',)
     search_fields = ('code',)
     list_filter = ('discount_type', 'active', 'start_date', 'end_date')
 
@@ -17,6 +18,13 @@ class CouponUsageAdmin(ModelAdmin):
     list_display = ('coupon', 'user', 'used_at')
     readonly_fields = ('coupon', 'user', 'used_at')
 
+
+@admin.register(CouponUserCounter)
+class CouponUserCounterAdmin(ModelAdmin):
+    list_display = ('coupon', 'user', 'times_used')
+    search_fields = ('coupon__code', 'user__email')
+    readonly_fields = ('coupon', 'user', 'times_used')
+
 @admin.register(NewsletterSubscriber)
 class NewsletterSubscriberAdmin(ModelAdmin):
     list_display = ('email', 'created_at')
@@ -28,3 +36,11 @@ class NewsletterSubscriberAdmin(ModelAdmin):
 class FeaturedProductAdmin(ModelAdmin):
     list_display = ('product', 'display_order', 'created_at')
     ordering = ('display_order',)
+
+
+@admin.register(NewsletterDelivery)
+class NewsletterDeliveryAdmin(ModelAdmin):
+    list_display = ('campaign', 'subscriber', 'queued_at')
+    list_filter = ('campaign',)
+    search_fields = ('campaign', 'subscriber__email')
+    raw_id_fields = ('subscriber',)
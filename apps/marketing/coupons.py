@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Coupon, CouponUsage, CouponUserCounter
+
+
+class CouponError(Exception):
+    def __init__(self, message, code=400):
+        self.code = code
+        super().__init__(message)
+
+
+def find_coupon(code):
+    try:
+        return Coupon.objects.get(code__iexact=code, active=True)
+    except Coupon.DoesNotExist:
+        raise CouponError("Invalid or expired coupon.", code=404)
+
+
+def check_applicable(coupon, total):
+    today = timezone.now().date()
+    if not (coupon.start_date <= today <= coupon.end_date):
+        raise CouponError("Coupon not valid today.")
+    if total < coupon.min_order_amount:
+        raise CouponError(f"Minimum order amount is {coupon.min_order_amount}")
+
+
+def get_valid_coupon(code, total):
+    """The active coupon for `code`, or CouponError if it cannot apply to `total`."""
+    coupon = find_coupon(code)
+    check_applicable(coupon, total)
+    return coupon
+
+
+def check_limits(coupon, user=None):
+    """
+    Read-only limit check for previews (the counters, not a COUNT over
+    usages). Only redeem() is authoritative: limits can fill up between
+    the two.
+    """
+    if coupon.usage_limit is not None and coupon.times_used >= coupon.usage_limit:
+        raise CouponError("This coupon has reached its usage limit.")
+    if user is not None and coupon.per_user_limit is not None:
+        used = (
+            CouponUserCounter.objects.filter(coupon=coupon, user=user)
+            .values_list("times_used", flat=True).first() or 0
+        )
+        if used >= coupon.per_user_limit:
+            raise CouponError("You have already used this coupon.")
+
+
+@transaction.atomic
+def redeem(coupon, user=None):
+    """
+    Count one use of `coupon` by `user`. Each counter is bumped by an
+    UPDATE that only matches while it is under its limit, so concurrent
+    redemptions can never exceed usage_limit or per_user_limit. Call it
+    inside the order transaction: rolling back the order un-counts the use.
+    """
+    under_limit = Q(usage_limit__isnull=True) | Q(times_used__lt=F("usage_limit"))
+    if not Coupon.objects.filter(under_limit, pk=coupon.pk).update(times_used=F("times_used") + 1):
+        raise CouponError("This coupon has reached its usage limit.")
+
+    if user is not None:
+        counter, _ = CouponUserCounter.objects.get_or_create(coupon=coupon, user=user)
+        counters = CouponUserCounter.objects.filter(pk=counter.pk)
+        if coupon.per_user_limit is not None:
+            counters = counters.filter(times_used__lt=coupon.per_user_limit)
+        if not counters.update(times_used=F("times_used") + 1):
+            raise CouponError("You have already used this coupon.")
+
+    CouponUsage.objects.create(coupon=coupon, user=user)
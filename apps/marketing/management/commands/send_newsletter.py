@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.marketing.tasks import queue_newsletter
+
+
+class Command(BaseCommand):
+    help = "Queue a newsletter to every subscriber (delivered by run_workers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign", help="Unique campaign name; re-running the same campaign does not resend")
+        parser.add_argument("--subject", required=True)
+        parser.add_argument("--body-file", required=True, help="Plain text message body")
+
+    def handle(self, *args, **options):
+        with open(options["body_file"], encoding="utf-8") as f:
+            message = f.read()
+        batches = queue_newsletter(options["campaign"], options["subject"], message)
+        self.stdout.write(self.style.SUCCESS(f"Queued {batches} batch(es) for campaign {options['campaign']!r}"))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    # Seed the counters from the usage log they replace for limit checks
+    Coupon = apps.get_model('marketing', 'Coupon')
+    CouponUsage = apps.get_model('marketing', 'CouponUsage')
+    CouponUserCounter = apps.get_model('marketing', 'CouponUserCounter')
+    usages = CouponUsage.objects.filter(coupon=OuterRef('pk')).order_by().values('coupon').annotate(n=Count('pk')).values('n')
+    Coupon.objects.update(times_used=Coalesce(Subquery(usages), 0))
+    CouponUserCounter.objects.bulk_create(
+        CouponUserCounter(coupon_id=row['coupon'], user_id=row['user'], times_used=row['n'])
+        for row in CouponUsage.objects.filter(user__isnull=False).values('coupon', 'user').annotate(n=Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0002_alter_couponusage_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='couponusage',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='coupon',
+            name='times_used',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CouponUserCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('times_used', models.PositiveIntegerField(default=0)),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_counters', to='marketing.coupon')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('coupon', 'user')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0003_coupon_counters'),
+        ('products', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='featuredproduct',
+            index=models.Index(fields=['display_order'], name='featured_display_order_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign', models.CharField(max_length=100)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='marketing.newslettersubscriber')),
+            ],
+            options={
+                'unique_together': {('campaign', 'subscriber')},
+            },
+        ),
+    ]
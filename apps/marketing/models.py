@@ -17,6 +17,8 @@ class Coupon(models.Model):
     end_date = models.DateField()
     usage_limit = models.PositiveIntegerField(null=True, blank=True, help_text="Total number of times the coupon can be used")
     per_user_limit = models.PositiveIntegerField(null=True, blank=True, help_text="Max times a single user can use this")
+    # Maintained by apps.marketing.coupons.redeem() with conditional UPDATEs
+    times_used = models.PositiveIntegerField(default=0, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -29,11 +31,21 @@ class CouponUsage(models.Model):
     user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE) 
     used_at = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return f"{self.user.email if self.user else 'Guest'} used {self.coupon.code}"
+
+
+class CouponUserCounter(models.Model):
+    """How many times one customer has redeemed a coupon (per_user_limit)."""
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name='user_counters')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='coupon_counters')
+    times_used = models.PositiveIntegerField(default=0)
+
     class Meta:
         unique_together = ('coupon', 'user')
 
     def __str__(self):
-        return f"{self.user.email if self.user else 'Guest'} used {self.coupon.code}"
+        return f"{self.user.email} used {self.coupon.code} x{self.times_used}"
 
 
 
@@ -45,10 +57,28 @@ class NewsletterSubscriber(models.Model):
         return self.email
 
 
+class NewsletterDelivery(models.Model):
+    """A subscriber's place in a campaign; queue_newsletter never queues them twice."""
+    campaign = models.CharField(max_length=100)
+    subscriber = models.ForeignKey(NewsletterSubscriber, on_delete=models.CASCADE, related_name='deliveries')
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('campaign', 'subscriber')
+
+    def __str__(self):
+        return f"{self.campaign} -> {self.subscriber.email}"
+
+
 class FeaturedProduct(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="featured_entries")
     display_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['display_order'], name='featured_display_order_idx'),
+        ]
+
     def __str__(self):
         return f"Featured: {self.product.name}"
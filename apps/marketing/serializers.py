@@ -7,7 +7,8 @@ from .models import Coupon
 
 class CouponValidateSerializer(serializers.Serializer):
     code = serializers.CharField()
-    total = serializers.DecimalField(max_digits=10, decimal_places=2)
+    # Priced like checkout: these lines if sent, else the request's cart
+    order_items = serializers.ListField(child=serializers.DictField(), required=False)
 
 
 class NewsletterSubscriberSerializer(serializers.ModelSerializer):
@@ -17,8 +18,14 @@ class NewsletterSubscriberSerializer(serializers.ModelSerializer):
 
 
 class FeaturedProductSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = serializers.SerializerMethodField()
 
     class Meta:
         model = FeaturedProduct
         fields = ['id', 'product', 'display_order', 'created_at']
+
+    def get_product(self, obj):
+        # Bootstrap passes its already-serialized products, keyed by id
+        if 'products' in self.context:
+            return self.context['products'].get(obj.product_id)
+        return ProductSerializer(obj.product, context=self.context).data
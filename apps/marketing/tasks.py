@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+from django.db import transaction
+
+from apps.tasks.queue import task
+from .models import NewsletterDelivery, NewsletterSubscriber
+
+NEWSLETTER_BATCH_SIZE = 200
+
+
+@task()
+def send_newsletter_batch(subject, message, subscriber_ids):
+    # One SMTP connection per batch; each subscriber gets an individual message
+    emails = NewsletterSubscriber.objects.filter(pk__in=subscriber_ids).values_list("email", flat=True)
+    messages = [EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [email]) for email in emails]
+    with get_connection() as connection:
+        connection.send_messages(messages)
+
+
+@transaction.atomic
+def queue_newsletter(campaign, subject, message, batch_size=NEWSLETTER_BATCH_SIZE):
+    """
+    Fan a newsletter out into one task per batch of subscribers. Every
+    subscriber queued is recorded against the campaign (NewsletterDelivery),
+    so queueing it again only reaches subscribers who joined since, however
+    the list changed in between.
+    """
+    batches = 0
+    ids = list(
+        NewsletterSubscriber.objects.exclude(deliveries__campaign=campaign)
+        .order_by("pk").values_list("pk", flat=True)
+    )
+    NewsletterDelivery.objects.bulk_create(
+        (NewsletterDelivery(campaign=campaign, subscriber_id=pk) for pk in ids), batch_size=500,
+    )
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        # chunk[0] has never been queued for this campaign before, so the key is new
+        send_newsletter_batch.enqueue(
+            subject, message, chunk, idempotency_key=f"newsletter:{campaign}:{chunk[0]}",
+        )
+        batches += 1
+    return batches
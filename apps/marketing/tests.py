@@ -1,3 +1,107 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.products.models import Category, Product, ProductVariant
+
+from .coupons import CouponError, redeem
+from .models import Coupon, CouponUsage, CouponUserCounter
+
+User = get_user_model()
+
+
+def make_coupon(**kwargs):
+    today = timezone.now().date()
+    defaults = {
+        "code": "SAVE10", "discount_type": "flat", "discount_value": Decimal("10.00"),
+        "start_date": today - timedelta(days=1), "end_date": today + timedelta(days=1),
+    }
+    return Coupon.objects.create(**{**defaults, **kwargs})
+
+
+@override_settings(SHIPPING_FLAT_RATE="60.00", FREE_SHIPPING_THRESHOLD=None)
+class CouponTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="coupon@example.com", password="pw")
+        product = Product.objects.create(
+            name="Sheet", category=Category.objects.create(name="Sheets"), price=Decimal("50.00"),
+        )
+        self.variant = ProductVariant.objects.create(product=product, sku="SH-1", stock=10)
+
+    def validate(self, code="SAVE10", quantity=2, **extra):
+        payload = {"code": code, "order_items": [{"product_variant_id": self.variant.pk, "quantity": quantity}], **extra}
+        return self.client.post("/api/coupons/validate/", payload, content_type="application/json")
+
+    def test_limits_come_from_the_counters(self):
+        coupon = make_coupon(usage_limit=2, per_user_limit=1)
+        redeem(coupon, self.user)
+        with self.assertRaisesMessage(CouponError, "already used"):
+            redeem(coupon, self.user)
+        redeem(coupon)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.times_used, 2)
+        self.assertEqual(CouponUserCounter.objects.get().times_used, 1)
+        self.assertEqual(CouponUsage.objects.count(), 2)
+
+        response = self.validate()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("usage limit", response.json()["message"])
+
+    def test_validate_reports_discount(self):
+        make_coupon()
+        response = self.validate()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], {
+            "subtotal": 100.0, "discount": 10.0, "shipping": 60.0, "final_total": 150.0, "coupon_code": "SAVE10",
+        })
+        self.assertEqual(self.validate(code="NOPE").status_code, 404)
+
+    def test_validate_prices_on_the_server(self):
+        make_coupon(min_order_amount=Decimal("80.00"))
+        # A client-sent total is ignored: one sheet is below the minimum
+        response = self.validate(quantity=1, total="1000")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Minimum order amount", response.json()["message"])
+
+        # Without lines, the request's cart is priced, as at checkout
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post("/api/cart/add/", {"product_variant_id": self.variant.pk, "quantity": 2}, format="json")
+        response = client.post("/api/coupons/validate/", {"code": "SAVE10"}, format="json")
+        self.assertEqual(response.json()["data"]["final_total"], 150.0)
+        self.assertEqual(APIClient().post("/api/coupons/validate/", {"code": "SAVE10"}, format="json").status_code, 400)
+
+
+class CouponConcurrencyTests(TransactionTestCase):
+    def test_limited_coupon_is_never_over_redeemed(self):
+        coupon = make_coupon(usage_limit=5, per_user_limit=2)
+        users = [User.objects.create_user(email=f"hammer{n}@example.com", password="pw") for n in range(10)]
+        results = []
+
+        def use(user):
+            try:
+                redeem(coupon, user)
+                results.append(True)
+            except CouponError:
+                results.append(False)
+            finally:
+                close_old_connections()
+
+        # 40 threads, 4 per user: both limits are contended at once
+        threads = [threading.Thread(target=use, args=(users[n % 10],)) for n in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        coupon.refresh_from_db()
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(coupon.times_used, 5)
+        self.assertEqual(CouponUsage.objects.count(), 5)
+        self.assertTrue(all(c.times_used <= 2 for c in CouponUserCounter.objects.all()))
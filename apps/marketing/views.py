@@ -1,12 +1,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from apps.core.cache import cached_response
+from apps.core.conditional import conditional_get, latest_update
 from apps.marketing.models import NewsletterSubscriber, FeaturedProduct
 from apps.marketing.serializers import NewsletterSubscriberSerializer, FeaturedProductSerializer
+from apps.products.models import Product, product_listing_prefetches
 
-from .models import Coupon, CouponUsage
+from apps.cart.services import resolve_cart
+from apps.orders.pricing import pricer_for
+from apps.orders.services import CheckoutError, quote_checkout
+from .coupons import CouponError, check_limits
 from .serializers import CouponValidateSerializer
-from datetime import date
 
 class CouponValidateAPIView(APIView):
     def post(self, request):
@@ -20,65 +25,35 @@ class CouponValidateAPIView(APIView):
             }, status=400)
 
         code = serializer.validated_data['code']
-        total = serializer.validated_data['total']
         user = request.user if request.user.is_authenticated else None
 
         try:
-            coupon = Coupon.objects.get(code__iexact=code, active=True)
-        except Coupon.DoesNotExist:
+            _, quote = quote_checkout(
+                order_items=serializer.validated_data.get('order_items'),
+                cart=resolve_cart(request),
+                coupon_code=code,
+                pricer=pricer_for(request),
+            )
+            check_limits(quote.coupon, user)
+        except CouponError as e:
             return Response({
-                "code": 404,
+                "code": e.code,
                 "success": False,
-                "message": "Invalid or expired coupon."
-            }, status=404)
-
-        today = date.today()
-        if not (coupon.start_date <= today <= coupon.end_date):
-            return Response({
-                "code": 400,
-                "success": False,
-                "message": "Coupon not valid today."
-            }, status=400)
-
-        if total < coupon.min_order_amount:
-            return Response({
-                "code": 400,
-                "success": False,
-                "message": f"Minimum order amount is {coupon.min_order_amount}"
-            }, status=400)
-
-        if coupon.usage_limit is not None:
-            used_count = CouponUsage.objects.filter(coupon=coupon).count()
-            if used_count >= coupon.usage_limit:
-                return Response({
-                    "code": 400,
-                    "success": False,
-                    "message": "This coupon has reached its usage limit."
-                }, status=400)
-
-        if user and coupon.per_user_limit is not None:
-            user_used = CouponUsage.objects.filter(coupon=coupon, user=user).count()
-            if user_used >= coupon.per_user_limit:
-                return Response({
-                    "code": 400,
-                    "success": False,
-                    "message": "You have already used this coupon."
-                }, status=400)
-
-        # Calculate discount
-        if coupon.discount_type == 'flat':
-            discount = coupon.discount_value
-        else:
-            discount = (coupon.discount_value / 100) * total
+                "message": str(e)
+            }, status=e.code)
+        except CheckoutError as e:
+            return Response({"code": 400, "success": False, "message": str(e)}, status=400)
 
         return Response({
             "code": 200,
             "success": True,
             "message": "Coupon applied successfully.",
             "data": {
-                "discount": float(discount),
-                "final_total": float(total - discount),
-                "coupon_code": coupon.code
+                "subtotal": float(quote.subtotal),
+                "discount": float(quote.discount),
+                "shipping": float(quote.shipping),
+                "final_total": float(quote.total),
+                "coupon_code": quote.coupon.code
             }
         }, status=200)
 
@@ -111,9 +86,16 @@ class NewsletterSubscribeAPIView(APIView):
 
 
 class FeaturedProductListAPIView(APIView):
+    @conditional_get('catalog', 'marketing', last_modified=latest_update(Product))
+    @cached_response('catalog', 'marketing')
     def get(self, request):
         try:
-            featured_products = FeaturedProduct.objects.all().order_by('display_order')
+            featured_products = (
+                FeaturedProduct.objects
+                .select_related('product__category__parent')
+                .prefetch_related(*product_listing_prefetches('product__'))
+                .order_by('display_order')
+            )
             serializer = FeaturedProductSerializer(featured_products, many=True)
             response = {
                 "code": status.HTTP_200_OK,
@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import Order, OrderItem, StockReservation
 from unfold.admin import ModelAdmin
+
+from apps.core.exports import export_actions
+from .exports import export_orders
 from django.contrib.auth.models import Group
 from django.contrib import admin
 
@@ -17,9 +20,11 @@ class OrderItemInline(admin.TabularInline):
 @admin.register(Order)
 class OrderAdmin(ModelAdmin):
     list_display = ('id', 'customer', 'payment_type', 'status', 'total_amount', 'created_at')
-    list_filter = ('status', 'payment_type', 'payment_status')
+    list_filter = ('status', 'payment_type', 'payment_status', 'created_at')
     search_fields = ('customer__email', 'shipping_address__full_name')
     inlines = [OrderItemInline]
+    # Streamed: "select all" on a filtered changelist exports every match
+    actions = export_actions(export_orders)
     readonly_fields = ('subtotal_amount', 'discount_amount', 'total_amount', 'created_at')
     fieldsets = (
         (None, {
@@ -43,3 +48,12 @@ class OrderItemAdmin(ModelAdmin):
     list_filter = ('product_variant',)
     ordering = ('-id',)
 
+
+@admin.register(StockReservation)
+class StockReservationAdmin(ModelAdmin):
+    list_display = ('id', 'product_variant', 'quantity', 'status', 'cart', 'order', 'expires_at')
+    list_filter = ('status',)
+    search_fields = ('order__id', 'product_variant__sku')
+    raw_id_fields = ('product_variant', 'cart', 'order')
+    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('-id',)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
+
+    def ready(self):
+        from .signals import connect_inventory_release, connect_sales_rollups, connect_total_quantity
+        connect_inventory_release()
+        connect_sales_rollups()
+        connect_total_quantity()
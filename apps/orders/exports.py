@@ -0,0 +1,56 @@
+from django.db.models import Prefetch
+
+from apps.core.exports import CHUNK_SIZE, streaming_export
+from .models import Order, OrderItem
+
+# One row per order item; an order without items still gets one row
+ORDER_COLUMNS = [
+    "order_id", "created_at", "status", "payment_type", "payment_status", "transaction_id",
+    "customer_id", "customer_email", "coupon", "subtotal", "discount", "shipping", "total",
+    "ship_name", "ship_phone", "ship_address", "ship_city", "ship_postal_code", "ship_country",
+    "item_id", "sku", "product", "quantity", "unit_price", "line_total",
+]
+
+
+def filter_orders(queryset, since=None, until=None, statuses=None):
+    """`since`/`until` are dates, both inclusive."""
+    if since:
+        queryset = queryset.filter(created_at__date__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__date__lte=until)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def order_rows(queryset, chunk_size=CHUNK_SIZE):
+    # iterator() with a chunk size prefetches items chunk by chunk
+    orders = (
+        queryset.select_related("customer", "shipping_address", "coupon")
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("product_variant__product").order_by("id")))
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    )
+    for order in orders:
+        address = order.shipping_address
+        head = [
+            order.id, order.created_at, order.status, order.payment_type, order.payment_status,
+            order.transaction_id or "", order.customer_id or "", order.customer.email if order.customer else "",
+            order.coupon.code if order.coupon else "",
+            order.subtotal_amount, order.discount_amount, order.shipping_cost, order.total_amount,
+        ]
+        head += [
+            address.full_name, address.phone, address.address, address.city, address.postal_code, address.country,
+        ] if address else [""] * 6
+        items = order.items.all()
+        if not items:
+            yield head + [""] * 6
+        for item in items:
+            variant = item.product_variant
+            yield head + [
+                item.id, variant.sku, variant.product.name, item.quantity, item.unit_price, item.total_price,
+            ]
+
+
+def export_orders(queryset, fmt):
+    return streaming_export("orders", fmt, ORDER_COLUMNS, order_rows(queryset))
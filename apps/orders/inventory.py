@@ -0,0 +1,206 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from apps.core.cache import invalidate_group, invalidate_products
+from apps.products.models import Product, ProductVariant
+from .models import StockReservation
+
+# ProductVariant.stock is the stock still available to sell. Every unit a
+# cart holds or an order owns has been subtracted from it by a conditional
+# UPDATE (stock >= n), so concurrent buyers can never take it below zero.
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        # shortages: {variant_id: units still available}
+        self.shortages = shortages
+        variant_id, available = next(iter(shortages.items()))
+        super().__init__(f"Only {available} left in stock for product_variant_id={variant_id}")
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, "STOCK_HOLD_TTL", 15 * 60))
+
+
+def _stock_changed(variant_ids, availability_changed):
+    """
+    update() skips save signals, so refresh the product summaries by hand.
+    Cached catalog pages are only dropped when a variant sold out or came
+    back: every cart add moves stock, and bumping the whole catalog for
+    each would leave it uncached on a busy site. Stock figures in cached
+    pages may lag by up to RESPONSE_CACHE_TIMEOUT; checkout re-checks stock.
+    """
+    product_ids = set(ProductVariant.objects.filter(pk__in=variant_ids).values_list("product_id", flat=True))
+    Product.objects.filter(pk__in=product_ids).refresh_summaries()
+    invalidate_products(product_ids)  # cart snapshots holding these products
+    if availability_changed:
+        invalidate_group("catalog")
+
+
+class _NotEnough(Exception):
+    pass
+
+
+def take_stock(quantities):
+    """
+    Atomically subtract {variant_id: qty} from stock: one UPDATE that only
+    matches rows with enough stock. Unless every variant matched, nothing
+    is taken and InsufficientStock is raised.
+    """
+    quantities = {vid: qty for vid, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+    enough = Q()
+    for variant_id, qty in quantities.items():
+        enough |= Q(pk=variant_id, stock__gte=qty)
+    delta = Case(*(When(pk=vid, then=Value(qty)) for vid, qty in quantities.items()))
+    try:
+        with transaction.atomic():
+            if ProductVariant.objects.filter(enough).update(stock=F("stock") - delta) != len(quantities):
+                raise _NotEnough  # rolls back the rows that did match
+    except _NotEnough:
+        available = dict(ProductVariant.objects.filter(pk__in=quantities).values_list("pk", "stock"))
+        shortages = {vid: available.get(vid, 0) for vid, qty in quantities.items() if available.get(vid, 0) < qty}
+        raise InsufficientStock(shortages or {vid: available.get(vid, 0) for vid in quantities})
+    sold_out = ProductVariant.objects.filter(pk__in=quantities, stock=0).exists()
+    _stock_changed(list(quantities), sold_out)
+
+
+def return_stock(quantities):
+    quantities = {vid: qty for vid, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+    delta = Case(*(When(pk=vid, then=Value(qty)) for vid, qty in quantities.items()))
+    ProductVariant.objects.filter(pk__in=quantities).update(stock=F("stock") + delta)
+    # Back in stock: the variant now holds exactly what was returned
+    restocked = Q()
+    for variant_id, qty in quantities.items():
+        restocked |= Q(pk=variant_id, stock=qty)
+    _stock_changed(list(quantities), ProductVariant.objects.filter(restocked).exists())
+
+
+def hold_for_cart(cart, variant_id, quantity):
+    """
+    Make the cart hold exactly `quantity` units of a variant (0 releases
+    the hold) and push its expiry out by STOCK_HOLD_TTL.
+    """
+    set_cart_holds(cart, {variant_id: quantity})
+
+
+@transaction.atomic
+def set_cart_holds(cart, quantities):
+    """
+    hold_for_cart() for many variants at once: {variant_id: quantity}.
+    Stock is taken and returned with one UPDATE each, whatever the count.
+    """
+    holds = {
+        hold.product_variant_id: hold
+        for hold in StockReservation.objects.select_for_update().filter(
+            cart=cart, product_variant_id__in=quantities, status="held",
+        )
+    }
+    current = {vid: holds[vid].quantity if vid in holds else 0 for vid in quantities}
+    take_stock({vid: qty - current[vid] for vid, qty in quantities.items()})
+    return_stock({vid: current[vid] - qty for vid, qty in quantities.items()})
+
+    now = timezone.now()
+    expires_at = now + hold_ttl()
+    released, changed, created = [], [], []
+    for variant_id, quantity in quantities.items():
+        hold = holds.get(variant_id)
+        if quantity == 0:
+            if hold:
+                released.append(hold.pk)
+        elif hold:
+            hold.quantity, hold.expires_at, hold.updated_at = quantity, expires_at, now
+            changed.append(hold)
+        else:
+            created.append(StockReservation(
+                cart=cart, product_variant_id=variant_id, quantity=quantity, status="held", expires_at=expires_at,
+            ))
+    if released:
+        StockReservation.objects.filter(pk__in=released).update(status="released", updated_at=now)
+    if changed:
+        StockReservation.objects.bulk_update(changed, ["quantity", "expires_at", "updated_at"])
+    if created:
+        StockReservation.objects.bulk_create(created)
+
+
+def release_cart(cart):
+    return release_carts([cart.pk])
+
+
+def release_carts(cart_ids):
+    holds = list(StockReservation.objects.filter(cart_id__in=cart_ids, status="held").values_list("pk", flat=True))
+    return _release(holds, from_status="held")
+
+
+@transaction.atomic
+def commit_order(order, quantities, cart=None):
+    """
+    Reserve {variant_id: qty} for an order. Units the customer's cart
+    already holds are taken over (they left stock when added to the cart);
+    only the remainder is taken from stock, and any surplus hold returned.
+    """
+    quantities = Counter(quantities)
+    held = Counter()
+    if cart is not None:
+        hold_ids = list(
+            StockReservation.objects.filter(cart=cart, status="held", product_variant_id__in=quantities)
+            .values_list("pk", flat=True)
+        )
+        if hold_ids:
+            # Conditional on status so a concurrent sweep cannot release the same hold
+            StockReservation.objects.filter(pk__in=hold_ids, status="held").update(
+                status="converted", order=order, updated_at=timezone.now(),
+            )
+            for variant_id, qty in StockReservation.objects.filter(
+                pk__in=hold_ids, status="converted", order=order
+            ).values_list("product_variant_id", "quantity"):
+                held[variant_id] += qty
+
+    take_stock({vid: qty - held[vid] for vid, qty in quantities.items()})
+    return_stock({vid: held[vid] - qty for vid, qty in quantities.items()})
+    StockReservation.objects.bulk_create(
+        StockReservation(order=order, product_variant_id=vid, quantity=qty, status="committed")
+        for vid, qty in quantities.items()
+    )
+
+
+def release_order(order):
+    """Give an order's stock back (cancellation). Safe to call twice."""
+    ids = list(StockReservation.objects.filter(order=order, status="committed").values_list("pk", flat=True))
+    return _release(ids, from_status="committed")
+
+
+def release_expired(batch_size=500):
+    """Return stock from cart holds past their expiry. Returns units released."""
+    released = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(status="held", expires_at__lt=timezone.now())
+            .order_by("expires_at").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return released
+        released += _release(ids, from_status="held")
+
+
+@transaction.atomic
+def _release(ids, from_status):
+    quantities = Counter()
+    now = timezone.now()
+    for pk, variant_id, qty in StockReservation.objects.filter(pk__in=ids, status=from_status).values_list(
+        "pk", "product_variant_id", "quantity"
+    ):
+        # Per-row conditional UPDATE: only stock for rows this call actually
+        # flipped is returned, even if a sweep or checkout races us
+        if StockReservation.objects.filter(pk=pk, status=from_status).update(status="released", updated_at=now):
+            quantities[variant_id] += qty
+    return_stock(quantities)
+    return sum(quantities.values())
@@ -0,0 +1,52 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.orders.services import place_order
+from apps.products.models import Category, Product, ProductVariant
+
+
+class Command(BaseCommand):
+    help = "Measure checkout queries and latency per order as the line count grows (nothing is persisted)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", default="1,5,10,30,100", help="Comma separated line counts")
+        parser.add_argument("--orders", type=int, default=20, help="Orders placed per line count")
+
+    def handle(self, *args, **options):
+        line_counts = [int(n) for n in options["lines"].split(",")]
+        # Everything runs in a transaction that is rolled back at the end
+        with transaction.atomic():
+            variants = self._catalog(max(line_counts))
+            shipping = {"email": "bench@example.com", "firstName": "Bench", "lastName": "Mark"}
+            summary = {"subtotal": "0", "delivery": "0", "discount_amount": "0", "total": "0"}
+            self.stdout.write(f"{'lines':>6} {'queries':>8} {'p50 ms':>8} {'p95 ms':>8}")
+            for count in line_counts:
+                items = [{"product_variant_id": v.pk, "quantity": 1} for v in variants[:count]]
+                timings, queries = [], 0
+                for _ in range(options["orders"]):
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        place_order(user=None, shipping_info=shipping, payment_type="CASH",
+                                    summary=summary, order_items=items)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    queries = len(ctx.captured_queries)
+                timings.sort()
+                p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                self.stdout.write(f"{count:>6} {queries:>8} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _catalog(size):
+        category = Category.objects.create(name="Benchmark category")
+        products = Product.objects.bulk_create(
+            Product(name=f"Bench {i}", slug=f"bench-{i}", category=category, price=Decimal("10.00"))
+            for i in range(size)
+        )
+        return ProductVariant.objects.bulk_create(
+            ProductVariant(product=product, sku=f"BENCH-{product.pk}", stock=1_000_000) for product in products
+        )
@@ -0,0 +1,67 @@
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.marketing.models import Coupon
+from apps.orders.pricing import Pricer
+from apps.products.models import Category, Product, ProductVariant
+
+
+class Command(BaseCommand):
+    help = "Time pricing large carts, cold and with a warm per-request Pricer (nothing is persisted)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=1000, help="Lines per cart")
+        parser.add_argument("--repeat", type=int, default=50, help="Timed runs per case")
+
+    def handle(self, *args, **options):
+        size, repeat = options["lines"], options["repeat"]
+        # Everything runs in a transaction that is rolled back at the end
+        with transaction.atomic():
+            ids = [v.pk for v in self._catalog(size)]
+            today = timezone.now().date()
+            Coupon.objects.create(
+                code="BENCH10", discount_type="percent", discount_value=Decimal("10"),
+                start_date=today - timedelta(days=1), end_date=today + timedelta(days=1),
+            )
+            lines = [(pk, (pk % 3) + 1) for pk in ids]
+
+            warm = Pricer()
+            self.stdout.write(f"{'case':<10} {'queries':>8} {'p50 ms':>8} {'p95 ms':>8}")
+            self._report("cold", repeat, lambda: Pricer().quote(lines, "BENCH10"))
+            self._report("warm", repeat, lambda: warm.quote(lines, "BENCH10"))
+            transaction.set_rollback(True)
+
+    def _report(self, label, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f"{label:<10} {len(ctx.captured_queries):>8} {statistics.median(timings):>8.2f} {p95:>8.2f}"
+        )
+
+    @staticmethod
+    def _catalog(size):
+        category = Category.objects.create(name="Benchmark category")
+        products = Product.objects.bulk_create(
+            Product(name=f"Bench {i}", slug=f"bench-{i}", category=category, price=Decimal("10.00") + i % 7)
+            for i in range(size)
+        )
+        return ProductVariant.objects.bulk_create(
+            ProductVariant(
+                product=product, sku=f"BENCH-{product.pk}", stock=100,
+                price_override=Decimal("8.99") if product.pk % 4 == 0 else None,
+            )
+            for product in products
+        )
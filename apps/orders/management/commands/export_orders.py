@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.exports import CHUNK_SIZE, FORMATS, export_lines
+from apps.orders.exports import ORDER_COLUMNS, filter_orders, order_rows
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Stream orders with their items and shipping address as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--since", help="Orders placed on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Orders placed on or before this date (YYYY-MM-DD)")
+        parser.add_argument("--status", action="append", choices=[s for s, _ in Order.STATUS_CHOICES],
+                            help="Only this status (repeatable)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since = options["since"] and date.fromisoformat(options["since"])
+            until = options["until"] and date.fromisoformat(options["until"])
+        except ValueError:
+            raise CommandError("--since/--until must be YYYY-MM-DD")
+
+        orders = filter_orders(Order.objects.all(), since=since, until=until, statuses=options["status"])
+        lines = export_lines(options["format"], ORDER_COLUMNS, order_rows(orders, chunk_size=options["chunk_size"]))
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as out:
+                out.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Orders written to {options['output']}"))
+        else:
+            # OutputWrapper passes writelines() straight to the stream
+            self.stdout.writelines(lines)
@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.orders.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Backfill or repair the daily sales rollups behind the admin dashboard"
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument("--since", help="Only rebuild days from this date (YYYY-MM-DD)")
+        group.add_argument("--days", type=int, help="Only rebuild the last N days")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD")
+        elif options["days"]:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        days = rebuild(since=since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {len(days)} days"))
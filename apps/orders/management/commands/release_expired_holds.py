@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.inventory import release_expired
+
+
+class Command(BaseCommand):
+    help = "Return stock held by abandoned carts whose holds have expired (run from cron)"
+
+    def handle(self, *args, **options):
+        units = release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Released {units} held units"))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_total_quantity(apps, schema_editor):
+    # Same UPDATE as OrderQuerySet.refresh_total_quantity()
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    quantities = (
+        OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        .annotate(total=Sum('quantity')).values('total')
+    )
+    Order.objects.update(total_quantity=Coalesce(Subquery(quantities), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+        ('marketing', '0003_coupon_counters'),
+        ('orders', '0003_stock_reservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-created_at', '-id'], name='order_customer_history_idx'),
+        ),
+        migrations.RunPython(fill_total_quantity, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from apps.account.models import CustomerAddress
@@ -8,6 +9,16 @@ from apps.marketing.models import Coupon
 User = get_user_model()
 
 
+class OrderQuerySet(models.QuerySet):
+    def refresh_total_quantity(self):
+        """Recompute the stored total_quantity of these orders in one UPDATE."""
+        quantities = (
+            OrderItem.objects.filter(order=models.OuterRef('pk')).order_by().values('order')
+            .annotate(total=models.Sum('quantity')).values('total')
+        )
+        return self.update(total_quantity=Coalesce(models.Subquery(quantities), 0))
+
+
 class Order(models.Model):
     PAYMENT_CHOICES = [
         ('COD', 'Cash on Delivery'),
@@ -28,15 +39,35 @@ class Order(models.Model):
     subtotal_amount = models.DecimalField(max_digits=10, decimal_places=2)
     shipping_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Sum of item quantities, kept in step by checkout and the OrderItem signals
+    total_quantity = models.PositiveIntegerField(default=0, editable=False)
     payment_type = models.CharField(max_length=10, choices=PAYMENT_CHOICES)
     transaction_id = models.CharField(max_length=100, blank=True, null=True)
     payment_status = models.CharField(max_length=20, default='pending')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Order history: a customer's orders, newest first (keyset pages)
+            models.Index(fields=['customer', '-created_at', '-id'], name='order_customer_history_idx'),
+            # Admin status filter and exports; date ranges and recent orders
+            models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.customer.email if self.customer else 'Guest'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the inventory signal spot a transition to 'cancelled'
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
@@ -51,3 +82,88 @@ class OrderItem(models.Model):
     @property
     def total_price(self):
         return self.quantity * self.unit_price
+
+
+class StockReservation(models.Model):
+    """
+    Stock taken out of ProductVariant.stock, and by whom. Cart holds expire
+    (see inventory.release_expired); order reservations are committed and
+    only given back when the order is cancelled.
+    """
+    STATUS_CHOICES = [
+        ('held', 'Held'),            # cart hold, expires
+        ('converted', 'Converted'),  # hold taken over by an order
+        ('committed', 'Committed'),  # belongs to an order
+        ('released', 'Released'),    # stock given back
+    ]
+
+    product_variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    cart = models.ForeignKey('cart.Cart', on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True, related_name='reservations')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_expiry_idx'),
+            models.Index(fields=['cart', 'status'], name='reservation_cart_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_variant} x {self.quantity} ({self.status})"
+
+
+# ---- Sales rollups (apps.orders.rollups): one row per day and key, rebuilt
+# for a day whenever one of its orders changes. The admin dashboard reads
+# these instead of scanning orders.
+
+class DailySales(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='daily_sales_day_status_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.orders} orders"
+
+
+class DailyProductSales(models.Model):
+    day = models.DateField()
+    # Names are copied so the rollup outlives renames and deletions
+    product = models.ForeignKey('products.Product', on_delete=models.SET_NULL, null=True, related_name='+')
+    product_name = models.CharField(max_length=255)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day'], name='daily_product_sales_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_name}: {self.units} units"
+
+
+class DailyCategorySales(models.Model):
+    day = models.DateField()
+    category = models.ForeignKey('products.Category', on_delete=models.SET_NULL, null=True, related_name='+')
+    category_name = models.CharField(max_length=255)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day'], name='daily_category_sales_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category_name}: {self.units} units"
@@ -0,0 +1,118 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+from apps.marketing.coupons import check_applicable, find_coupon
+from apps.products.models import ProductVariant
+
+# The one place prices are worked out. Cart, coupon validation and checkout
+# all go through Pricer, so the totals a customer sees are the totals an
+# order is placed at; amounts sent by the client are never trusted.
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def coupon_discount(coupon, subtotal):
+    """Discount a coupon gives on `subtotal`, never more than the subtotal."""
+    if coupon.discount_type == "percent":
+        discount = subtotal * coupon.discount_value / 100
+    else:
+        discount = coupon.discount_value
+    return money(min(discount, subtotal))
+
+
+def shipping_cost(amount, lines_count=1):
+    if not lines_count:
+        return ZERO
+    threshold = getattr(settings, "FREE_SHIPPING_THRESHOLD", None)
+    if threshold is not None and amount >= Decimal(str(threshold)):
+        return ZERO
+    return money(str(getattr(settings, "SHIPPING_FLAT_RATE", "0")))
+
+
+class Quote:
+    def __init__(self, lines, subtotal, discount, shipping, coupon=None):
+        self.lines = lines  # [(variant, quantity, unit_price, line_total)]
+        self.subtotal = subtotal
+        self.discount = discount
+        self.shipping = shipping
+        self.total = subtotal - discount + shipping
+        self.coupon = coupon
+
+    def as_dict(self):
+        return {
+            "subtotal": str(self.subtotal),
+            "discount_amount": str(self.discount),
+            "delivery": str(self.shipping),
+            "total": str(self.total),
+            "discount_code": self.coupon.code if self.coupon else None,
+        }
+
+
+class Pricer:
+    """
+    Prices lines for one request. Variant and coupon lookups are memoized,
+    so pricing the same cart twice (or a cart and then its checkout) costs
+    no extra queries. Create one per request with pricer_for(request).
+    """
+
+    def __init__(self):
+        self._variants = {}
+        self._coupons = {}
+
+    def remember(self, variants):
+        for variant in variants:
+            self._variants[variant.pk] = variant
+
+    def variants(self, ids):
+        """{id: variant} for `ids`, loading only the ones not seen yet."""
+        missing = {i for i in ids if i not in self._variants}
+        if missing:
+            self.remember(ProductVariant.objects.select_related("product").filter(pk__in=missing))
+        return {i: self._variants[i] for i in ids if i in self._variants}
+
+    def coupon(self, code):
+        key = code.strip().lower()
+        if key not in self._coupons:
+            self._coupons[key] = find_coupon(code)
+        return self._coupons[key]
+
+    def quote(self, lines, coupon_code=None):
+        """
+        Price [(variant, quantity)] (variants or variant ids). Raises
+        CouponError if `coupon_code` does not apply to the subtotal.
+        """
+        lines = list(lines)
+        by_id = self.variants([v for v, _ in lines if not isinstance(v, ProductVariant)])
+        priced, subtotal = [], ZERO
+        for variant, quantity in lines:
+            if not isinstance(variant, ProductVariant):
+                variant = by_id[variant]
+            unit_price = money(variant.effective_price)
+            line_total = unit_price * quantity
+            priced.append((variant, quantity, unit_price, line_total))
+            subtotal += line_total
+        return self.totals(subtotal, coupon_code, priced)
+
+    def totals(self, subtotal, coupon_code=None, lines=(), line_count=None):
+        """Discount, shipping and total for an already priced subtotal."""
+        if line_count is None:
+            line_count = len(lines)
+        coupon, discount = None, ZERO
+        if coupon_code:
+            coupon = self.coupon(coupon_code)
+            check_applicable(coupon, subtotal)
+            discount = coupon_discount(coupon, subtotal)
+        return Quote(list(lines), subtotal, discount, shipping_cost(subtotal - discount, line_count), coupon)
+
+
+def pricer_for(request):
+    pricer = getattr(request, "_pricer", None)
+    if pricer is None:
+        pricer = request._pricer = Pricer()
+    return pricer
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyCategorySales, DailyProductSales, DailySales, Order, OrderItem
+
+# Rollups are rebuilt a whole day at a time: a rebuild reads only that day's
+# orders and is idempotent, so it is safe to run from an at-least-once task
+# queue, twice, or concurrently with the backfill command.
+
+
+def day_of(order):
+    return timezone.localdate(order.created_at)
+
+
+@transaction.atomic
+def rebuild_day(day):
+    """Recompute every rollup row of `day` from its orders."""
+    orders = Order.objects.filter(created_at__date=day)
+    DailySales.objects.filter(day=day).delete()
+    DailySales.objects.bulk_create(
+        DailySales(day=day, status=row["status"], orders=row["orders"],
+                   units=row["units"] or 0, revenue=row["revenue"] or 0)
+        for row in orders.order_by().values("status").annotate(
+            orders=Count("pk"), units=Sum("total_quantity"), revenue=Sum("total_amount"),
+        )
+    )
+
+    line_total = ExpressionWrapper(F("quantity") * F("unit_price"), output_field=DecimalField(max_digits=14, decimal_places=2))
+    products = list(
+        OrderItem.objects.filter(order__created_at__date=day).order_by()
+        .values(
+            product=F("product_variant__product"),
+            product_name=F("product_variant__product__name"),
+            category=F("product_variant__product__category"),
+            category_name=F("product_variant__product__category__name"),
+        )
+        .annotate(units=Sum("quantity"), revenue=Sum(line_total))
+    )
+    DailyProductSales.objects.filter(day=day).delete()
+    DailyProductSales.objects.bulk_create(
+        DailyProductSales(day=day, product_id=row["product"], product_name=row["product_name"],
+                          units=row["units"], revenue=row["revenue"])
+        for row in products
+    )
+
+    categories = defaultdict(lambda: {"units": 0, "revenue": Decimal("0")})
+    for row in products:
+        totals = categories[(row["category"], row["category_name"])]
+        totals["units"] += row["units"]
+        totals["revenue"] += row["revenue"]
+    DailyCategorySales.objects.filter(day=day).delete()
+    DailyCategorySales.objects.bulk_create(
+        DailyCategorySales(day=day, category_id=category, category_name=name, **totals)
+        for (category, name), totals in categories.items()
+    )
+
+
+def order_days(since=None):
+    """Distinct (local) days that have orders, oldest first."""
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__date__gte=since)
+    return list(
+        orders.annotate(day=TruncDate("created_at")).order_by("day").values_list("day", flat=True).distinct()
+    )
+
+
+def rebuild(since=None, days=None):
+    """Rebuild `days` (or every day with orders since `since`). Returns the days rebuilt."""
+    days = order_days(since) if days is None else days
+    # Drop rollups of days that no longer have orders (all deleted)
+    stale = DailySales.objects.exclude(day__in=days)
+    if since is not None:
+        stale = stale.filter(day__gte=since)
+    for day in stale.values_list("day", flat=True).distinct():
+        rebuild_day(day)
+    for day in days:
+        rebuild_day(day)
+    return days
+
+
+def schedule(day):
+    """
+    Queue a rebuild of `day` (runs once the current transaction commits),
+    unless one is still waiting in the queue: a busy day then gets one
+    rebuild per worker pass instead of one per order and line saved.
+    """
+    from apps.tasks.models import Task
+    from .tasks import rebuild_sales_day
+    # The no-op UPDATE locks the pending row, so a worker cannot claim it
+    # until this transaction commits; once claimed it no longer matches
+    # and a fresh rebuild is queued for the changes made since.
+    pending = Task.objects.filter(name=rebuild_sales_day.task_name, args=[day.isoformat()], status="queued")
+    if not pending.update(run_at=F("run_at")):
+        rebuild_sales_day.enqueue(day.isoformat())
@@ -41,7 +41,6 @@ class OrderSerializer(serializers.ModelSerializer):
     shipping_address = CustomerAddressSerializer(read_only=True)
     coupon = CouponSerializer(read_only=True)
     items = OrderItemSerializer(many=True, read_only=True)
-    total_quantity = serializers.SerializerMethodField()
     subtotal_amount = serializers.SerializerMethodField()
     total_amount = serializers.SerializerMethodField()
     discount_amount = serializers.SerializerMethodField()
@@ -66,9 +65,6 @@ class OrderSerializer(serializers.ModelSerializer):
             'created_at'
         ]
 
-    def get_total_quantity(self, obj):
-        return sum(item.quantity for item in obj.items.all())
-
     def get_subtotal_amount(self, obj):
         return str(obj.subtotal_amount)
 
@@ -0,0 +1,193 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch, Q
+
+from apps.account.models import CustomerAddress
+from apps.cart.services import invalidate as invalidate_cart
+from apps.marketing.coupons import CouponError, redeem
+from apps.products.models import ProductVariant
+from .inventory import InsufficientStock, commit_order
+from .models import Order, OrderItem
+from .pricing import Pricer
+from .tasks import send_order_confirmation
+
+Customer = get_user_model()
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def resolve_lines(order_items):
+    """
+    Turn the checkout payload lines into (variant, quantity, attributes)
+    with one query, whatever the number of lines. A line names either a
+    `product_variant_id` or a `product_id` (its first variant, as before).
+    """
+    parsed = []
+    for index, item in enumerate(order_items, 1):
+        variant_id = item.get("product_variant_id")
+        product_id = item.get("product_id")
+        try:
+            quantity = int(item.get("quantity", 1))
+            variant_id = int(variant_id) if variant_id is not None else None
+            product_id = int(product_id) if product_id is not None else None
+        except (TypeError, ValueError):
+            raise CheckoutError(f"Line {index}: ids and quantity must be integers")
+        if quantity < 1:
+            raise CheckoutError(f"Line {index}: quantity must be at least 1")
+        if variant_id is None and product_id is None:
+            raise CheckoutError(f"Line {index}: product_variant_id or product_id is required")
+        parsed.append((variant_id, product_id, quantity, item.get("attributes", {})))
+    if not parsed:
+        raise CheckoutError("Order has no items")
+
+    variant_ids = {v for v, _, _, _ in parsed if v is not None}
+    product_ids = {p for v, p, _, _ in parsed if v is None}
+    by_id, first_by_product = {}, {}
+    variants = (
+        ProductVariant.objects.select_related("product")
+        .filter(Q(pk__in=variant_ids) | Q(product_id__in=product_ids))
+        .order_by("product_id", "pk")
+    )
+    for variant in variants:
+        by_id[variant.pk] = variant
+        first_by_product.setdefault(variant.product_id, variant)
+
+    lines = []
+    for variant_id, product_id, quantity, attributes in parsed:
+        variant = by_id.get(variant_id) if variant_id is not None else first_by_product.get(product_id)
+        if variant is None:
+            if variant_id is not None:
+                raise CheckoutError(f"No variant found for product_variant_id={variant_id}")
+            raise CheckoutError(f"No variant found for product_id={product_id}")
+        lines.append((variant, quantity, attributes))
+    return lines
+
+
+def order_detail_queryset():
+    """Everything OrderSerializer renders, in a fixed number of queries."""
+    return Order.objects.select_related("customer", "shipping_address", "coupon").prefetch_related(
+        Prefetch("items", queryset=OrderItem.objects.select_related("product_variant").order_by("pk"))
+    )
+
+
+def quote_checkout(*, order_items, cart=None, coupon_code=None, pricer=None):
+    """
+    Resolve and price checkout lines exactly as place_order does: the given
+    `order_items`, else the contents of `cart`. Returns (lines, quote);
+    raises CheckoutError for bad lines and CouponError if the coupon does
+    not apply.
+    """
+    if not order_items and cart is not None:
+        order_items = [
+            {"product_variant_id": variant_id, "quantity": quantity}
+            for variant_id, quantity in cart.items.order_by("pk").values_list("product_variant_id", "quantity")
+        ]
+    lines = resolve_lines(order_items or [])
+    pricer = pricer or Pricer()
+    pricer.remember(variant for variant, _, _ in lines)
+    return lines, pricer.quote([(variant, quantity) for variant, quantity, _ in lines], coupon_code)
+
+
+@transaction.atomic
+def place_order(*, user, shipping_info, payment_type, summary, order_items, pricer=None, cart=None):
+    """
+    Create the order, its address, coupon usage and lines as one unit: any
+    CheckoutError (or other failure) rolls everything back. Lines are
+    resolved and priced before anything is written, then inserted with a
+    single bulk_create and their stock taken with one conditional UPDATE,
+    so the query count does not grow with line count.
+
+    Amounts are priced server-side; of `summary` only the discount_code is
+    read, whatever subtotal/total the client sent.
+
+    `cart` (the user's or an anonymous one) hands its stock holds over to
+    the order; with no `order_items` the order is placed for its contents.
+    It must come from the request (resolve_cart): the customer found by a
+    guest's email is never trusted to pick a cart.
+    """
+    try:
+        lines, quote = quote_checkout(
+            order_items=order_items, cart=cart, coupon_code=summary.get("discount_code"), pricer=pricer,
+        )
+    except CouponError as e:
+        raise CheckoutError(f"Coupon error: {e}")
+
+    email = shipping_info.get("email")
+    first_name = shipping_info.get("firstName", "")
+    last_name = shipping_info.get("lastName", "")
+
+    if user is not None and user.is_authenticated:
+        customer = user
+    else:
+        if not email:
+            raise CheckoutError("Email is required for guest checkout")
+        customer, _ = Customer.objects.get_or_create(
+            email=email,
+            defaults={"first_name": first_name, "last_name": last_name, "is_guest": True},
+        )
+
+    shipping_address = CustomerAddress.objects.create(
+        customer=customer,
+        first_name=first_name,
+        last_name=last_name,
+        phone="",
+        address=shipping_info.get("address", ""),
+        city=shipping_info.get("city", ""),
+        postal_code=shipping_info.get("postalCode", ""),
+        country=shipping_info.get("country", "Bangladesh"),
+    )
+
+    order = Order(
+        customer=customer,
+        shipping_address=shipping_address,
+        payment_type=payment_type,
+        payment_status="pending",
+        coupon=quote.coupon,
+        subtotal_amount=quote.subtotal,
+        shipping_cost=quote.shipping,
+        discount_amount=quote.discount,
+        total_amount=quote.total,
+        total_quantity=sum(quantity for _, quantity, _ in lines),
+    )
+    if quote.coupon:
+        # Counted inside this transaction: a failed order un-counts the use
+        try:
+            redeem(quote.coupon, customer)
+        except CouponError as e:
+            raise CheckoutError(f"Coupon error: {e}")
+    order.save()
+
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product_variant=variant,
+            quantity=quantity,
+            unit_price=unit_price,
+            attributes=attributes,
+        )
+        for (variant, quantity, unit_price, _), (_, _, attributes) in zip(quote.lines, lines)
+    ])
+
+    # Take the stock (or the customer's cart holds); short stock aborts the whole order
+    quantities = Counter()
+    for variant, quantity, _ in lines:
+        quantities[variant.pk] += quantity
+    try:
+        commit_order(order, quantities, cart=cart)
+    except InsufficientStock as e:
+        raise CheckoutError(str(e))
+    if cart is not None:
+        # The ordered lines leave the cart with their holds, so the same
+        # cart cannot be checked out twice
+        cart.items.filter(product_variant_id__in=quantities).delete()
+        invalidate_cart(cart)
+
+    # Enqueued in this transaction: the email only goes out if the order commits
+    send_order_confirmation.enqueue(
+        order.id, email or customer.email, first_name, idempotency_key=f"order-confirmation:{order.id}"
+    )
+    return order_detail_queryset().get(pk=order.pk)
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save
+
+from . import rollups
+from .inventory import release_order
+from .models import Order, OrderItem
+
+
+def _on_order_save(sender, instance, created, **kwargs):
+    if not created and instance.status == 'cancelled' and getattr(instance, '_loaded_status', None) != 'cancelled':
+        release_order(instance)
+        instance._loaded_status = instance.status
+
+
+def _on_item_change(sender, instance, **kwargs):
+    # Checkout sets total_quantity itself (bulk_create sends no signals);
+    # this covers items edited or removed later, e.g. in the admin
+    Order.objects.filter(pk=instance.order_id).refresh_total_quantity()
+    order = Order.objects.filter(pk=instance.order_id).only("created_at").first()
+    if order is not None:
+        rollups.schedule(rollups.day_of(order))
+
+
+def _on_order_change(sender, instance, **kwargs):
+    # Checkout saves the order before its items; the rebuild runs after commit
+    rollups.schedule(rollups.day_of(instance))
+
+
+def connect_inventory_release():
+    post_save.connect(_on_order_save, sender=Order, dispatch_uid="inventory:order-cancelled")
+
+
+def connect_sales_rollups():
+    post_save.connect(_on_order_change, sender=Order, dispatch_uid="rollups:order-saved")
+    post_delete.connect(_on_order_change, sender=Order, dispatch_uid="rollups:order-deleted")
+
+
+def connect_total_quantity():
+    post_save.connect(_on_item_change, sender=OrderItem, dispatch_uid="orders:item-saved")
+    post_delete.connect(_on_item_change, sender=OrderItem, dispatch_uid="orders:item-deleted")
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from apps.tasks.queue import task
+from .rollups import rebuild_day
+
+
+@task()
+def send_order_confirmation(order_id, email, first_name):
+    send_mail(
+        subject="Order Confirmation",
+        message=f"Hi {first_name},\n\nYour order #{order_id} has been placed successfully. We’ll notify you once it’s on the way.\n\nThank you!",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[email],
+    )
+
+
+@task()
+def rebuild_sales_day(day):
+    rebuild_day(date.fromisoformat(day))
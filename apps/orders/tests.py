@@ -1,3 +1,493 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.account.models import CustomerAddress
+from apps.cart.models import Cart, CartItem
+from apps.core.models import IdempotencyKey
+from apps.marketing.tests import make_coupon
+from apps.products.models import Category, Product, ProductVariant
+from apps.tasks.models import Task
+from .exports import ORDER_COLUMNS
+from .inventory import release_expired
+from apps.tasks.queue import claim, run, run_pending
+from .models import DailyCategorySales, DailyProductSales, DailySales, Order, OrderItem, StockReservation
+from .pricing import Pricer
+from .services import CheckoutError, place_order
+from .tasks import rebuild_sales_day
+
+
+def make_variants(count, stock=10, price="10.00"):
+    category = Category.objects.get_or_create(name="Sheets")[0]
+    variants = []
+    for i in range(count):
+        product = Product.objects.create(name=f"Sheet {i}", category=category, price=Decimal(price))
+        variants.append(ProductVariant.objects.create(product=product, sku=f"SH-{i}", stock=stock))
+    return variants
+
+
+def checkout_payload(lines, email="guest@example.com", **summary):
+    return {
+        "customer_payload": {"shipping_info": {
+            "email": email, "firstName": "Guest", "lastName": "User",
+            "address": "1 Road", "city": "Dhaka", "postalCode": "1200",
+        }},
+        "payment_method": "Cash",
+        "order_items": lines,
+        "summary": {"subtotal": "0", "delivery": "0", "discount_amount": "0", "total": "0", **summary},
+    }
+
+
+class CheckoutTests(TestCase):
+    def checkout(self, payload):
+        return self.client.post("/api/orders/checkout/", payload, content_type="application/json")
+
+    def test_query_count_does_not_grow_with_lines(self):
+        variants = make_variants(30)
+
+        def queries(lines):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.checkout(checkout_payload(lines))
+            self.assertEqual(response.status_code, 201, response.json())
+            return len(ctx.captured_queries)
+
+        queries([{"product_variant_id": variants[0].pk}])  # creates the guest customer
+        few = queries([{"product_variant_id": v.pk, "quantity": 1} for v in variants[:3]])
+        many = queries([{"product_variant_id": v.pk, "quantity": 2} for v in variants])
+        self.assertEqual(few, many)
+        self.assertEqual(OrderItem.objects.filter(order=Order.objects.latest("pk")).count(), 30)
+
+    def test_lines_are_priced_from_the_catalog(self):
+        cheap, regular = make_variants(2, price="40.00")
+        cheap.price_override = Decimal("25.00")
+        cheap.save()
+        response = self.checkout(checkout_payload([
+            {"product_variant_id": cheap.pk, "quantity": 2},
+            {"product_id": regular.product_id, "quantity": 1, "unit_price": "1.00"},
+        ]))
+        self.assertEqual(response.status_code, 201)
+        prices = [item["unit_price"] for item in response.json()["data"]["items"]]
+        self.assertEqual(prices, ["25.00", "40.00"])
+        self.assertTrue(Task.objects.filter(idempotency_key__startswith="order-confirmation:").exists())
+
+    def test_a_bad_line_rolls_back_the_whole_order(self):
+        variant, = make_variants(1)
+        response = self.checkout(checkout_payload([
+            {"product_variant_id": variant.pk, "quantity": 1},
+            {"product_id": 99999, "quantity": 1},
+        ], email="new@example.com"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("product_id=99999", response.json()["message"])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(CustomerAddress.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="history@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.variants = make_variants(3, stock=1000)
+
+    def place(self, count):
+        for _ in range(count):
+            place_order(
+                user=self.user, shipping_info={"email": self.user.email}, payment_type="CASH", summary={},
+                order_items=[{"product_variant_id": v.pk, "quantity": 2} for v in self.variants],
+            )
+
+    def history(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/orders/history/", params)
+        self.assertEqual(response.status_code, 200, response.json())
+        return response.json(), len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.place(2)
+        _, few = self.history()
+        self.place(10)
+        body, many = self.history()
+        self.assertEqual(few, many)
+        self.assertEqual(len(body["data"]), 12)
+        self.assertEqual(body["data"][0]["total_quantity"], 6)
+
+    def test_cursor_pages(self):
+        self.place(5)
+        first, _ = self.history(page_size=3)
+        self.assertTrue(first["pagination"]["has_next"])
+        second, _ = self.history(page_size=3, cursor=first["pagination"]["next_cursor"])
+        ids = [o["id"] for o in first["data"] + second["data"]]
+        self.assertEqual(ids, sorted(Order.objects.values_list("pk", flat=True), reverse=True))
+        self.assertFalse(second["pagination"]["has_next"])
+
+    def test_total_quantity_follows_item_edits(self):
+        self.place(1)
+        order = Order.objects.get()
+        self.assertEqual(order.total_quantity, 6)
+        item = order.items.first()
+        item.quantity = 5
+        item.save()
+        order.items.last().delete()
+        order.refresh_from_db()
+        self.assertEqual(order.total_quantity, 7)
+
+
+@override_settings(SHIPPING_FLAT_RATE="60.00", FREE_SHIPPING_THRESHOLD=None)
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.a, self.b = make_variants(2, stock=100, price="10.00")
+
+    def place(self, *quantities):
+        return place_order(
+            user=None, shipping_info={"email": "roll@example.com"}, payment_type="CASH", summary={},
+            order_items=[{"product_variant_id": v.pk, "quantity": q} for v, q in zip((self.a, self.b), quantities) if q],
+        )
+
+    def rows(self):
+        return (
+            sorted(DailySales.objects.values_list("status", "orders", "units", "revenue")),
+            sorted(DailyProductSales.objects.values_list("product_name", "units", "revenue")),
+            list(DailyCategorySales.objects.values_list("category_name", "units", "revenue")),
+        )
+
+    def test_rollups_follow_orders(self):
+        self.place(2, 1)
+        order = self.place(1, 0)
+        run_pending()
+        sales, products, categories = self.rows()
+        self.assertEqual(sales, [("pending", 2, 4, Decimal("160.00"))])  # with 60.00 shipping each
+        self.assertEqual(products, [("Sheet 0", 3, Decimal("30.00")), ("Sheet 1", 1, Decimal("10.00"))])
+        self.assertEqual(categories, [("Sheets", 4, Decimal("40.00"))])
+
+        order.status = "cancelled"
+        order.save()
+        run_pending()
+        self.assertEqual(self.rows()[0], [("cancelled", 1, 1, Decimal("70.00")), ("pending", 1, 3, Decimal("90.00"))])
+
+        incremental = self.rows()
+        DailySales.objects.all().delete()
+        call_command("rebuild_sales_rollups", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.rows(), incremental)
+
+    def test_rebuilds_of_a_day_are_coalesced(self):
+        for _ in range(3):
+            self.place(1, 1)
+        self.assertEqual(Task.objects.filter(name=rebuild_sales_day.task_name, status="queued").count(), 1)
+
+        # Once a worker holds the rebuild, later changes queue a new one
+        claimed = claim("w", limit=10)
+        self.place(1, 0)
+        self.assertEqual(Task.objects.filter(name=rebuild_sales_day.task_name, status="queued").count(), 1)
+        for task_row in claimed:
+            run(task_row)
+        run_pending()
+        self.assertEqual(self.rows()[0], [("pending", 4, 7, Decimal("310.00"))])
+
+    def test_dashboard_reads_the_rollups(self):
+        admin = get_user_model().objects.create_superuser(email="boss@example.com", password="pw")
+        self.client.force_login(admin)
+        self.place(2, 1)
+        run_pending()
+        response = self.client.get("/admin/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["stats"]["orders"], 1)
+        self.assertEqual(response.context["stats"]["sales_total"], Decimal("90.00"))
+        self.assertEqual(response.context["top_products"][0]["name"], "Sheet 0")
+
+    def test_dashboard_widgets_are_cached(self):
+        admin = get_user_model().objects.create_superuser(email="boss@example.com", password="pw")
+        self.client.force_login(admin)
+        self.client.get("/admin/")
+        self.place(2, 1)
+        run_pending()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/admin/")
+        # Only the session/user lookups: every widget came from the cache
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(response.context["stats"]["orders"], 0)
+        self.assertContains(response, "Updated")
+        self.assertEqual(set(response.context["updated"]), {
+            "users", "orders", "trend", "top_categories", "top_products", "recent_orders",
+        })
+
+        response = self.client.get("/admin/?refresh=1")
+        self.assertEqual(response.context["stats"]["orders"], 1)
+        self.assertEqual(len(response.context["recent_orders"]), 1)
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.a, self.b = make_variants(2, stock=100)
+        for email, lines in (("one@example.com", [(self.a, 2), (self.b, 1)]), ("two@example.com", [(self.b, 3)])):
+            payload = checkout_payload([{"product_variant_id": v.pk, "quantity": q} for v, q in lines], email=email)
+            self.assertEqual(self.client.post("/api/orders/checkout/", payload, content_type="application/json").status_code, 201)
+        self.first, self.second = Order.objects.order_by("id")
+
+    def export(self, *args):
+        out = io.StringIO()
+        call_command("export_orders", *args, stdout=out)
+        return out.getvalue()
+
+    def test_csv_has_a_row_per_item(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual([(r["order_id"], r["sku"], r["quantity"]) for r in rows], [
+            (str(self.first.pk), "SH-0", "2"), (str(self.first.pk), "SH-1", "1"), (str(self.second.pk), "SH-1", "3"),
+        ])
+        self.assertEqual(rows[0]["customer_email"], "one@example.com")
+        self.assertEqual(rows[0]["ship_city"], "Dhaka")
+        self.assertEqual(rows[0]["line_total"], "20.00")
+
+    def test_filters_and_jsonl(self):
+        self.second.status = "shipped"
+        self.second.save()
+        lines = self.export("--format", "jsonl", "--status", "shipped").splitlines()
+        self.assertEqual([json.loads(line)["order_id"] for line in lines], [self.second.pk])
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(self.export("--since", tomorrow).splitlines(), [",".join(ORDER_COLUMNS)])
+
+    def test_csv_neutralizes_formulas(self):
+        CustomerAddress.objects.filter(pk=self.first.shipping_address_id).update(city='=HYPERLINK("http://x")')
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual(rows[0]["ship_city"], '\'=HYPERLINK("http://x")')
+        line = json.loads(self.export("--format", "jsonl").splitlines()[0])
+        self.assertEqual(line["ship_city"], '=HYPERLINK("http://x")')
+
+    def test_admin_action_streams(self):
+        admin = get_user_model().objects.create_superuser(email="boss@example.com", password="pw")
+        self.client.force_login(admin)
+        response = self.client.post("/admin/orders/order/", {
+            "action": "export_csv", "_selected_action": [self.second.pk],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="orders.csv"')
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 2)
+
+
+class IdempotentCheckoutTests(TestCase):
+    def setUp(self):
+        self.variant, = make_variants(1)
+        self.payload = checkout_payload([{"product_variant_id": self.variant.pk, "quantity": 1}])
+
+    def checkout(self, payload, key="retry-1"):
+        return self.client.post(
+            "/api/orders/checkout/", payload, content_type="application/json", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retries_replay_the_first_response(self):
+        first = self.checkout(self.payload)
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(1):
+            retry = self.checkout(self.payload)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["data"]["id"], first.json()["data"]["id"])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(CustomerAddress.objects.count(), 1)
+
+        self.assertEqual(self.checkout(self.payload, key="retry-2").status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reuse_and_requests_in_flight(self):
+        self.checkout(self.payload)
+        other = checkout_payload([{"product_variant_id": self.variant.pk, "quantity": 2}])
+        self.assertEqual(self.checkout(other).status_code, 422)
+
+        IdempotencyKey.objects.update(status="in_progress", response_body=None)
+        self.assertEqual(self.checkout(self.payload).status_code, 409)
+        IdempotencyKey.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.checkout(self.payload).status_code, 201)  # abandoned: runs again
+
+    def test_expired_keys_are_purged(self):
+        self.checkout(self.payload)
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        call_command("purge_idempotency_keys", stdout=open("/dev/null", "w"))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+@override_settings(SHIPPING_FLAT_RATE="60.00", FREE_SHIPPING_THRESHOLD="500")
+class PricingTests(TestCase):
+    def setUp(self):
+        self.a, self.b = make_variants(2, price="33.33")
+        self.b.price_override = Decimal("19.99")
+        self.b.save()
+
+    def test_quote_totals(self):
+        make_coupon(discount_type="percent", discount_value=Decimal("12.5"))
+        quote = Pricer().quote([(self.a.pk, 3), (self.b.pk, 1)], "save10")
+        self.assertEqual(quote.subtotal, Decimal("119.98"))
+        self.assertEqual(quote.discount, Decimal("15.00"))  # 14.9975 rounded half up
+        self.assertEqual(quote.shipping, Decimal("60.00"))
+        self.assertEqual(quote.total, Decimal("164.98"))
+
+        big = Pricer().quote([(self.a.pk, 20)])
+        self.assertEqual((big.shipping, big.total), (Decimal("0.00"), Decimal("666.60")))
+
+    def test_flat_discount_never_exceeds_subtotal(self):
+        make_coupon(discount_value=Decimal("50.00"))
+        quote = Pricer().quote([(self.b.pk, 1)], "SAVE10")
+        self.assertEqual((quote.discount, quote.subtotal - quote.discount), (Decimal("19.99"), Decimal("0.00")))
+
+    def test_lookups_are_memoized(self):
+        make_coupon()
+        pricer = Pricer()
+        pricer.quote([(self.a.pk, 1)], "SAVE10")
+        with self.assertNumQueries(0):
+            pricer.quote([(self.a.pk, 2)], "SAVE10")
+
+    def test_checkout_ignores_client_totals(self):
+        response = self.client.post("/api/orders/checkout/", checkout_payload(
+            [{"product_variant_id": self.a.pk, "quantity": 2}], subtotal="1.00", total="1.00",
+        ), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual((order.subtotal_amount, order.shipping_cost, order.total_amount),
+                         (Decimal("66.66"), Decimal("60.00"), Decimal("126.66")))
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="buyer@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.variant, = make_variants(1, stock=5)
+
+    def add_to_cart(self, quantity):
+        return self.client.post(
+            "/api/cart/add/", {"product_variant_id": self.variant.pk, "quantity": quantity}, format="json",
+        )
+
+    def test_cart_holds_keep_the_catalog_cached_until_availability_changes(self):
+        cache.clear()
+        self.client.get("/api/products/")
+        self.add_to_cart(2)
+        with self.assertNumQueries(0):
+            self.client.get("/api/products/")
+
+        self.add_to_cart(3)  # the cart now holds all 5: sold out
+        self.assertEqual(self.client.get("/api/products/").json()["data"][0]["in_stock"], False)
+        self.client.patch("/api/cart/", {"operations": [
+            {"op": "update", "product_variant_id": self.variant.pk, "quantity": 4},
+        ]}, format="json")  # back in stock
+        self.assertEqual(self.client.get("/api/products/").json()["data"][0]["in_stock"], True)
+
+    def stock(self):
+        self.variant.refresh_from_db()
+        return self.variant.stock
+
+    def test_cart_holds_stock_and_rejects_more_than_available(self):
+        self.assertEqual(self.add_to_cart(3).status_code, 201)
+        self.assertEqual(self.stock(), 2)
+        response = self.add_to_cart(3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Only 2 left", response.json()["message"])
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+
+        summary = self.client.get("/api/cart/").json()["data"]["summary"]
+        self.assertEqual(summary["subtotal"], "30.00")
+
+        item = CartItem.objects.get()
+        self.client.delete(f"/api/cart/remove/{item.pk}/")
+        self.assertEqual(self.stock(), 5)
+        self.assertTrue(Product.objects.get().in_stock)
+
+    def test_expired_holds_go_back_to_stock(self):
+        self.add_to_cart(4)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("release_expired_holds", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.stock(), 5)
+        self.assertEqual(release_expired(), 0)
+
+    def test_checkout_converts_cart_holds(self):
+        self.add_to_cart(2)
+        response = self.client.post(
+            "/api/orders/checkout/",
+            checkout_payload([{"product_variant_id": self.variant.pk, "quantity": 3}], email=self.user.email),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(self.stock(), 2)  # 2 came from the hold, 1 from stock
+        self.assertEqual(StockReservation.objects.get(status="converted").quantity, 2)
+
+        order = Order.objects.get()
+        order.status = "cancelled"
+        order.save()
+        self.assertEqual(self.stock(), 5)
+        order.save()  # releasing twice is a no-op
+        self.assertEqual(self.stock(), 5)
+
+    def test_guest_checkout_with_a_members_email_leaves_their_cart_alone(self):
+        self.add_to_cart(2)
+        response = APIClient().post(
+            "/api/orders/checkout/",
+            checkout_payload([{"product_variant_id": self.variant.pk, "quantity": 1}], email=self.user.email),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 2)
+        self.assertEqual(StockReservation.objects.get(cart__user=self.user).status, "held")
+        self.assertEqual(self.stock(), 2)  # 2 still held, 1 sold to the guest
+
+    def test_short_stock_rolls_back_the_order(self):
+        with self.assertRaises(CheckoutError):
+            place_order(
+                user=self.user, shipping_info={"email": self.user.email}, payment_type="CASH",
+                summary={}, order_items=[{"product_variant_id": self.variant.pk, "quantity": 6}],
+            )
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(), 5)
+
+    def test_failed_order_does_not_use_up_the_coupon(self):
+        coupon = make_coupon(usage_limit=1)
+        payload = checkout_payload([{"product_variant_id": self.variant.pk, "quantity": 6}], discount_code="save10")
+        self.assertEqual(self.client.post("/api/orders/checkout/", payload, format="json").status_code, 400)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.times_used, 0)
+
+        payload["order_items"][0]["quantity"] = 1
+        self.assertEqual(self.client.post("/api/orders/checkout/", payload, format="json").status_code, 201)
+        response = self.client.post("/api/orders/checkout/", payload, format="json")
+        self.assertEqual(response.json()["message"], "Coupon error: This coupon has reached its usage limit.")
+
+
+class StockConcurrencyTests(TransactionTestCase):
+    def test_concurrent_checkouts_never_oversell(self):
+        variant, = make_variants(1, stock=10)
+        results = []
+
+        def buy(n):
+            try:
+                place_order(
+                    user=None, shipping_info={"email": f"buyer{n}@example.com"}, payment_type="CASH",
+                    summary={}, order_items=[{"product_variant_id": variant.pk, "quantity": 1}],
+                )
+                results.append(True)
+            except CheckoutError:
+                results.append(False)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=buy, args=(n,)) for n in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        variant.refresh_from_db()
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual(variant.stock, 0)
+        self.assertEqual(Order.objects.count(), 10)
@@ -0,0 +1,430 @@
+import csv
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Attribute, AttributeValue, Category, Product, ProductVariant, ProductVariantValue
+
+# One CSV row per variant; product columns repeat on each of its rows.
+# Attributes are written as "Color=Red; Size=Large".
+CSV_COLUMNS = [
+    "slug", "name", "description", "category", "price", "is_featured",
+    "sku", "stock", "price_override", "attributes",
+]
+PRODUCT_COLUMNS = ["name", "description", "category", "price", "is_featured"]
+FORMATS = ("csv", "jsonl")
+BATCH_SIZE = 1000
+
+
+class CatalogImportError(ValueError):
+    pass
+
+
+def _decimal(value, name):
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise CatalogImportError(f"{name} must be a number, got {value!r}")
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def _format_attributes(pairs):
+    return "; ".join(f"{name}={value}" for name, value in pairs)
+
+
+def _parse_attributes(text):
+    pairs = {}
+    for part in (text or "").split(";"):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        if not sep or not name.strip() or not value.strip():
+            raise CatalogImportError(f"attributes must look like 'Size=Large; Color=Red', got {text!r}")
+        pairs[name.strip()] = value.strip()
+    return pairs
+
+
+# ---- export
+
+def export_queryset():
+    return (
+        Product.objects
+        .select_related("category")
+        .prefetch_related(
+            Prefetch(
+                "variants",
+                queryset=ProductVariant.objects.order_by("pk").prefetch_related(
+                    Prefetch(
+                        "variant_values",
+                        queryset=ProductVariantValue.objects.select_related("attribute_value__attribute"),
+                    )
+                ),
+            )
+        )
+        .order_by("pk")
+    )
+
+
+def product_records(queryset=None, chunk_size=BATCH_SIZE):
+    """Yield one JSON-ready dict per product; prefetches run per chunk, so memory stays flat."""
+    queryset = export_queryset() if queryset is None else queryset
+    for product in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            "slug": product.slug,
+            "name": product.name,
+            "description": product.description,
+            "category": product.category.slug,
+            "price": str(product.price),
+            "is_featured": product.is_featured,
+            "variants": [
+                {
+                    "sku": variant.sku,
+                    "stock": variant.stock,
+                    "price_override": None if variant.price_override is None else str(variant.price_override),
+                    "attributes": {
+                        vv.attribute_value.attribute.name: vv.attribute_value.value
+                        for vv in variant.variant_values.all()
+                    },
+                }
+                for variant in product.variants.all()
+            ],
+        }
+
+
+def export_catalog(stream, fmt, queryset=None, chunk_size=BATCH_SIZE):
+    """Write the catalog to a text stream; returns (products, variants) written."""
+    products = variants = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+    for record in product_records(queryset, chunk_size):
+        products += 1
+        variants += len(record["variants"])
+        if fmt == "jsonl":
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            continue
+        base = {key: record[key] for key in ["slug"] + PRODUCT_COLUMNS}
+        for variant in record["variants"] or [None]:
+            row = dict(base)
+            if variant:
+                row.update(
+                    sku=variant["sku"],
+                    stock=variant["stock"],
+                    price_override=variant["price_override"] or "",
+                    attributes=_format_attributes(variant["attributes"].items()),
+                )
+            writer.writerow(row)
+    return products, variants
+
+
+# ---- import
+
+class CatalogImporter:
+    """
+    Upserts products keyed on slug and variants keyed on sku, a batch of
+    products at a time: each batch costs a fixed handful of queries
+    (lookups, bulk_create, bulk_update), independent of its size, and is
+    committed on its own so a long import does not hold the write lock
+    throughout (run it inside an atomic block to get all-or-nothing).
+
+    Only the columns/keys present in the input are compared and written, so
+    a stock-only feed leaves names and prices alone. Save signals do not
+    fire for bulk writes, so price/stock summaries are refreshed here and
+    `on_batch(product_ids)` lets the caller refresh anything else derived
+    from the touched products; `progress(stats)` is called after every batch.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, report=None, on_batch=None, progress=None):
+        self.batch_size = batch_size
+        self.report = report or (lambda message: None)
+        self.on_batch = on_batch
+        self.progress = progress
+        self.stats = Counter()
+        self.errors = []
+        self._categories = None
+        self._attributes = None
+        self._attribute_values = None
+
+    # ---- reading
+
+    def records(self, stream, fmt):
+        if fmt == "jsonl":
+            return self._jsonl_records(stream)
+        if fmt == "csv":
+            return self._csv_records(stream)
+        raise CatalogImportError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+
+    def _jsonl_records(self, stream):
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self._error(line_no, f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                self._error(line_no, "expected a JSON object")
+                continue
+            yield line_no, record
+
+    def _csv_records(self, stream):
+        reader = csv.DictReader(stream)
+        rows = ((reader.line_num, row) for row in reader)
+        # Rows of one product are expected to be adjacent (catalog_export writes them so)
+        for slug, group in groupby(rows, key=lambda item: item[1].get("slug") or slugify(item[1].get("name") or "")):
+            group = list(group)
+            line_no, first = group[0]
+            record = {"slug": slug}
+            record.update((key, first[key]) for key in PRODUCT_COLUMNS if key in first)
+            variants = []
+            try:
+                for _, row in group:
+                    if not row.get("sku"):
+                        continue
+                    variant = {key: row[key] for key in ("sku", "stock", "price_override") if key in row}
+                    if "attributes" in row:
+                        variant["attributes"] = _parse_attributes(row["attributes"])
+                    variants.append(variant)
+            except CatalogImportError as e:
+                self._error(line_no, str(e))
+                continue
+            record["variants"] = variants
+            yield line_no, record
+
+    # ---- cleaning
+
+    def _category_id(self, value):
+        if self._categories is None:
+            self._categories = {}
+            for pk, slug, name in Category.objects.values_list("pk", "slug", "name"):
+                self._categories[slug] = pk
+                self._categories.setdefault(name, pk)
+        try:
+            return self._categories[value]
+        except KeyError:
+            raise CatalogImportError(f"unknown category {value!r}")
+
+    def _attribute_value_id(self, name, value):
+        if self._attribute_values is None:
+            self._attributes = {}
+            self._attribute_values = {}
+            for pk, attr_name in Attribute.objects.order_by("pk").values_list("pk", "name"):
+                self._attributes.setdefault(attr_name.lower(), pk)
+            for pk, attribute_id, val in AttributeValue.objects.order_by("pk").values_list("pk", "attribute_id", "value"):
+                self._attribute_values.setdefault((attribute_id, val.lower()), pk)
+
+        attribute_id = self._attributes.get(name.lower())
+        if attribute_id is None:
+            attribute_id = self._attributes[name.lower()] = Attribute.objects.create(name=name).pk
+            self.stats["attributes_created"] += 1
+        key = (attribute_id, value.lower())
+        if key not in self._attribute_values:
+            self._attribute_values[key] = AttributeValue.objects.create(attribute_id=attribute_id, value=value).pk
+            self.stats["attribute_values_created"] += 1
+        return self._attribute_values[key]
+
+    def _clean(self, record):
+        name = str(record.get("name") or "").strip()
+        slug = str(record.get("slug") or "").strip() or slugify(name)
+        if not slug:
+            raise CatalogImportError("slug or name is required")
+        product = {"slug": slug}
+        if name:
+            product["name"] = name
+        if "description" in record:
+            product["description"] = record["description"] or ""
+        if record.get("category") not in (None, ""):
+            product["category_id"] = self._category_id(record["category"])
+        if record.get("price") not in (None, ""):
+            product["price"] = _decimal(record["price"], "price")
+        if record.get("is_featured") not in (None, ""):
+            product["is_featured"] = _bool(record["is_featured"])
+
+        variants = []
+        for raw in record.get("variants") or []:
+            sku = str(raw.get("sku") or "").strip()
+            if not sku:
+                raise CatalogImportError("every variant needs a sku")
+            variant = {"sku": sku}
+            if raw.get("stock") not in (None, ""):
+                try:
+                    variant["stock"] = int(raw["stock"])
+                except (TypeError, ValueError):
+                    raise CatalogImportError(f"stock must be an integer, got {raw['stock']!r}")
+                if variant["stock"] < 0:
+                    raise CatalogImportError(f"stock cannot be negative ({sku})")
+            if "price_override" in raw:
+                variant["price_override"] = _decimal(raw["price_override"], "price_override")
+            if raw.get("attributes") is not None:
+                variant["attributes"] = raw["attributes"]
+            variants.append(variant)
+        return product, variants
+
+    def _error(self, line_no, message):
+        self.stats["errors"] += 1
+        self.errors.append((line_no, message))
+        self.report(f"! line {line_no}: {message}")
+
+    # ---- writing
+
+    def run(self, stream, fmt):
+        batch = {}
+        for line_no, record in self.records(stream, fmt):
+            try:
+                product, variants = self._clean(record)
+            except CatalogImportError as e:
+                self._error(line_no, str(e))
+                continue
+            slug = product["slug"]
+            if slug in batch:
+                # Same product again (non-adjacent CSV rows): merge into one upsert
+                batch[slug][1].update(product)
+                batch[slug][2].extend(variants)
+            else:
+                batch[slug] = (line_no, product, variants)
+            if len(batch) >= self.batch_size:
+                self._apply(batch)
+                batch = {}
+        if batch:
+            self._apply(batch)
+        return self.stats
+
+    @transaction.atomic
+    def _apply(self, batch):
+        now = timezone.now()
+        existing = Product.objects.in_bulk(list(batch), field_name="slug")
+        to_create, to_update, fields = [], [], set()
+        for slug, (line_no, data, _) in list(batch.items()):
+            product = existing.get(slug)
+            if product is None:
+                missing = [key for key in ("name", "category_id", "price") if key not in data]
+                if missing:
+                    self._error(line_no, f"new product {slug!r} is missing {', '.join(missing)}")
+                    del batch[slug]
+                    continue
+                to_create.append(Product(**data))
+                self.report(f"+ product {slug}")
+                continue
+            changed = [key for key, value in data.items() if getattr(product, key) != value]
+            if not changed:
+                self.stats["products_unchanged"] += 1
+                continue
+            self.report(f"~ product {slug}: " + ", ".join(
+                f"{key} {getattr(product, key)!r} -> {data[key]!r}" for key in changed
+            ))
+            for key in changed:
+                setattr(product, key, data[key])
+            product.updated_at = now  # bulk_update skips auto_now
+            fields.update(changed)
+            to_update.append(product)
+
+        Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+        if to_update:
+            Product.objects.bulk_update(to_update, sorted(fields | {"updated_at"}), batch_size=self.batch_size)
+        self.stats["products_created"] += len(to_create)
+        self.stats["products_updated"] += len(to_update)
+
+        product_ids = dict(Product.objects.filter(slug__in=list(batch)).values_list("slug", "pk"))
+        touched = {product_ids[product.slug] for product in to_create + to_update}
+        touched |= self._apply_variants(batch, product_ids)
+
+        if touched:
+            touched_ids = sorted(touched)
+            Product.objects.filter(pk__in=touched_ids).refresh_summaries()
+            if self.on_batch:
+                self.on_batch(touched_ids)
+        self.stats["batches"] += 1
+        if self.progress:
+            self.progress(self.stats)
+
+    def _apply_variants(self, batch, product_ids):
+        """Upsert the batch's variants; returns the ids of the products they changed."""
+        wanted = {}
+        for slug, (line_no, _, variants) in batch.items():
+            for variant in variants:
+                wanted[variant["sku"]] = dict(variant, product_id=product_ids[slug], slug=slug)
+        if not wanted:
+            return set()
+
+        existing = ProductVariant.objects.in_bulk(list(wanted), field_name="sku")
+        to_create, to_update, fields, touched = [], [], set(), set()
+        now = timezone.now()
+        for sku, data in wanted.items():
+            values = {key: data[key] for key in ("product_id", "stock", "price_override") if key in data}
+            variant = existing.get(sku)
+            if variant is None:
+                to_create.append(ProductVariant(sku=sku, **values))
+                touched.add(data["product_id"])
+                self.report(f"+ variant {sku}")
+                continue
+            changed = [key for key, value in values.items() if getattr(variant, key) != value]
+            if not changed:
+                self.stats["variants_unchanged"] += 1
+                continue
+            self.report(f"~ variant {sku}: " + ", ".join(
+                f"{key} {getattr(variant, key)!r} -> {values[key]!r}" for key in changed
+            ))
+            if "product_id" in changed:
+                # The sku moved: the product it left needs its summary refreshed too
+                touched.add(variant.product_id)
+            for key in changed:
+                setattr(variant, key, values[key])
+            variant.updated_at = now
+            fields.update(changed)
+            to_update.append(variant)
+            touched.add(data["product_id"])
+
+        ProductVariant.objects.bulk_create(to_create, batch_size=self.batch_size)
+        if to_update:
+            ProductVariant.objects.bulk_update(to_update, sorted(fields | {"updated_at"}), batch_size=self.batch_size)
+        self.stats["variants_created"] += len(to_create)
+        self.stats["variants_updated"] += len(to_update)
+
+        touched |= self._apply_variant_values(wanted)
+        return touched
+
+    def _apply_variant_values(self, wanted):
+        with_attributes = {sku: data for sku, data in wanted.items() if "attributes" in data}
+        if not with_attributes:
+            return set()
+        variant_ids = dict(ProductVariant.objects.filter(sku__in=list(with_attributes)).values_list("sku", "pk"))
+        desired = {
+            variant_ids[sku]: {self._attribute_value_id(str(name), str(value)) for name, value in data["attributes"].items()}
+            for sku, data in with_attributes.items()
+        }
+        current = {}
+        for pk, variant_id, value_id in ProductVariantValue.objects.filter(
+            variant_id__in=list(desired)
+        ).values_list("pk", "variant_id", "attribute_value_id"):
+            current.setdefault(variant_id, {})[value_id] = pk
+
+        stale, missing, touched = [], [], set()
+        products = {variant_ids[sku]: data["product_id"] for sku, data in with_attributes.items()}
+        for variant_id, value_ids in desired.items():
+            have = current.get(variant_id, {})
+            stale.extend(pk for value_id, pk in have.items() if value_id not in value_ids)
+            missing.extend(
+                ProductVariantValue(variant_id=variant_id, attribute_value_id=value_id)
+                for value_id in value_ids - set(have)
+            )
+            if value_ids != set(have):
+                touched.add(products[variant_id])
+        if stale:
+            ProductVariantValue.objects.filter(pk__in=stale).delete()
+        ProductVariantValue.objects.bulk_create(missing, batch_size=self.batch_size)
+        self.stats["variant_values_changed"] += len(stale) + len(missing)
+        return touched
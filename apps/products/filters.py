@@ -0,0 +1,189 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Exists, Max, Min, OuterRef
+from django.db.models.functions import Coalesce
+
+from .models import Category, AttributeValue, ProductVariant, ProductVariantValue
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _parse_decimal(params, name):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return Decimal(raw)
+    except (InvalidOperation, TypeError):
+        raise FilterError(f"{name} must be a number")
+
+
+def _parse_id_list(params, name):
+    # Accepts both ?attr=1&attr=2 and ?attr=1,2
+    ids = []
+    for raw in params.getlist(name):
+        for part in raw.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit():
+                raise FilterError(f"{name} must be a list of ids")
+            ids.append(int(part))
+    return ids
+
+
+def _parse_bool(params, name):
+    return str(params.get(name, "")).lower() in ("1", "true", "yes")
+
+
+def filter_products(queryset, params):
+    """
+    Supported query params:
+      category   - category slug, matches the category and all its descendants
+      min_price  - lower price bound (inclusive)
+      max_price  - upper price bound (inclusive); a product matches when one
+                   of its variants has its effective price within the bounds
+      attr       - AttributeValue ids; values of the same attribute are OR-ed,
+                   different attributes are AND-ed, all on the same variant
+      in_stock   - only products with a matching variant in stock
+    The Product summary columns pre-filter price and stock, so `in_stock`
+    alone stays on the product table.
+    """
+    return _filter_variants(_filter_summary(queryset, params), params, attribute_groups(params))
+
+
+def attribute_groups(params):
+    """
+    The `attr` ids grouped by attribute: {attribute_id: [value ids]}, or
+    None when ids were given but none of them exist (nothing matches).
+    """
+    value_ids = _parse_id_list(params, "attr")
+    groups = {}
+    for value_id, attribute_id in AttributeValue.objects.filter(pk__in=value_ids).values_list("pk", "attribute_id"):
+        groups.setdefault(attribute_id, []).append(value_id)
+    if value_ids and not groups:
+        return None
+    return groups
+
+
+def _price_bounds(params):
+    return _parse_decimal(params, "min_price"), _parse_decimal(params, "max_price")
+
+
+def _filter_summary(queryset, params):
+    slug = params.get("category")
+    if slug:
+        try:
+            category = Category.objects.get(slug=slug)
+        except Category.DoesNotExist:
+            raise FilterError("Unknown category")
+        queryset = queryset.filter(category__in=Category.objects.subtree(category).values("pk"))
+
+    # The summary range only overlapping the bounds is necessary, not sufficient:
+    # _filter_variants checks that one variant is actually priced in them
+    min_price, max_price = _price_bounds(params)
+    if min_price is not None:
+        queryset = queryset.filter(max_price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(min_price__lte=max_price)
+    if _parse_bool(params, "in_stock"):
+        queryset = queryset.filter(in_stock=True)
+    return queryset
+
+
+def matching_variants(params, groups):
+    """Variants that pass the variant-level filters: stock, effective price and `groups`."""
+    variants = ProductVariant.objects.all()
+    if _parse_bool(params, "in_stock"):
+        variants = variants.filter(stock__gt=0)
+    min_price, max_price = _price_bounds(params)
+    if min_price is not None or max_price is not None:
+        variants = variants.alias(effective_price=Coalesce("price_override", "product__price"))
+        if min_price is not None:
+            variants = variants.filter(effective_price__gte=min_price)
+        if max_price is not None:
+            variants = variants.filter(effective_price__lte=max_price)
+    for group in groups.values():
+        variants = variants.filter(Exists(
+            ProductVariantValue.objects.filter(variant=OuterRef("pk"), attribute_value_id__in=group)
+        ))
+    return variants
+
+
+def _filter_variants(queryset, params, groups):
+    if groups is None:
+        return queryset.none()
+    if not groups and _price_bounds(params) == (None, None):
+        return queryset
+    matching = Exists(matching_variants(params, groups).filter(product=OuterRef("pk")))
+    if not groups:
+        # A product without variants is priced at `price`: its summary range is exact
+        matching |= ~Exists(ProductVariant.objects.filter(product=OuterRef("pk")))
+    return queryset.filter(matching)
+
+
+def _value_counts(products, variants, **value_filter):
+    variants = variants.filter(product__in=products.order_by().values("pk")).values("pk")
+    return (
+        ProductVariantValue.objects
+        .filter(variant__in=variants, **value_filter)
+        .values(
+            "attribute_value_id",
+            "attribute_value__value",
+            "attribute_value__attribute_id",
+            "attribute_value__attribute__name",
+        )
+        .annotate(count=Count("variant__product_id", distinct=True))
+    )
+
+
+def product_facets(queryset, params):
+    """
+    Facet counts for `queryset` filtered by `params` (as filter_products):
+    number of matching products per AttributeValue plus the price range.
+
+    Only variants that pass the stock and price filters are counted.
+    Counts are disjunctive: each attribute is counted under every filter
+    except its own selection, so picking "Red" still shows how many products
+    are "Blue". One grouped query covers the unselected attributes, plus one
+    per selected attribute.
+    """
+    base = _filter_summary(queryset, params)
+    groups = attribute_groups(params)
+    filtered = _filter_variants(base, params, groups)
+    if groups is None:
+        rows = []
+    else:
+        rows = _value_counts(filtered, matching_variants(params, groups))
+        if groups:
+            rows = rows.exclude(attribute_value__attribute_id__in=list(groups))
+        rows = list(rows)
+    for attribute_id in groups or ():
+        others = {key: ids for key, ids in groups.items() if key != attribute_id}
+        rows.extend(_value_counts(
+            _filter_variants(base, params, others), matching_variants(params, others),
+            attribute_value__attribute_id=attribute_id,
+        ))
+    rows.sort(key=lambda row: (row["attribute_value__attribute__name"], row["attribute_value__value"]))
+
+    attributes = {}
+    for row in rows:
+        attribute = attributes.setdefault(row["attribute_value__attribute_id"], {
+            "id": row["attribute_value__attribute_id"],
+            "name": row["attribute_value__attribute__name"],
+            "values": [],
+        })
+        attribute["values"].append({
+            "id": row["attribute_value_id"],
+            "value": row["attribute_value__value"],
+            "count": row["count"],
+        })
+
+    stats = filtered.order_by().aggregate(total=Count("pk"), min_price=Min("min_price"), max_price=Max("max_price"))
+    return {
+        "total": stats["total"],
+        "price": {"min": stats["min_price"], "max": stats["max_price"]},
+        "attributes": list(attributes.values()),
+    }
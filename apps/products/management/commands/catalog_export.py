@@ -0,0 +1,24 @@
+
+from django.core.management.base import BaseCommand
+
+from apps.products.catalog_io import FORMATS, export_catalog
+
+
+class Command(BaseCommand):
+    help = "Stream the product catalog (products, variants, attribute values) as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="Output file, '-' for stdout (default)")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, else jsonl")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        if path == "-":
+            products, variants = export_catalog(self.stdout, fmt, chunk_size=options["chunk_size"])
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as stream:
+                products, variants = export_catalog(stream, fmt, chunk_size=options["chunk_size"])
+        # Keep stdout clean for piping; the summary goes to stderr
+        self.stderr.write(f"Exported {products} products and {variants} variants ({fmt})", style_func=self.style.SUCCESS)
@@ -0,0 +1,78 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.core.cache import invalidate_group
+from apps.products.catalog_io import FORMATS, CatalogImportError, CatalogImporter
+from apps.search.autocomplete import invalidate_suggestions
+from apps.search.index import refresh_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert products (by slug) and variants (by sku) from CSV or JSONL. "
+        "Commits a batch at a time; --dry-run reports the diff and rolls back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, '-' for stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, else jsonl")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="List what would change without saving")
+
+    def handle(self, *args, **options):
+        path, dry_run, verbosity = options["path"], options["dry_run"], options["verbosity"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        started = time.monotonic()
+
+        def report(message):
+            if message.startswith("!"):
+                self.stderr.write(message)
+            elif verbosity >= 2 or (dry_run and verbosity >= 1):
+                self.stdout.write(message)
+
+        def progress(stats):
+            if verbosity >= 1:
+                done = stats["products_created"] + stats["products_updated"] + stats["products_unchanged"]
+                self.stdout.write(f"  {done} products processed ({time.monotonic() - started:.1f}s)")
+
+        # Bulk writes skip save signals, so the search index is refreshed per batch
+        on_batch = None if dry_run else refresh_products
+        importer = CatalogImporter(options["batch_size"], report=report, on_batch=on_batch, progress=progress)
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            if dry_run:
+                with transaction.atomic():
+                    importer.run(stream, fmt)
+                    transaction.set_rollback(True)
+            else:
+                # Each batch commits on its own, releasing the write lock in between
+                importer.run(stream, fmt)
+        except CatalogImportError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if not dry_run:
+            invalidate_group("catalog")
+            invalidate_suggestions()
+
+        stats = importer.stats
+        summary = (
+            f"products: {stats['products_created']} created, {stats['products_updated']} updated, "
+            f"{stats['products_unchanged']} unchanged; "
+            f"variants: {stats['variants_created']} created, {stats['variants_updated']} updated, "
+            f"{stats['variants_unchanged']} unchanged; "
+            f"{stats['variant_values_changed']} attribute links changed; "
+            f"{stats['errors']} errors in {time.monotonic() - started:.1f}s"
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"[dry run] nothing saved. {summary}"))
+        elif stats["errors"]:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
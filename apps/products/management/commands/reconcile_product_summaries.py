@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.cache import invalidate_group
+from apps.products.models import Product
+
+SUMMARY_FIELDS = ("min_price", "max_price", "total_stock", "in_stock")
+
+
+class Command(BaseCommand):
+    help = "Recompute Product price/stock summary columns from the variants and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--dry-run", action="store_true", help="Report drifted products without fixing them")
+
+    def handle(self, *args, **options):
+        batch_size, dry_run = options["batch_size"], options["dry_run"]
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                Product.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_pk = ids[-1]
+            with transaction.atomic():
+                batch = Product.objects.filter(pk__in=ids)
+                before = {row[0]: row[1:] for row in batch.values_list("pk", *SUMMARY_FIELDS)}
+                batch.refresh_summaries()
+                after = {row[0]: row[1:] for row in batch.values_list("pk", *SUMMARY_FIELDS)}
+                changed = [pk for pk in ids if before.get(pk) != after.get(pk)]
+                if dry_run:
+                    transaction.set_rollback(True)
+            checked += len(ids)
+            drifted += len(changed)
+            for pk in changed:
+                self.stdout.write(f"  product {pk}: {before[pk]} -> {after[pk]}")
+
+        if drifted and not dry_run:
+            invalidate_group("catalog")
+        verb = "would be fixed" if dry_run else "fixed"
+        style = self.style.WARNING if drifted else self.style.SUCCESS
+        self.stdout.write(style(f"Checked {checked} products, {drifted} {verb}"))
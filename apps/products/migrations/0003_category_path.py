@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    children = {}
+    for category in Category.objects.order_by('id'):
+        children.setdefault(category.parent_id, []).append(category)
+
+    updated = []
+    stack = [(root, '', 0) for root in children.get(None, [])]
+    while stack:
+        category, prefix, depth = stack.pop()
+        category.path = f"{prefix}{category.pk}/"
+        category.depth = depth
+        updated.append(category)
+        stack.extend((child, category.path, depth + 1) for child in children.get(category.pk, []))
+    Category.objects.bulk_update(updated, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_category_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:23
+
+from django.db import migrations, models
+from django.db.models import Exists, F, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_summaries(apps, schema_editor):
+    # Same UPDATE as ProductQuerySet.refresh_summaries()
+    Product = apps.get_model('products', 'Product')
+    ProductVariant = apps.get_model('products', 'ProductVariant')
+    variants = ProductVariant.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    effective = Coalesce('price_override', 'product__price')
+    Product.objects.update(
+        min_price=Coalesce(Subquery(variants.annotate(v=Min(effective)).values('v')), F('price')),
+        max_price=Coalesce(Subquery(variants.annotate(v=Max(effective)).values('v')), F('price')),
+        total_stock=Coalesce(Subquery(variants.annotate(v=Sum('stock')).values('v')), 0),
+        in_stock=Exists(variants.filter(stock__gt=0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='in_stock',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='total_stock',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['min_price', 'id'], name='product_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', 'min_price'], name='product_in_stock_price_idx'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -1,26 +1,125 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Exists, F, Max, Min, OuterRef, Prefetch, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.utils.text import slugify
 
 
+class CategoryQuerySet(models.QuerySet):
+    def subtree(self, category):
+        # Range scan on the materialized path: "1/5/" <= path < "1/50"
+        # ('0' sorts right after '/'), which an index on path can serve.
+        return self.filter(path__gte=category.path, path__lt=category.path[:-1] + "0")
+
+    def children_map(self):
+        """Whole tree in one query: {parent_id: [children...]}, roots under None."""
+        children = {}
+        for category in self.order_by("id"):
+            children.setdefault(category.parent_id, []).append(category)
+        return children
+
+
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
+    # Materialized path of ancestor ids including self, e.g. "1/5/12/"
+    path = models.CharField(max_length=255, blank=True, editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Categories"
 
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self._is_descendant(self.parent):
+            raise ValidationError({"parent": "A category cannot be moved under itself or its descendants."})
+
+    def _is_descendant(self, other):
+        own_path = Category.objects.filter(pk=self.pk).values_list("path", flat=True).first()
+        return bool(own_path) and other.path.startswith(own_path)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if self.pk and self.parent_id and self._is_descendant(self.parent):
+            raise ValueError("A category cannot be moved under itself or its descendants.")
+
+        old_path, old_depth = "", 0
+        if self.pk:
+            stored = Category.objects.filter(pk=self.pk).values_list("path", "depth").first()
+            if stored:
+                old_path, old_depth = stored
         super().save(*args, **kwargs)
 
+        if self.parent_id:
+            new_path, new_depth = f"{self.parent.path}{self.pk}/", self.parent.depth + 1
+        else:
+            new_path, new_depth = f"{self.pk}/", 0
+        if new_path == old_path:
+            return
+
+        Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            # Re-root every descendant in one UPDATE
+            (
+                Category.objects
+                .filter(path__startswith=old_path)
+                .exclude(pk=self.pk)
+                .update(
+                    path=Concat(Value(new_path), Substr("path", len(old_path) + 1)),
+                    depth=F("depth") + (new_depth - old_depth),
+                )
+            )
+        self.path, self.depth = new_path, new_depth
+
     def __str__(self):
         return self.name
 
 
+def product_listing_prefetches(prefix=""):
+    """
+    Prefetch plan for everything ProductSerializer renders, so a page of
+    products costs a fixed number of queries regardless of its size.
+    `prefix` lets callers reach products through a relation (e.g. "product__").
+    """
+    return [
+        f"{prefix}images",
+        Prefetch(
+            f"{prefix}variants",
+            queryset=ProductVariant.objects.prefetch_related(
+                Prefetch(
+                    "variant_values",
+                    queryset=ProductVariantValue.objects.select_related("attribute_value__attribute"),
+                )
+            ),
+        ),
+    ]
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        return self.select_related("category__parent").prefetch_related(*product_listing_prefetches())
+
+    def refresh_summaries(self):
+        """
+        Recompute min/max effective price and stock from the variants in a
+        single UPDATE. Products without variants are priced at `price` and
+        are out of stock (there is nothing to put in a cart).
+        """
+        variants = ProductVariant.objects.filter(product=OuterRef("pk")).order_by().values("product")
+        effective = Coalesce("price_override", "product__price")
+        return self.update(
+            min_price=Coalesce(Subquery(variants.annotate(v=Min(effective)).values("v")), F("price")),
+            max_price=Coalesce(Subquery(variants.annotate(v=Max(effective)).values("v")), F("price")),
+            total_stock=Coalesce(Subquery(variants.annotate(v=Sum("stock")).values("v")), 0),
+            in_stock=Exists(variants.filter(stock__gt=0)),
+        )
+
 
 class Product(models.Model):
     name = models.CharField(max_length=255)
@@ -30,11 +129,32 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Denormalized from the variants by ProductQuerySet.refresh_summaries()
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    total_stock = models.PositiveIntegerField(default=0, editable=False)
+    in_stock = models.BooleanField(default=False, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["min_price", "id"], name="product_min_price_idx"),
+            models.Index(fields=["in_stock", "min_price"], name="product_in_stock_price_idx"),
+            # Default ("newest") listing order
+            models.Index(fields=["-created_at", "id"], name="product_newest_idx"),
+            # Partial: Django compiles filter(is_featured=True) to a bare
+            # "WHERE is_featured", which SQLite only matches to a partial index
+            models.Index(fields=["id"], condition=Q(is_featured=True), name="product_featured_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if self._state.adding:
+            # No variants yet; summaries are refreshed as variants are added
+            self.min_price = self.max_price = self.price
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -44,6 +164,8 @@ class Product(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/images/")
+    # Manifest of resized renders, filled in by apps.core.images off the request path
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     alt_text = models.CharField(max_length=255, blank=True)
     is_primary = models.BooleanField(default=False)
 
@@ -78,6 +200,18 @@ class ProductVariant(models.Model):
     def __str__(self):
         return f"{self.product.name} - {self.sku}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the summary signal refresh the old product when a variant is moved
+        instance._loaded_product_id = instance.__dict__.get("product_id")
+        return instance
+
+    @property
+    def effective_price(self):
+        """Price a customer pays for this variant."""
+        return self.price_override if self.price_override is not None else self.product.price
+
 
 class ProductVariantValue(models.Model):
     variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name="variant_values")
@@ -1,11 +1,14 @@
 from rest_framework import serializers
+from apps.core.images import SrcsetField
 from .models import Category, Product, ProductImage, ProductVariant, Attribute, AttributeValue, ProductVariantValue
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(source='derivatives')
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'is_primary']
+        fields = ['id', 'image', 'alt_text', 'is_primary', 'srcset']
 
 
 class ProductVariantValueSerializer(serializers.ModelSerializer):
@@ -45,6 +48,10 @@ class ProductSerializer(serializers.ModelSerializer):
             'description',
             'category',    
             'price',
+            'min_price',
+            'max_price',
+            'total_stock',
+            'in_stock',
             'is_featured',
             'images',
             'variants'
@@ -74,6 +81,17 @@ class RecursiveCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'subcategories']
 
     def get_subcategories(self, obj):
+        # Views pass the whole tree (Category.objects.children_map()) so no node queries
+        children = self.context.get('category_children')
+        if children is not None:
+            return RecursiveCategorySerializer(children.get(obj.pk, []), many=True, context=self.context).data
         if obj.subcategories.exists():
             return RecursiveCategorySerializer(obj.subcategories.all(), many=True).data
         return []
+
+
+def serialize_category_tree():
+    """Top-level categories with nested subcategories, built from one query."""
+    children = Category.objects.children_map()
+    roots = sorted(children.get(None, []), key=lambda c: c.name)
+    return RecursiveCategorySerializer(roots, many=True, context={'category_children': children}).data
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import Product, ProductVariant
+
+
+# Keep Product.min_price/max_price/total_stock/in_stock in step with the
+# variants. The refresh is a single UPDATE in the same transaction, so a
+# rolled back variant change never leaves the summary behind.
+
+def _on_variant_change(sender, instance, **kwargs):
+    product_ids = {instance.product_id}
+    # A variant moved to another product changes both summaries
+    previous = getattr(instance, "_loaded_product_id", None)
+    if previous:
+        product_ids.add(previous)
+    Product.objects.filter(pk__in=product_ids).refresh_summaries()
+    # The saved product is the one the next move leaves
+    instance._loaded_product_id = instance.product_id
+
+
+def _on_product_save(sender, instance, created, **kwargs):
+    # Variants without a price_override follow the product price
+    if not created:
+        Product.objects.filter(pk=instance.pk).refresh_summaries()
+
+
+def connect_summary_updates():
+    post_save.connect(_on_variant_change, sender=ProductVariant, dispatch_uid="product-summary:variant-save")
+    post_delete.connect(_on_variant_change, sender=ProductVariant, dispatch_uid="product-summary:variant-delete")
+    post_save.connect(_on_product_save, sender=Product, dispatch_uid="product-summary:product-save")
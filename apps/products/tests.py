@@ -1,3 +1,354 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .catalog_io import CatalogImporter, export_catalog
+from .models import Category, Product, ProductImage, ProductVariant, Attribute, AttributeValue, ProductVariantValue
+
+
+def make_catalog(count, category=None, start=0):
+    parent = Category.objects.get_or_create(name="Bedding")[0]
+    category = category or Category.objects.get_or_create(name="Sheets", defaults={"parent": parent})[0]
+    size = Attribute.objects.get_or_create(name="Size")[0]
+    color = Attribute.objects.get_or_create(name="Color")[0]
+    large = AttributeValue.objects.get_or_create(attribute=size, value="Large")[0]
+    red = AttributeValue.objects.get_or_create(attribute=color, value="Red")[0]
+
+    products = []
+    for i in range(start, start + count):
+        product = Product.objects.create(name=f"Product {i}", category=category, price=Decimal("100.00") + i)
+        ProductImage.objects.create(product=product, image=f"products/images/{i}.jpg")
+        for n in range(2):
+            variant = ProductVariant.objects.create(product=product, sku=f"SKU-{i}-{n}", stock=5)
+            ProductVariantValue.objects.create(variant=variant, attribute_value=large)
+            ProductVariantValue.objects.create(variant=variant, attribute_value=red)
+        products.append(product)
+    return products
+
+
+class ProductListQueryBudgetTests(TestCase):
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_is_independent_of_catalog_size(self):
+        make_catalog(3)
+        small, body = self.count_queries("/api/products/")
+        self.assertEqual(len(body["data"]), 3)
+
+        make_catalog(25, start=3)
+        large, body = self.count_queries("/api/products/")
+        self.assertEqual(len(body["data"]), 28)
+        self.assertEqual(small, large)
+
+    def test_paginated_query_count_is_constant_per_page(self):
+        make_catalog(30)
+        first, body = self.count_queries("/api/products/?page_size=10")
+        self.assertEqual(len(body["data"]), 10)
+        cursor = body["pagination"]["next_cursor"]
+        self.assertIsNotNone(cursor)
+
+        second, body = self.count_queries(f"/api/products/?page_size=10&cursor={cursor}")
+        self.assertEqual(first, second)
+
+    def test_cursor_walks_every_product_once(self):
+        products = make_catalog(12)
+        seen, cursor = [], None
+        while True:
+            url = "/api/products/?page_size=5" + (f"&cursor={cursor}" if cursor else "")
+            body = self.client.get(url).json()
+            seen.extend(row["id"] for row in body["data"])
+            cursor = body["pagination"]["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(p.id for p in products))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/products/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductFilterFacetTests(TestCase):
+    def setUp(self):
+        self.bedding = Category.objects.create(name="Bedding")
+        self.sheets = Category.objects.create(name="Sheets", parent=self.bedding)
+        self.towels = Category.objects.create(name="Towels")
+        size = Attribute.objects.create(name="Size")
+        color = Attribute.objects.create(name="Color")
+        self.large = AttributeValue.objects.create(attribute=size, value="Large")
+        self.small = AttributeValue.objects.create(attribute=size, value="Small")
+        self.red = AttributeValue.objects.create(attribute=color, value="Red")
+
+        self.sheet = self.make("Sheet", self.sheets, "50.00", [(self.large, self.red, 3), (self.small, None, 0)])
+        self.towel = self.make("Towel", self.towels, "20.00", [(self.small, self.red, 1)])
+
+    def make(self, name, category, price, variants):
+        product = Product.objects.create(name=name, category=category, price=Decimal(price))
+        for i, (size, color, stock) in enumerate(variants):
+            variant = ProductVariant.objects.create(product=product, sku=f"{name}-{i}", stock=stock)
+            for value in (size, color):
+                if value:
+                    ProductVariantValue.objects.create(variant=variant, attribute_value=value)
+        return product
+
+    def names(self, query):
+        response = self.client.get(f"/api/products/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["name"] for row in response.json()["data"])
+
+    def test_category_filter_includes_descendants(self):
+        self.assertEqual(self.names("category=bedding"), ["Sheet"])
+
+    def test_price_range(self):
+        self.assertEqual(self.names("min_price=10&max_price=30"), ["Towel"])
+
+    def test_attribute_and_stock_must_match_the_same_variant(self):
+        self.assertEqual(self.names(f"attr={self.small.pk}"), ["Sheet", "Towel"])
+        self.assertEqual(self.names(f"attr={self.small.pk}&in_stock=1"), ["Towel"])
+        self.assertEqual(self.names(f"attr={self.large.pk},{self.small.pk}&attr={self.red.pk}"), ["Sheet", "Towel"])
+
+    def test_stock_filter_stays_on_the_product_table(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.names("in_stock=1"), ["Sheet", "Towel"])
+        product_query = next(q["sql"] for q in ctx.captured_queries if "products_product" in q["sql"])
+        self.assertNotIn("products_productvariant", product_query)
+
+    def test_price_bounds_need_a_variant_priced_in_range(self):
+        ProductVariant.objects.filter(sku="Sheet-0").update(price_override=Decimal("10.00"))
+        ProductVariant.objects.filter(sku="Sheet-1").update(price_override=Decimal("100.00"))
+        Product.objects.all().refresh_summaries()
+        self.assertEqual(self.names("min_price=40&max_price=60"), [])
+        self.assertEqual(self.names("min_price=90"), ["Sheet"])
+        self.assertEqual(self.names("min_price=90&in_stock=1"), [])
+
+        data = self.client.get("/api/products/facets/?min_price=90").json()["data"]
+        counts = {v["value"]: v["count"] for a in data["attributes"] for v in a["values"]}
+        self.assertEqual(counts, {"Small": 1})
+
+    def test_facet_counts_skip_variants_that_did_not_match(self):
+        data = self.client.get("/api/products/facets/?in_stock=1").json()["data"]
+        counts = {v["value"]: v["count"] for a in data["attributes"] for v in a["values"]}
+        # The Sheet's Small variant is sold out
+        self.assertEqual(counts, {"Large": 1, "Small": 1, "Red": 2})
+
+    def test_facet_counts_come_from_one_grouped_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/products/facets/")
+        data = response.json()["data"]
+        counts = {v["value"]: v["count"] for a in data["attributes"] for v in a["values"]}
+        self.assertEqual(counts, {"Large": 1, "Small": 2, "Red": 2})
+        self.assertEqual(data["total"], 2)
+
+    def test_facet_counts_ignore_their_own_selection(self):
+        response = self.client.get(f"/api/products/facets/?attr={self.large.pk}")
+        data = response.json()["data"]
+        counts = {v["value"]: v["count"] for a in data["attributes"] for v in a["values"]}
+        # Size is counted as if nothing were picked; Color within the Large products
+        self.assertEqual(counts, {"Large": 1, "Small": 2, "Red": 1})
+        self.assertEqual(data["total"], 1)
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.home = Category.objects.create(name="Home")
+        self.bedding = Category.objects.create(name="Bedding", parent=self.home)
+        self.sheets = Category.objects.create(name="Sheets", parent=self.bedding)
+        self.bath = Category.objects.create(name="Bath")
+
+    def test_paths_follow_ancestry(self):
+        self.sheets.refresh_from_db()
+        self.assertEqual(self.sheets.path, f"{self.home.pk}/{self.bedding.pk}/{self.sheets.pk}/")
+        self.assertEqual(self.sheets.depth, 2)
+
+    def test_moving_a_category_reroots_its_descendants(self):
+        self.bedding.parent = self.bath
+        self.bedding.save()
+        self.sheets.refresh_from_db()
+        self.assertEqual(self.sheets.path, f"{self.bath.pk}/{self.bedding.pk}/{self.sheets.pk}/")
+        self.assertEqual(
+            set(Category.objects.subtree(self.bath).values_list("name", flat=True)),
+            {"Bath", "Bedding", "Sheets"},
+        )
+
+    def test_cannot_move_under_own_descendant(self):
+        self.home.parent = self.sheets
+        with self.assertRaises(ValueError):
+            self.home.save()
+
+    def test_category_tree_is_built_from_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/categories/")
+        data = response.json()["data"]
+        self.assertEqual([c["name"] for c in data], ["Bath", "Home"])
+        self.assertEqual(data[1]["subcategories"][0]["subcategories"][0]["name"], "Sheets")
+
+
+class CatalogImportExportTests(TestCase):
+    def setUp(self):
+        self.products = make_catalog(3)
+
+    def export(self, fmt):
+        stream = io.StringIO()
+        export_catalog(stream, fmt)
+        return stream.getvalue()
+
+    def test_round_trip_is_a_no_op(self):
+        for fmt in ("csv", "jsonl"):
+            stats = CatalogImporter().run(io.StringIO(self.export(fmt)), fmt)
+            self.assertEqual(stats["products_unchanged"], 3)
+            self.assertEqual(stats["variants_unchanged"], 6)
+            self.assertEqual(stats["variant_values_changed"], 0)
+            self.assertEqual(stats["errors"], 0)
+
+    def test_upserts_by_slug_and_sku(self):
+        lines = [json.loads(line) for line in self.export("jsonl").splitlines()]
+        lines[0]["price"] = "9.99"
+        lines[0]["variants"][0].update(stock=0, attributes={"Size": "Small"})
+        lines.append({
+            "slug": "new-sheet", "name": "New Sheet", "category": "sheets", "price": "20",
+            "variants": [{"sku": "NEW-1", "stock": 4, "attributes": {"Color": "Red"}}],
+        })
+        stats = CatalogImporter(batch_size=2).run(io.StringIO("\n".join(map(json.dumps, lines))), "jsonl")
+
+        self.assertEqual((stats["products_created"], stats["products_updated"]), (1, 1))
+        self.assertEqual((stats["variants_created"], stats["variants_updated"]), (1, 1))
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].price, Decimal("9.99"))
+        variant = ProductVariant.objects.get(sku="SKU-0-0")
+        self.assertEqual(variant.stock, 0)
+        self.assertEqual(
+            sorted(str(vv.attribute_value) for vv in variant.variant_values.all()), ["Size: Small"]
+        )
+        new = ProductVariant.objects.get(sku="NEW-1")
+        self.assertEqual(new.product.slug, "new-sheet")
+
+    def test_batch_query_count_does_not_grow_with_batch_size(self):
+        def import_queries(count, start):
+            feed = "\n".join(json.dumps({
+                "slug": f"bulk-{i}", "name": f"Bulk {i}", "category": "sheets", "price": "5",
+                "variants": [{"sku": f"BULK-{i}", "stock": 1}],
+            }) for i in range(start, start + count))
+            with CaptureQueriesContext(connection) as ctx:
+                CatalogImporter(batch_size=1000).run(io.StringIO(feed), "jsonl")
+            return len(ctx.captured_queries)
+
+        self.assertEqual(import_queries(5, 0), import_queries(50, 100))
+
+    def test_moving_a_sku_refreshes_the_product_it_left(self):
+        first, second = self.products[:2]
+        feed = json.dumps({"slug": second.slug, "variants": [{"sku": "SKU-0-0"}]})
+        stats = CatalogImporter().run(io.StringIO(feed), "jsonl")
+        self.assertEqual(stats["variants_updated"], 1)
+        moved = ProductVariant.objects.get(sku="SKU-0-0")
+        self.assertEqual(moved.product_id, second.pk)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.total_stock, second.total_stock), (5, 15))
+
+    def test_dry_run_reports_without_saving(self):
+        path = self.tmp_file(self.export("csv").replace("SKU-1-0,5,", "SKU-1-0,7,"))
+        out = io.StringIO()
+        call_command("catalog_import", path, "--dry-run", stdout=out, stderr=io.StringIO())
+        self.assertIn("~ variant SKU-1-0: stock 5 -> 7", out.getvalue())
+        self.assertIn("[dry run]", out.getvalue())
+        self.assertEqual(ProductVariant.objects.get(sku="SKU-1-0").stock, 5)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        feed = io.StringIO('{"slug": "x", "name": "X", "category": "nope", "price": "1"}\nnot json\n')
+        importer = CatalogImporter()
+        stats = importer.run(feed, "jsonl")
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual([line for line, _ in importer.errors], [1, 2])
+        self.assertFalse(Product.objects.filter(slug="x").exists())
+
+    def tmp_file(self, content):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        handle.write(content)
+        handle.close()
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+
+class ProductSummaryTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Bedding")
+        self.product = Product.objects.create(name="Sheet", category=self.category, price=Decimal("40.00"))
+
+    def summary(self, product=None):
+        product = product or self.product
+        product.refresh_from_db()
+        return product.min_price, product.max_price, product.total_stock, product.in_stock
+
+    def test_follows_variant_changes(self):
+        self.assertEqual(self.summary(), (Decimal("40"), Decimal("40"), 0, False))
+        cheap = ProductVariant.objects.create(product=self.product, sku="S-1", stock=0, price_override=Decimal("30"))
+        ProductVariant.objects.create(product=self.product, sku="S-2", stock=4)
+        self.assertEqual(self.summary(), (Decimal("30"), Decimal("40"), 4, True))
+
+        cheap.stock = 2
+        cheap.save()
+        self.assertEqual(self.summary()[2:], (6, True))
+
+        self.product.price = Decimal("45.00")
+        self.product.save()
+        self.assertEqual(self.summary()[:2], (Decimal("30"), Decimal("45")))
+
+        cheap.delete()
+        self.assertEqual(self.summary(), (Decimal("45"), Decimal("45"), 4, True))
+
+    def test_moving_a_variant_refreshes_both_products(self):
+        other = Product.objects.create(name="Towel", category=self.category, price=Decimal("10.00"))
+        variant = ProductVariant.objects.create(product=self.product, sku="S-1", stock=3)
+        variant = ProductVariant.objects.get(pk=variant.pk)
+        variant.product = other
+        variant.save()
+        self.assertEqual(self.summary()[2:], (0, False))
+        self.assertEqual(self.summary(other)[2:], (3, True))
+
+    def test_moving_the_same_instance_twice(self):
+        towel = Product.objects.create(name="Towel", category=self.category, price=Decimal("10.00"))
+        robe = Product.objects.create(name="Robe", category=self.category, price=Decimal("90.00"))
+        variant = ProductVariant.objects.create(product=self.product, sku="S-1", stock=3)
+        variant.product = towel
+        variant.save()
+        variant.product = robe
+        variant.save()
+        self.assertEqual(self.summary()[2:], (0, False))
+        self.assertEqual(self.summary(towel), (Decimal("10"), Decimal("10"), 0, False))
+        self.assertEqual(self.summary(robe)[2:], (3, True))
+
+    def test_effective_price(self):
+        variant = ProductVariant.objects.create(product=self.product, sku="S-1", price_override=Decimal("0"))
+        self.assertEqual(variant.effective_price, Decimal("0"))
+        variant.price_override = None
+        self.assertEqual(variant.effective_price, Decimal("40.00"))
+
+    def test_price_ordering_pages_through_summaries(self):
+        for price in ("5", "25", "15"):
+            Product.objects.create(name=f"P{price}", category=self.category, price=Decimal(price))
+        response = self.client.get("/api/products/?ordering=-price&page_size=2")
+        body = response.json()
+        self.assertEqual([p["name"] for p in body["data"]], ["Sheet", "P25"])
+        response = self.client.get(f"/api/products/?ordering=-price&page_size=2&cursor={body['pagination']['next_cursor']}")
+        self.assertEqual([p["name"] for p in response.json()["data"]], ["P15", "P5"])
+        self.assertEqual(self.client.get("/api/products/?ordering=name").status_code, 400)
 
-# Create your tests here.
+    def test_reconcile_fixes_drift(self):
+        ProductVariant.objects.create(product=self.product, sku="S-1", stock=3)
+        Product.objects.filter(pk=self.product.pk).update(total_stock=99, in_stock=False)
+        out = io.StringIO()
+        call_command("reconcile_product_summaries", "--dry-run", stdout=out)
+        self.assertIn("1 would be fixed", out.getvalue())
+        self.assertEqual(self.summary()[2], 99)
+        call_command("reconcile_product_summaries", stdout=out)
+        self.assertEqual(self.summary()[2:], (3, True))
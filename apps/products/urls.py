@@ -1,12 +1,13 @@
 from django.urls import path
 from .views import (
-    ProductListAPIView, ProductDetailAPIView,
+    ProductListAPIView, ProductDetailAPIView, ProductFacetAPIView,
     FeaturedProductListAPIView, CategoryListAPIView, CategoryDetailAPIView
 )
 
 urlpatterns = [
     path('products/', ProductListAPIView.as_view(), name='product-list'),
     path('products/featured/', FeaturedProductListAPIView.as_view(), name='product-featured'),
+    path('products/facets/', ProductFacetAPIView.as_view(), name='product-facets'),
     path('products/<slug:slug>/', ProductDetailAPIView.as_view(), name='product-detail'),
 
     path('categories/', CategoryListAPIView.as_view(), name='category-list'),
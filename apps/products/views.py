@@ -1,14 +1,43 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from apps.core.cache import cached_response
+from apps.core.conditional import conditional_get, latest_update
+from apps.core.pagination import KeysetPaginator, InvalidCursor
+from apps.products.filters import FilterError, filter_products, product_facets
 from apps.products.models import Product, Category
-from apps.products.serializers import ProductSerializer, CategorySerializer, RecursiveCategorySerializer
+from apps.products.serializers import ProductSerializer, CategorySerializer, serialize_category_tree
 
 
 class ProductListAPIView(APIView):
+    # ?ordering=; price sorts use the denormalized Product.min_price (indexed)
+    paginators = {
+        'newest': KeysetPaginator(ordering=('-created_at', 'id')),
+        'price': KeysetPaginator(ordering=('min_price', 'id')),
+        '-price': KeysetPaginator(ordering=('-min_price', '-id')),
+    }
+
+    @conditional_get('catalog', last_modified=latest_update(Product))
+    @cached_response('catalog')
     def get(self, request):
         try:
-            products = Product.objects.all().order_by('-created_at')
+            paginator = self.paginators.get(request.query_params.get('ordering') or 'newest')
+            if paginator is None:
+                raise FilterError(f"ordering must be one of: {', '.join(self.paginators)}")
+            products = filter_products(Product.objects.for_listing(), request.query_params)
+            products = products.order_by(*paginator.ordering)
+
+            # Cursor mode is opt-in so existing clients keep receiving the full list
+            if 'cursor' in request.query_params or 'page_size' in request.query_params:
+                page = paginator.paginate_request(products, request)
+                return Response({
+                    "code": status.HTTP_200_OK,
+                    "success": True,
+                    "message": "Product list fetched successfully",
+                    "data": ProductSerializer(page.items, many=True).data,
+                    "pagination": page.meta()
+                }, status=status.HTTP_200_OK)
+
             serializer = ProductSerializer(products, many=True)
             response = {
                 "code": status.HTTP_200_OK,
@@ -17,6 +46,12 @@ class ProductListAPIView(APIView):
                 "data": serializer.data
             }
             return Response(response, status=status.HTTP_200_OK)
+        except (InvalidCursor, FilterError) as e:
+            return Response({
+                "code": status.HTTP_400_BAD_REQUEST,
+                "success": False,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,10 +60,37 @@ class ProductListAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class ProductFacetAPIView(APIView):
+    @conditional_get('catalog', last_modified=latest_update(Product))
+    @cached_response('catalog')
+    def get(self, request):
+        try:
+            return Response({
+                "code": status.HTTP_200_OK,
+                "success": True,
+                "message": "Product facets fetched successfully",
+                "data": product_facets(Product.objects.all(), request.query_params)
+            }, status=status.HTTP_200_OK)
+        except FilterError as e:
+            return Response({
+                "code": status.HTTP_400_BAD_REQUEST,
+                "success": False,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "success": False,
+                "message": f"Error fetching product facets: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class ProductDetailAPIView(APIView):
+    @conditional_get('catalog', last_modified=latest_update(Product))
+    @cached_response('catalog')
     def get(self, request, slug):
         try:
-            product = Product.objects.get(slug=slug)
+            product = Product.objects.for_listing().get(slug=slug)
             serializer = ProductSerializer(product)
             response = {
                 "code": status.HTTP_200_OK,
@@ -52,9 +114,11 @@ class ProductDetailAPIView(APIView):
 
 
 class FeaturedProductListAPIView(APIView):
+    @conditional_get('catalog', last_modified=latest_update(Product))
+    @cached_response('catalog')
     def get(self, request):
         try:
-            products = Product.objects.filter(is_featured=True)
+            products = Product.objects.for_listing().filter(is_featured=True)
             serializer = ProductSerializer(products, many=True)
             response = {
                 "code": status.HTTP_200_OK,
@@ -71,15 +135,15 @@ class FeaturedProductListAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class CategoryListAPIView(APIView):
+    @conditional_get('catalog', last_modified=latest_update(Category))
+    @cached_response('catalog')
     def get(self, request):
         try:
-            categories = Category.objects.filter(parent__isnull=True).order_by('name')  # Only top-level
-            serializer = RecursiveCategorySerializer(categories, many=True)
             return Response({
                 "code": 200,
                 "success": True,
                 "message": "Category list fetched successfully",
-                "data": serializer.data
+                "data": serialize_category_tree()
             }, status=200)
         except Exception as e:
             return Response({
@@ -91,9 +155,11 @@ class CategoryListAPIView(APIView):
 
 
 class CategoryDetailAPIView(APIView):
+    @conditional_get('catalog', last_modified=latest_update(Category))
+    @cached_response('catalog')
     def get(self, request, slug):
         try:
-            category = Category.objects.get(slug=slug)
+            category = Category.objects.prefetch_related('subcategories').get(slug=slug)
             serializer = CategorySerializer(category)
             response = {
                 "code": status.HTTP_200_OK,
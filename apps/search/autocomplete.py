@@ -0,0 +1,283 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Sum
+
+from apps.core.background import submit
+from apps.core.cache import bump_group, group_versions
+from apps.orders.models import OrderItem
+from apps.products.models import Category, Product, ProductVariant
+
+from .backends import tokenize
+
+# Prefixes up to this length match too many keys to scan per lookup; their
+# best TOP_N entries are ranked ahead of time instead
+TOP_PREFIX_LEN = 2
+TOP_N = 50
+
+
+def _normalize(text):
+    return " ".join(tokenize(text))
+
+
+def _keys_for(label):
+    """Every word-start suffix, so "cot" and "bed" both hit "Luxury Cotton Bedsheet"."""
+    words = _normalize(label).split()
+    return tuple(" ".join(words[i:]) for i in range(len(words)))
+
+
+def _short_prefixes(key):
+    return {key[:n] for n in range(1, min(TOP_PREFIX_LEN, len(key)) + 1)}
+
+
+# Bumped only by bulk writes that send no save signals (catalog_import).
+# Not the "catalog" group: every product save and sell-out moves that one,
+# which would rebuild the whole index under ordinary write traffic.
+INDEX_GROUP = "suggestions"
+
+
+def index_version():
+    # Shared by every worker (with a shared cache backend)
+    return group_versions([INDEX_GROUP])[0]
+
+
+def invalidate_suggestions():
+    """Have every worker rebuild its index, after writes that bypass signals."""
+    bump_group(INDEX_GROUP)
+
+
+class SuggestionIndex:
+    """
+    In-process sorted-array prefix index over product names, category names
+    and SKUs. Lookups are a binary search plus a scan of the matching keys;
+    one- and two-letter prefixes read a pre-ranked list. Ranking uses units
+    sold (OrderItem quantities).
+
+    Signals keep the index current for edits made in this process. It is
+    rebuilt in the background after a bulk write (invalidate_suggestions)
+    and every AUTOCOMPLETE_REBUILD_TTL, which is how edits made by other
+    workers arrive. Until the first build is done, lookups go to the
+    database.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Held while a background rebuild/refresh runs: at most one at a time
+        self._refresh_lock = threading.Lock()
+        self._keys = []       # sorted normalized keys
+        self._owners = []     # entry id for the key at the same position
+        self._entries = {}    # entry id -> (label, slug, keys)
+        self._tops = {}       # short prefix -> best TOP_N entry ids, ranked
+        self._product_skus = {}
+        self._popularity = {}
+        self._popularity_at = 0.0
+        self._version = None
+        self._built_at = 0.0
+        self.loaded = False
+
+    # ---- building
+
+    def rebuild(self):
+        version = index_version()
+        entries = {}
+        product_skus = {}
+        for pk, name, slug in Product.objects.values_list("pk", "name", "slug").iterator(chunk_size=2000):
+            entries[("product", pk)] = (name, slug)
+        for pk, name, slug in Category.objects.values_list("pk", "name", "slug"):
+            entries[("category", pk)] = (name, slug)
+        for pk, sku, product_id, slug in (
+            ProductVariant.objects.values_list("pk", "sku", "product_id", "product__slug").iterator(chunk_size=2000)
+        ):
+            entries[("sku", pk)] = (sku, slug)
+            product_skus.setdefault(product_id, set()).add(pk)
+
+        pairs = []
+        stored = {}
+        for entry_id, (label, slug) in entries.items():
+            keys = _keys_for(label)
+            stored[entry_id] = (label, slug, keys)
+            pairs.extend((key, entry_id) for key in keys)
+        pairs.sort()
+
+        popularity = self._load_popularity()
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._owners = [entry_id for _, entry_id in pairs]
+            self._entries = stored
+            self._product_skus = product_skus
+            self._popularity = popularity
+            self._popularity_at = self._built_at = time.monotonic()
+            self._version = version
+            self._rank_tops()
+            self.loaded = True
+
+    @staticmethod
+    def _load_popularity():
+        popularity = {}
+        sold = OrderItem.objects.values("product_variant_id", "product_variant__product_id",
+                                        "product_variant__product__category_id").annotate(qty=Sum("quantity"))
+        for row in sold:
+            qty = row["qty"] or 0
+            for key in (("sku", row["product_variant_id"]),
+                        ("product", row["product_variant__product_id"]),
+                        ("category", row["product_variant__product__category_id"])):
+                popularity[key] = popularity.get(key, 0) + qty
+        return popularity
+
+    def _rank(self, entry_id):
+        label = self._entries[entry_id][0]
+        return (-self._popularity.get(entry_id, 0), len(label), label)
+
+    def _rank_tops(self):
+        # Called with the lock held, after the keys or popularity change
+        matches = {}
+        for key, owner in zip(self._keys, self._owners):
+            for prefix in _short_prefixes(key):
+                matches.setdefault(prefix, set()).add(owner)
+        self._tops = {prefix: heapq.nsmallest(TOP_N, owners, key=self._rank) for prefix, owners in matches.items()}
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        rebuild = (
+            not self.loaded
+            or self._version != index_version()
+            or now - self._built_at >= getattr(settings, "AUTOCOMPLETE_REBUILD_TTL", 60 * 60)
+        )
+        if not rebuild and now - self._popularity_at < getattr(settings, "AUTOCOMPLETE_POPULARITY_TTL", 15 * 60):
+            return
+        if self._refresh_lock.acquire(blocking=False):
+            submit(self._refresh, rebuild)
+
+    def _refresh(self, rebuild):
+        try:
+            if rebuild:
+                self.rebuild()
+            else:
+                popularity = self._load_popularity()
+                with self._lock:
+                    self._popularity = popularity
+                    self._popularity_at = time.monotonic()
+                    self._rank_tops()
+        finally:
+            self._refresh_lock.release()
+
+    # ---- incremental updates
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if not entry:
+            return
+        for key in entry[2]:
+            for prefix in _short_prefixes(key):
+                top = self._tops.get(prefix)
+                if top and entry_id in top:
+                    top.remove(entry_id)
+            i = bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                if self._owners[i] == entry_id:
+                    del self._keys[i]
+                    del self._owners[i]
+                    break
+                i += 1
+
+    def _put(self, entry_id, label, slug):
+        self._remove(entry_id)
+        keys = _keys_for(label)
+        self._entries[entry_id] = (label, slug, keys)
+        for key in keys:
+            i = bisect_left(self._keys, key)
+            self._keys.insert(i, key)
+            self._owners.insert(i, entry_id)
+            for prefix in _short_prefixes(key):
+                top = self._tops.setdefault(prefix, [])
+                if entry_id not in top:
+                    top.append(entry_id)
+                    top.sort(key=self._rank)
+                    del top[TOP_N:]
+
+    def upsert_product(self, pk, name, slug, skus=()):
+        with self._lock:
+            self._put(("product", pk), name, slug)
+            # SKU suggestions link to the product page, keep their slug current
+            for variant_pk, sku in skus:
+                self._put(("sku", variant_pk), sku, slug)
+                self._product_skus.setdefault(pk, set()).add(variant_pk)
+
+    def remove_product(self, pk):
+        with self._lock:
+            self._remove(("product", pk))
+            for variant_pk in self._product_skus.pop(pk, ()):
+                self._remove(("sku", variant_pk))
+
+    def upsert_category(self, pk, name, slug):
+        with self._lock:
+            self._put(("category", pk), name, slug)
+
+    def remove_category(self, pk):
+        with self._lock:
+            self._remove(("category", pk))
+
+    def upsert_sku(self, pk, sku, product_id, product_slug):
+        with self._lock:
+            self._put(("sku", pk), sku, product_slug)
+            self._product_skus.setdefault(product_id, set()).add(pk)
+
+    def remove_sku(self, pk, product_id):
+        with self._lock:
+            self._remove(("sku", pk))
+            self._product_skus.get(product_id, set()).discard(pk)
+
+    # ---- lookup
+
+    def suggest(self, query, limit=8):
+        prefix = _normalize(query)
+        if not prefix:
+            return []
+        self._maybe_refresh()
+        if not self.loaded:
+            return self._suggest_from_db(prefix, limit)
+
+        with self._lock:
+            if len(prefix) <= TOP_PREFIX_LEN:
+                ranked = self._tops.get(prefix, [])[:limit]
+            else:
+                start = bisect_left(self._keys, prefix)
+                candidates = set()
+                for i in range(start, len(self._keys)):
+                    if not self._keys[i].startswith(prefix):
+                        break
+                    candidates.add(self._owners[i])
+                ranked = heapq.nsmallest(limit, candidates, key=self._rank)
+            return [self._suggestion(entry_id) for entry_id in ranked]
+
+    def _suggestion(self, entry_id):
+        kind, pk = entry_id
+        label, slug, _ = self._entries[entry_id]
+        return {"type": kind, "id": pk, "label": label, "slug": slug}
+
+    @staticmethod
+    def _suggest_from_db(prefix, limit):
+        """Plain name/SKU prefix matches while the index is still being built."""
+        found = [
+            ("product", pk, name, slug)
+            for pk, name, slug in Product.objects.filter(name__istartswith=prefix)
+            .order_by("name").values_list("pk", "name", "slug")[:limit]
+        ]
+        found += [
+            ("category", pk, name, slug)
+            for pk, name, slug in Category.objects.filter(name__istartswith=prefix)
+            .order_by("name").values_list("pk", "name", "slug")[:limit]
+        ]
+        found += [
+            ("sku", pk, sku, slug)
+            for pk, sku, slug in ProductVariant.objects.filter(sku__istartswith=prefix)
+            .order_by("sku").values_list("pk", "sku", "product__slug")[:limit]
+        ]
+        found.sort(key=lambda row: (len(row[2]), row[2]))
+        return [{"type": kind, "id": pk, "label": label, "slug": slug} for kind, pk, label, slug in found[:limit]]
+
+
+suggestions = SuggestionIndex()
@@ -0,0 +1,236 @@
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections
+
+from .documents import KIND_CODES, KIND_SLOTS, all_documents, split_doc_id
+
+FTS_TABLE = "search_index"
+TITLE_WEIGHT = 5
+MAX_PREFIX_EXPANSIONS = 64
+
+_word_re = re.compile(r"\w+")
+
+
+def tokenize(text):
+    # Mirrors FTS5's unicode61 tokenizer with remove_diacritics
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _word_re.findall(text.lower())
+
+
+class SearchHit:
+    __slots__ = ("kind", "object_id", "score")
+
+    def __init__(self, kind, object_id, score):
+        self.kind = kind
+        self.object_id = object_id
+        self.score = score
+
+
+class FTS5Backend:
+    """SQLite FTS5 table created by the search app's migration."""
+    name = "fts5"
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    @staticmethod
+    def available(using="default"):
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            return cursor.fetchone() is not None
+
+    def index(self, documents):
+        rows = [(doc.rowid, doc.title, doc.body) for doc in documents]
+        if not rows:
+            return
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)", rows)
+
+    def remove(self, rowids):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(rowid,) for rowid in rowids])
+
+    def clear(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, kinds=None, limit=20, prefix=True):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        expression = " ".join(f'"{term}"' for term in terms)
+        if prefix:
+            expression += "*"
+
+        sql = f"SELECT rowid, bm25({FTS_TABLE}, %s, 1.0) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        params = [float(TITLE_WEIGHT), expression]
+        if kinds:
+            codes = [KIND_CODES[kind] for kind in kinds]
+            sql += f" AND (rowid %% {KIND_SLOTS}) IN ({', '.join(['%s'] * len(codes))})"
+            params.extend(codes)
+        sql += " ORDER BY 2 LIMIT %s"
+        params.append(limit)
+
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # bm25() is "lower is better"; flip it so scores read naturally
+        return [SearchHit(*split_doc_id(rowid), -score) for rowid, score in rows]
+
+
+class MemoryBackend:
+    """
+    Pure-Python inverted index kept in process memory, for databases without
+    FTS5. Ranked with BM25 over title-weighted term frequencies; a sorted
+    vocabulary gives prefix expansion by binary search.
+    """
+    name = "memory"
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)  # term -> {rowid: weighted tf}
+        self._lengths = {}                  # rowid -> weighted length
+        self._doc_terms = {}                # rowid -> terms, for removal
+        self._vocab = []
+        self._vocab_dirty = False
+        self._total_length = 0
+        self.loaded = False
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.index(all_documents())
+                    self.loaded = True
+
+    def index(self, documents):
+        with self._lock:
+            for doc in documents:
+                rowid = doc.rowid
+                self._remove(rowid)
+                weights = Counter()
+                for term in tokenize(doc.title):
+                    weights[term] += TITLE_WEIGHT
+                for term in tokenize(doc.body):
+                    weights[term] += 1
+                for term, weight in weights.items():
+                    if term not in self._postings:
+                        self._vocab_dirty = True
+                    self._postings[term][rowid] = weight
+                length = sum(weights.values())
+                self._lengths[rowid] = length
+                self._total_length += length
+                self._doc_terms[rowid] = tuple(weights)
+
+    def remove(self, rowids):
+        with self._lock:
+            for rowid in rowids:
+                self._remove(rowid)
+
+    def _remove(self, rowid):
+        for term in self._doc_terms.pop(rowid, ()):
+            postings = self._postings[term]
+            postings.pop(rowid, None)
+            if not postings:
+                del self._postings[term]
+                self._vocab_dirty = True
+        self._total_length -= self._lengths.pop(rowid, 0)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _expand(self, prefix):
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        start = bisect_left(self._vocab, prefix)
+        terms = []
+        for term in self._vocab[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        if len(terms) > MAX_PREFIX_EXPANSIONS:
+            terms.sort(key=lambda t: len(self._postings[t]), reverse=True)
+            terms = terms[:MAX_PREFIX_EXPANSIONS]
+        return terms
+
+    def search(self, query, kinds=None, limit=20, prefix=True):
+        self.ensure_loaded()
+        terms = tokenize(query)
+        if not terms:
+            return []
+        codes = {KIND_CODES[kind] for kind in kinds} if kinds else None
+
+        with self._lock:
+            doc_count = len(self._lengths) or 1
+            avg_length = (self._total_length / doc_count) or 1
+            groups = [[term] for term in terms]
+            if prefix:
+                groups[-1] = self._expand(terms[-1])
+            # Rarest terms first so the candidate set shrinks as early as possible
+            groups.sort(key=lambda group: sum(len(self._postings.get(t, ())) for t in group))
+
+            scores = None
+            for group in groups:
+                # every query term (or one of its prefix expansions) must match
+                group_scores = defaultdict(float)
+                for term in group:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for rowid, tf in postings.items():
+                        if scores is not None and rowid not in scores:
+                            continue
+                        norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[rowid] / avg_length)
+                        group_scores[rowid] += idf * tf * (self.k1 + 1) / norm
+                if scores is None:
+                    scores = group_scores
+                else:
+                    scores = {rowid: scores[rowid] + s for rowid, s in group_scores.items()}
+                if not scores:
+                    return []
+
+        if codes is not None:
+            scores = {rowid: s for rowid, s in scores.items() if rowid % KIND_SLOTS in codes}
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [SearchHit(*split_doc_id(rowid), score) for rowid, score in ranked]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                choice = getattr(settings, "SEARCH_BACKEND", "auto")
+                if choice == "fts5" or (choice == "auto" and FTS5Backend.available()):
+                    _backend = FTS5Backend()
+                else:
+                    _backend = MemoryBackend()
+    return _backend
+
+
+def reset_backend():
+    global _backend
+    _backend = None
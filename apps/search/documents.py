@@ -0,0 +1,54 @@
+from django.db.models import Prefetch
+
+from apps.cms.models import BlogPost
+from apps.products.models import Product, ProductVariant
+
+# Documents of all kinds share one index; the kind is folded into the rowid
+# (object_id * KIND_SLOTS + code) so a document can be replaced or removed by key.
+KIND_CODES = {"product": 1, "blog": 2}
+KIND_NAMES = {code: name for name, code in KIND_CODES.items()}
+KIND_SLOTS = 4
+
+
+def doc_id(kind, object_id):
+    return object_id * KIND_SLOTS + KIND_CODES[kind]
+
+
+def split_doc_id(rowid):
+    return KIND_NAMES[rowid % KIND_SLOTS], rowid // KIND_SLOTS
+
+
+class Document:
+    __slots__ = ("kind", "object_id", "title", "body")
+
+    def __init__(self, kind, object_id, title, body):
+        self.kind = kind
+        self.object_id = object_id
+        self.title = title
+        self.body = body
+
+    @property
+    def rowid(self):
+        return doc_id(self.kind, self.object_id)
+
+
+def product_documents(queryset=None):
+    queryset = Product.objects.all() if queryset is None else queryset
+    queryset = queryset.select_related("category").prefetch_related(
+        Prefetch("variants", queryset=ProductVariant.objects.only("id", "product_id", "sku"))
+    )
+    for product in queryset.iterator(chunk_size=1000):
+        skus = " ".join(v.sku for v in product.variants.all())
+        body = " ".join(filter(None, [product.description, product.category.name, skus]))
+        yield Document("product", product.pk, product.name, body)
+
+
+def blog_documents(queryset=None):
+    queryset = BlogPost.objects.all() if queryset is None else queryset
+    for post in queryset.only("id", "title", "content").iterator(chunk_size=1000):
+        yield Document("blog", post.pk, post.title, post.content)
+
+
+def all_documents():
+    yield from product_documents()
+    yield from blog_documents()
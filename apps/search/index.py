@@ -0,0 +1,53 @@
+from apps.cms.models import BlogPost
+from apps.products.models import Product
+
+from .backends import get_backend
+from .documents import all_documents, blog_documents, doc_id, product_documents
+
+BATCH_SIZE = 1000
+
+
+def _batched(iterable, size=BATCH_SIZE):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def refresh_products(product_ids):
+    """Re-index the given products; ids that no longer exist are removed."""
+    product_ids = set(product_ids)
+    backend = get_backend()
+    docs = list(product_documents(Product.objects.filter(pk__in=product_ids)))
+    backend.index(docs)
+    missing = product_ids - {doc.object_id for doc in docs}
+    if missing:
+        backend.remove([doc_id("product", pk) for pk in missing])
+
+
+def refresh_blogs(post_ids):
+    post_ids = set(post_ids)
+    backend = get_backend()
+    docs = list(blog_documents(BlogPost.objects.filter(pk__in=post_ids)))
+    backend.index(docs)
+    missing = post_ids - {doc.object_id for doc in docs}
+    if missing:
+        backend.remove([doc_id("blog", pk) for pk in missing])
+
+
+def rebuild(progress=None):
+    backend = get_backend()
+    backend.clear()
+    total = 0
+    for batch in _batched(all_documents()):
+        backend.index(batch)
+        total += len(batch)
+        if progress:
+            progress(total)
+    if hasattr(backend, "loaded"):
+        backend.loaded = True
+    return total
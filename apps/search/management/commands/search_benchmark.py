@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.search.backends import FTS5Backend, MemoryBackend
+from apps.search.documents import Document
+
+MATERIALS = ["cotton", "linen", "silk", "satin", "bamboo", "microfiber", "flannel", "jersey", "percale", "sateen"]
+ITEMS = ["bedsheet", "pillow", "duvet", "quilt", "blanket", "towel", "curtain", "cushion", "mattress", "throw"]
+ADJECTIVES = ["luxury", "soft", "premium", "classic", "organic", "striped", "floral", "plain", "king", "queen"]
+COLORS = ["white", "grey", "navy", "beige", "blush", "sage", "charcoal", "ivory", "teal", "mustard"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark search query latency against a synthetic catalog (nothing is persisted)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=300)
+        parser.add_argument("--backend", choices=["fts5", "memory", "both"], default="both")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [self._word(rng) for _ in range(5000)]
+        docs = [self._document(rng, i, vocabulary) for i in range(1, options["products"] + 1)]
+        queries = self._queries(rng, vocabulary, options["queries"])
+
+        if options["backend"] in ("fts5", "both"):
+            if FTS5Backend.available():
+                # Runs inside a transaction that is rolled back, so the real index is untouched
+                with transaction.atomic():
+                    backend = FTS5Backend()
+                    backend.clear()
+                    self._run(backend, docs, queries)
+                    transaction.set_rollback(True)
+            else:
+                self.stdout.write(self.style.WARNING("FTS5 is not available on this database, skipping"))
+
+        if options["backend"] in ("memory", "both"):
+            backend = MemoryBackend()
+            backend.loaded = True
+            self._run(backend, docs, queries)
+
+    def _run(self, backend, docs, queries):
+        started = time.perf_counter()
+        for i in range(0, len(docs), 5000):
+            backend.index(docs[i:i + 5000])
+        build = time.perf_counter() - started
+        self.stdout.write(f"\n[{backend.name}] indexed {len(docs)} documents in {build:.2f}s")
+
+        for label, prefix, batch in (("full terms", False, queries), ("prefix/typeahead", True, queries)):
+            timings = []
+            for text in batch:
+                query = text[:max(2, len(text) - 3)] if prefix else text
+                t0 = time.perf_counter()
+                backend.search(query, limit=20, prefix=prefix)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"  {label:<17} p50={statistics.median(timings):.2f}ms "
+                f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms "
+                f"p99={timings[int(len(timings) * 0.99) - 1]:.2f}ms "
+                f"max={timings[-1]:.2f}ms"
+            )
+
+    @staticmethod
+    def _word(rng):
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+
+    @staticmethod
+    def _document(rng, i, vocabulary):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(ITEMS)} {rng.choice(COLORS)}"
+        words = rng.choices(vocabulary, k=rng.randint(20, 40)) + rng.choices(MATERIALS + ITEMS + COLORS, k=5)
+        skus = " ".join(f"SKU-{i}-{n}" for n in range(rng.randint(1, 3)))
+        return Document("product", i, name.title(), f"{' '.join(words)} {rng.choice(ITEMS)} {skus}")
+
+    @staticmethod
+    def _queries(rng, vocabulary, count):
+        queries = []
+        for _ in range(count):
+            shape = rng.random()
+            if shape < 0.4:
+                queries.append(f"{rng.choice(MATERIALS)} {rng.choice(ITEMS)}")
+            elif shape < 0.7:
+                queries.append(rng.choice(ITEMS))
+            elif shape < 0.9:
+                queries.append(rng.choice(vocabulary))
+            else:
+                queries.append(f"{rng.choice(COLORS)} {rng.choice(vocabulary)}")
+        return queries
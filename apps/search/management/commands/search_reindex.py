@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.search.backends import get_backend
+from apps.search.index import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product/blog search index from the database"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        self.stdout.write(f"Rebuilding search index ({backend.name} backend)...")
+        total = rebuild(progress=lambda n: self.stdout.write(f"  indexed {n} documents"))
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} documents"))
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+
+def doc_id(kind, pk):
+    # Frozen copy of apps.search.documents.doc_id
+    return pk * 4 + {'product': 1, 'blog': 2}[kind]
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        options = {row[0] for row in cursor.fetchall()}
+        if 'ENABLE_FTS5' not in options:
+            return
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+        # Index existing rows (same rowid scheme as apps.search.documents)
+        Product = apps.get_model('products', 'Product')
+        ProductVariant = apps.get_model('products', 'ProductVariant')
+        BlogPost = apps.get_model('cms', 'BlogPost')
+        skus = {}
+        for product_id, sku in ProductVariant.objects.values_list('product_id', 'sku'):
+            skus.setdefault(product_id, []).append(sku)
+        rows = []
+        for pk, name, description, category in Product.objects.values_list('pk', 'name', 'description', 'category__name'):
+            body = " ".join(filter(None, [description, category, " ".join(skus.get(pk, []))]))
+            rows.append((doc_id('product', pk), name, body))
+        for pk, title, content in BlogPost.objects.values_list('pk', 'title', 'content'):
+            rows.append((doc_id('blog', pk), title, content))
+        if rows:
+            cursor.executemany("INSERT INTO search_index (rowid, title, body) VALUES (%s, %s, %s)", rows)
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_updated_at_index'),
+        ('cms', '0003_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
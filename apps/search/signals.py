@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from apps.cms.models import BlogPost
+from apps.products.models import Category, Product, ProductVariant
+
+from .autocomplete import suggestions
+from .index import refresh_blogs, refresh_products
+
+
+# Index updates run after commit so a rolled back edit never reaches the
+# index, and the in-memory backend never sees uncommitted rows.
+
+def _on_product_change(sender, instance, **kwargs):
+    pk = instance.pk  # Model.delete() clears instance.pk before on_commit runs
+    transaction.on_commit(lambda: refresh_products([pk]), robust=True)
+    if suggestions.loaded:
+        if kwargs.get("signal") is post_delete:
+            transaction.on_commit(lambda: suggestions.remove_product(pk), robust=True)
+        else:
+            transaction.on_commit(lambda: suggestions.upsert_product(
+                instance.pk, instance.name, instance.slug, instance.variants.values_list("pk", "sku"),
+            ), robust=True)
+
+
+def _on_variant_change(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: refresh_products([product_id]), robust=True)
+    if suggestions.loaded:
+        if kwargs.get("signal") is post_delete:
+            pk = instance.pk
+            transaction.on_commit(lambda: suggestions.remove_sku(pk, product_id), robust=True)
+        else:
+            transaction.on_commit(lambda: suggestions.upsert_sku(
+                instance.pk, instance.sku, instance.product_id, instance.product.slug,
+            ), robust=True)
+
+
+def _on_category_change(sender, instance, **kwargs):
+    if kwargs.get("signal") is post_delete:
+        # products are cascade-deleted and drop out of the index on their own signals
+        if suggestions.loaded:
+            pk = instance.pk
+            transaction.on_commit(lambda: suggestions.remove_category(pk), robust=True)
+        return
+    transaction.on_commit(
+        lambda: refresh_products(Product.objects.filter(category_id=instance.pk).values_list("pk", flat=True)),
+        robust=True,
+    )
+    if suggestions.loaded:
+        transaction.on_commit(
+            lambda: suggestions.upsert_category(instance.pk, instance.name, instance.slug), robust=True,
+        )
+
+
+def _on_blog_change(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: refresh_blogs([pk]), robust=True)
+
+
+def connect_index_updates():
+    receivers = [
+        (Product, _on_product_change),
+        (ProductVariant, _on_variant_change),
+        (Category, _on_category_change),
+        (BlogPost, _on_blog_change),
+    ]
+    for model, receiver in receivers:
+        uid = f"search-index:{model._meta.label}"
+        post_save.connect(receiver, sender=model, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, dispatch_uid=uid)
@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from apps.cms.models import BlogPost
+from apps.core.cache import invalidate_group
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product, ProductVariant
+from . import backends
+from .autocomplete import SuggestionIndex, invalidate_suggestions, suggestions
+from .backends import FTS5Backend, MemoryBackend, get_backend
+from .index import rebuild
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Bedding")
+            self.sheet = Product.objects.create(
+                name="Luxury Cotton Bedsheet", description="Soft twill weave", category=self.category, price=Decimal("50"),
+            )
+            ProductVariant.objects.create(product=self.sheet, sku="LCB-KING", stock=3)
+            self.towel = Product.objects.create(
+                name="Bath Towel", description="Cotton terry", category=Category.objects.create(name="Bath"), price=Decimal("9"),
+            )
+            self.post = BlogPost.objects.create(title="Caring for your sheets", content="Wash cotton bedsheets cold")
+
+    def search(self, query, **params):
+        response = self.client.get("/api/search/", {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(r["type"], r["object"]["id"]) for r in response.json()["data"]]
+
+    def test_uses_fts5_on_sqlite(self):
+        self.assertIsInstance(get_backend(), FTS5Backend)
+
+    def test_title_matches_rank_first(self):
+        results = self.search("cotton", prefix=0)
+        self.assertEqual(results[0], ("product", self.sheet.pk))
+        self.assertIn(("blog", self.post.pk), results)
+        self.assertIn(("product", self.towel.pk), results)
+
+    def test_prefix_sku_category_and_type_filter(self):
+        self.assertEqual(self.search("bedsh", type="product"), [("product", self.sheet.pk)])
+        self.assertEqual(self.search("lcb"), [("product", self.sheet.pk)])
+        self.assertEqual(self.search("bath towel"), [("product", self.towel.pk)])
+
+    def test_index_follows_model_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sheet.name = "Linen Bedsheet"
+            self.sheet.save()
+            self.towel.delete()
+        self.assertEqual(self.search("linen"), [("product", self.sheet.pk)])
+        self.assertEqual(self.search("towel"), [])
+
+    def test_memory_backend_matches_fts5_ranking(self):
+        memory = MemoryBackend()
+        original, backends._backend = backends._backend, memory
+        try:
+            rebuild()
+        finally:
+            backends._backend = original
+        hits = memory.search("cotton", prefix=False)
+        self.assertEqual((hits[0].kind, hits[0].object_id), ("product", self.sheet.pk))
+        self.assertEqual([h.object_id for h in memory.search("bedsh", kinds=["product"])], [self.sheet.pk])
+
+
+@override_settings(BACKGROUND_SYNC=True)
+class SuggestTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Bedding")
+        self.sheet = Product.objects.create(name="Cotton Bedsheet", category=self.category, price=Decimal("50"))
+        self.cover = Product.objects.create(name="Cotton Duvet Cover", category=self.category, price=Decimal("70"))
+        self.variant = ProductVariant.objects.create(product=self.cover, sku="CDC-QUEEN", stock=2)
+        order = Order.objects.create(subtotal_amount=Decimal("140"), total_amount=Decimal("140"), payment_type="COD")
+        OrderItem.objects.create(order=order, product_variant=self.variant, quantity=2, unit_price=Decimal("70"))
+        suggestions.rebuild()
+        self.addCleanup(suggestions.__init__)
+
+    def suggest(self, query):
+        response = self.client.get("/api/search/suggest/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [(s["type"], s["id"]) for s in response.json()["data"]]
+
+    def test_prefix_ranked_by_units_sold_without_queries(self):
+        with self.assertNumQueries(0):
+            results = self.suggest("cot")
+        self.assertEqual(results, [("product", self.cover.pk), ("product", self.sheet.pk)])
+        self.assertEqual(self.suggest("bed"), [("category", self.category.pk), ("product", self.sheet.pk)])
+        self.assertEqual(self.suggest("cdc"), [("sku", self.variant.pk)])
+
+    def test_follows_model_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sheet.name = "Linen Bedsheet"
+            self.sheet.save()
+            self.cover.delete()
+        self.assertEqual(self.suggest("lin"), [("product", self.sheet.pk)])
+        self.assertEqual(self.suggest("cot"), [])
+        self.assertEqual(self.suggest("cdc"), [])
+
+    def test_empty_query(self):
+        self.assertEqual(SuggestionIndex().suggest("  "), [])
+
+    def test_popular_matches_win_on_short_and_long_prefixes(self):
+        for i in range(60):
+            Product.objects.create(name=f"Cotton Aa {i:02}", category=self.category, price=Decimal("5"))
+        zebra = Product.objects.create(name="Cotton Zebra Throw", category=self.category, price=Decimal("5"))
+        variant = ProductVariant.objects.create(product=zebra, sku="CZT", stock=9)
+        order = Order.objects.create(subtotal_amount=Decimal("50"), total_amount=Decimal("50"), payment_type="COD")
+        OrderItem.objects.create(order=order, product_variant=variant, quantity=9, unit_price=Decimal("5"))
+        suggestions.rebuild()
+        self.assertEqual(self.suggest("co")[0], ("product", zebra.pk))
+        self.assertEqual(self.suggest("cott")[0], ("product", zebra.pk))
+
+    def test_rebuilds_after_bulk_writes_only(self):
+        # A bulk write sends no signals; invalidate_suggestions is what other workers see
+        Product.objects.filter(pk=self.sheet.pk).update(name="Woolen Bedsheet")
+        invalidate_group("catalog")  # ordinary catalog traffic does not rebuild
+        self.assertEqual(self.suggest("wool"), [])
+        invalidate_suggestions()
+        self.assertEqual(self.suggest("wool"), [("product", self.sheet.pk)])
+
+    def test_cold_index_answers_from_the_database(self):
+        index = SuggestionIndex()
+        index._refresh_lock.acquire()  # a build is already running
+        self.assertEqual([(s["type"], s["id"]) for s in index.suggest("cdc")], [("sku", self.variant.pk)])
+        self.assertFalse(index.loaded)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import SearchAPIView, SuggestAPIView
+
+urlpatterns = [
+    path('search/', SearchAPIView.as_view(), name='search'),
+    path('search/suggest/', SuggestAPIView.as_view(), name='search-suggest'),
+]
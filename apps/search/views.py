@@ -0,0 +1,94 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from apps.cms.models import BlogPost
+from apps.products.models import Product
+from apps.products.serializers import ProductSerializer
+from .autocomplete import suggestions
+from .backends import get_backend
+from .documents import KIND_CODES
+
+
+class SearchAPIView(APIView):
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kinds = [k.strip() for k in request.query_params.get('type', '').split(',') if k.strip()]
+        if not query:
+            return Response({
+                "code": status.HTTP_400_BAD_REQUEST,
+                "success": False,
+                "message": "Query parameter 'q' is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if any(kind not in KIND_CODES for kind in kinds):
+            return Response({
+                "code": status.HTTP_400_BAD_REQUEST,
+                "success": False,
+                "message": f"type must be one of: {', '.join(KIND_CODES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            try:
+                limit = max(1, min(int(request.query_params.get('limit', 20)), self.max_limit))
+            except ValueError:
+                limit = 20
+            prefix = request.query_params.get('prefix', '1').lower() not in ('0', 'false', 'no')
+            hits = get_backend().search(query, kinds=kinds or None, limit=limit, prefix=prefix)
+
+            # Hydrate hits with one query plan per kind, keeping rank order
+            product_ids = [h.object_id for h in hits if h.kind == 'product']
+            blog_ids = [h.object_id for h in hits if h.kind == 'blog']
+            products = {
+                row['id']: row for row in
+                ProductSerializer(Product.objects.for_listing().filter(pk__in=product_ids), many=True).data
+            } if product_ids else {}
+            blogs = {
+                post.pk: {"id": post.pk, "title": post.title, "slug": post.slug, "created_at": post.created_at}
+                for post in BlogPost.objects.filter(pk__in=blog_ids).only('id', 'title', 'slug', 'created_at')
+            } if blog_ids else {}
+
+            results = []
+            for hit in hits:
+                obj = products.get(hit.object_id) if hit.kind == 'product' else blogs.get(hit.object_id)
+                if obj is not None:
+                    results.append({"type": hit.kind, "score": round(hit.score, 4), "object": obj})
+
+            return Response({
+                "code": status.HTTP_200_OK,
+                "success": True,
+                "message": "Search results fetched successfully",
+                "data": results
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "success": False,
+                "message": f"Error searching: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SuggestAPIView(APIView):
+    """Typeahead suggestions served from process memory (the database only while the index is first built)."""
+    max_limit = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 8)), self.max_limit))
+        except ValueError:
+            limit = 8
+        try:
+            return Response({
+                "code": status.HTTP_200_OK,
+                "success": True,
+                "message": "Suggestions fetched successfully",
+                "data": suggestions.suggest(query, limit=limit)
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "success": False,
+                "message": f"Error fetching suggestions: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('site_config', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteconfiguration',
+            name='logo_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
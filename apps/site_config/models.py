@@ -4,6 +4,7 @@ class SiteConfiguration(models.Model):
     site_name = models.CharField(max_length=255, default="Forestland Linen")
     site_tagline = models.CharField(max_length=255, blank=True)
     logo_url = models.ImageField(upload_to="site/logo/", blank=True, null=True)
+    logo_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     top_bar_message = models.CharField(max_length=255, blank=True)
     default_currency = models.CharField(max_length=10, default="BDT")
     
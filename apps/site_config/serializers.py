@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.core.images import SrcsetField
 from .models import SiteConfiguration, SocialLink
 
 
@@ -10,14 +11,17 @@ class SocialLinkSerializer(serializers.ModelSerializer):
 
 class SiteConfigurationSerializer(serializers.ModelSerializer):
     social_links = serializers.SerializerMethodField()
+    logo_srcset = SrcsetField(source='logo_derivatives')
 
     class Meta:
         model = SiteConfiguration
         fields = [
-            'site_name', 'site_tagline', 'logo_url', 'top_bar_message',
+            'site_name', 'site_tagline', 'logo_url', 'logo_srcset', 'top_bar_message',
             'default_currency', 'whatsapp_number', 'social_links'
         ]
 
     def get_social_links(self, obj):
+        if 'social_links' in self.context:
+            return self.context['social_links']
         links = SocialLink.objects.all()
         return SocialLinkSerializer(links, many=True).data
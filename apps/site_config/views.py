@@ -1,11 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from apps.core.cache import cached_response
+from apps.core.conditional import conditional_get, latest_update
 from .models import SiteConfiguration, SocialLink
 from .serializers import SiteConfigurationSerializer, SocialLinkSerializer
 
 
 class SiteConfigAPIView(APIView):
+    @conditional_get('site', last_modified=latest_update(SiteConfiguration))
+    @cached_response('site')
     def get(self, request):
         try:
             config = SiteConfiguration.objects.first()
@@ -32,6 +36,8 @@ class SiteConfigAPIView(APIView):
 
 
 class SocialLinksAPIView(APIView):
+    @conditional_get('site')
+    @cached_response('site')
     def get(self, request):
         try:
             links = SocialLink.objects.all()
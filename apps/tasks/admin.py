@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+from unfold.admin import ModelAdmin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    ordering = ('-created_at',)
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at')
+    actions = ['retry_now']
+
+    @admin.action(description="Retry selected tasks now")
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status='running').update(
+            status='queued', run_at=timezone.now(), attempts=0, last_error='',
+        )
+        self.message_user(request, f"{count} task(s) queued")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.queue import purge_finished
+
+
+class Command(BaseCommand):
+    help = "Delete done tasks older than TASKS_DONE_RETENTION (workers also do this; run from cron otherwise)"
+
+    def handle(self, *args, **options):
+        deleted = purge_finished()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished tasks"))
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from apps.tasks.queue import claim, purge_finished, requeue_stale, run, run_pending
+
+
+class Command(BaseCommand):
+    help = "Run background task workers against the database queue (apps.tasks)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=4, help="Worker threads per process")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Drain due tasks and exit")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            requeue_stale()
+            succeeded, failed = run_pending(worker_id=self._worker_id(0))
+            self.stdout.write(f"Ran {succeeded + failed} tasks ({failed} failed)")
+            return
+
+        processes = max(1, options["processes"])
+        self.stdout.write(
+            f"Starting {processes} process(es) x {options['threads']} thread(s), Ctrl+C to stop"
+        )
+        if processes == 1:
+            self._serve(0, options["threads"], options["poll_interval"])
+            return
+
+        # Children must not inherit the parent's open DB connections
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=self._serve, args=(n, options["threads"], options["poll_interval"]))
+            for n in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                child.terminate()
+        signal.signal(signal.SIGTERM, forward)
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
+
+    @staticmethod
+    def _worker_id(process_no):
+        return f"{socket.gethostname()}:{os.getpid()}:{process_no}"
+
+    def _serve(self, process_no, threads, poll_interval):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        worker_id = self._worker_id(process_no)
+
+        def loop(thread_no):
+            name = f"{worker_id}:{thread_no}"
+            while not stop.is_set():
+                try:
+                    claimed = claim(name, limit=1)
+                    if claimed:
+                        run(claimed[0])
+                    else:
+                        stop.wait(poll_interval)
+                except Exception as e:  # keep the worker alive through DB hiccups
+                    self.stderr.write(f"[{name}] {e}")
+                    stop.wait(poll_interval)
+                finally:
+                    close_old_connections()
+
+        pool = [threading.Thread(target=loop, args=(n,), daemon=True) for n in range(max(1, threads))]
+        for thread in pool:
+            thread.start()
+        try:
+            while not stop.is_set():
+                # One thread per process also recovers tasks from crashed
+                # workers and keeps finished ones from piling up
+                requeue_stale()
+                purge_finished()
+                close_old_connections()
+                stop.wait(30)
+        except KeyboardInterrupt:
+            stop.set()
+        for thread in pool:
+            thread.join()
@@ -0,0 +1,169 @@
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name=None, max_attempts=5):
+    """
+    Register a function as a background task:
+
+        @task()
+        def send_order_confirmation(order_id): ...
+
+        send_order_confirmation.enqueue(order.pk, idempotency_key=f"order-confirmation:{order.pk}")
+
+    Arguments must be JSON serializable. Tasks are at-least-once, so they
+    should be safe to run twice.
+    """
+    def decorator(fn):
+        task_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        _registry[task_name] = fn
+        fn.task_name = task_name
+        fn.max_attempts = max_attempts
+
+        def enqueue_task(*args, idempotency_key=None, delay=None, **kwargs):
+            return enqueue(task_name, args, kwargs, idempotency_key=idempotency_key,
+                           delay=delay, max_attempts=max_attempts)
+
+        fn.enqueue = enqueue_task
+        return fn
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, idempotency_key=None, delay=None, max_attempts=5):
+    """
+    Insert a task row. Inside a transaction the task only becomes visible to
+    workers once that transaction commits, so it never runs against data
+    that was rolled back.
+    """
+    if name not in _registry:
+        raise UnknownTask(name)
+    fields = {
+        "name": name,
+        "args": list(args),
+        "kwargs": kwargs or {},
+        "max_attempts": max_attempts,
+        "run_at": timezone.now() + (delay or timedelta()),
+    }
+    if idempotency_key is None:
+        return Task.objects.create(**fields)
+    task_row, _ = Task.objects.get_or_create(idempotency_key=idempotency_key, defaults=fields)
+    return task_row
+
+
+def claim(worker_id, limit=1):
+    """
+    Take up to `limit` due tasks for this worker. The conditional UPDATE
+    (status still 'queued') means two workers can never claim the same row.
+    """
+    now = timezone.now()
+    token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+    due = list(
+        Task.objects.filter(status='queued', run_at__lte=now)
+        .order_by('run_at', 'id')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not due:
+        return []
+    Task.objects.filter(pk__in=due, status='queued').update(
+        status='running', locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+    )
+    # Re-read by primary key (locked_by is not indexed); the token drops the
+    # rows another worker updated first
+    return list(Task.objects.filter(pk__in=due, locked_by=token).order_by('run_at', 'id'))
+
+
+def backoff(attempts):
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped."""
+    base = getattr(settings, "TASKS_RETRY_BACKOFF", 30)
+    cap = getattr(settings, "TASKS_MAX_BACKOFF", 60 * 60)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def run(task_row):
+    """Execute a claimed task and record the outcome. Returns True on success."""
+    fn = _registry.get(task_row.name)
+    try:
+        if fn is None:
+            raise UnknownTask(task_row.name)
+        with transaction.atomic():
+            fn(*task_row.args, **task_row.kwargs)
+    except Exception as e:
+        error = "".join(traceback.format_exception(e))[-4000:]
+        if task_row.attempts >= task_row.max_attempts or fn is None:
+            logger.error("Task %s #%s failed permanently: %s", task_row.name, task_row.pk, e)
+            Task.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by).update(
+                status='failed', last_error=error, finished_at=timezone.now(), locked_by='', locked_at=None,
+            )
+        else:
+            Task.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by).update(
+                status='queued', last_error=error, run_at=timezone.now() + backoff(task_row.attempts),
+                locked_by='', locked_at=None,
+            )
+        return False
+
+    # Only while this worker still owns the task: if requeue_stale handed it
+    # to another worker meanwhile, that worker's state stands
+    Task.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by).update(
+        status='done', finished_at=timezone.now(), locked_by='', locked_at=None,
+    )
+    return True
+
+
+def requeue_stale(timeout=None):
+    """Put back tasks whose worker died mid-run (locked longer than TASKS_LOCK_TIMEOUT)."""
+    timeout = timeout or getattr(settings, "TASKS_LOCK_TIMEOUT", 10 * 60)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Task.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None, run_at=timezone.now(),
+    )
+
+
+def purge_finished(retention=None, batch_size=1000):
+    """
+    Delete done tasks finished more than TASKS_DONE_RETENTION seconds ago,
+    in batches. Failed tasks are kept for inspection. Returns the number
+    deleted.
+    """
+    retention = retention or getattr(settings, "TASKS_DONE_RETENTION", 7 * 24 * 60 * 60)
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    deleted = 0
+    while True:
+        ids = list(
+            Task.objects.filter(status='done', finished_at__lt=cutoff).values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(pk__in=ids).delete()[0]
+
+
+def run_pending(worker_id="inline", limit=None):
+    """Drain every due task in this thread; returns (succeeded, failed). Used by --once and tests."""
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        claimed = claim(worker_id, limit=1)
+        if not claimed:
+            break
+        if run(claimed[0]):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
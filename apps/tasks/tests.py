@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.account.models import Customer
+from apps.marketing.models import NewsletterSubscriber
+from apps.marketing.tasks import queue_newsletter
+from .models import Task
+from .queue import claim, enqueue, purge_finished, requeue_stale, run, run_pending, task
+
+calls = []
+
+
+@task(name="tests.flaky", max_attempts=2)
+def flaky(value):
+    calls.append(value)
+    raise RuntimeError("smtp timeout")
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_reset_code_is_sent_by_the_worker_not_the_request(self):
+        Customer.objects.create_user(email="ann@example.com", password="pw", first_name="Ann", last_name="B")
+        response = self.client.post("/api/forgot-password/send-code/", {"email": "ann@example.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.get().status, "queued")
+
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["ann@example.com"])
+        self.assertEqual(Task.objects.get().status, "done")
+
+    def test_idempotency_key_deduplicates(self):
+        first = flaky.enqueue(1, idempotency_key="k")
+        second = flaky.enqueue(2, idempotency_key="k")
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    @override_settings(TASKS_RETRY_BACKOFF=60)
+    def test_failures_back_off_then_give_up(self):
+        flaky.enqueue("x")
+        self.assertEqual(run_pending(), (0, 1))
+        row = Task.objects.get()
+        self.assertEqual((row.status, row.attempts), ("queued", 1))
+        self.assertGreater(row.run_at, timezone.now() + timedelta(seconds=40))
+        self.assertIn("smtp timeout", row.last_error)
+
+        # Not due yet, so nothing runs
+        self.assertEqual(run_pending(), (0, 0))
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("apps.tasks.queue", "ERROR"):
+            run_pending()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ("failed", 2))
+        self.assertEqual(calls, ["x", "x"])
+
+    def test_a_task_is_claimed_once(self):
+        flaky.enqueue(1)
+        self.assertEqual(len(claim("a", limit=5)), 1)
+        self.assertEqual(claim("b", limit=5), [])
+
+    def test_newsletter_fans_out_once_per_campaign(self):
+        NewsletterSubscriber.objects.bulk_create(NewsletterSubscriber(email=f"s{i}@example.com") for i in range(5))
+        self.assertEqual(queue_newsletter("spring", "Hello", "News", batch_size=2), 3)
+        queue_newsletter("spring", "Hello", "News", batch_size=2)
+        self.assertEqual(Task.objects.count(), 3)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 5)
+
+        # The list changes; a re-run only reaches the new subscriber
+        NewsletterSubscriber.objects.order_by("pk").first().delete()
+        NewsletterSubscriber.objects.create(email="late@example.com")
+        self.assertEqual(queue_newsletter("spring", "Hello", "News", batch_size=2), 1)
+        run_pending()
+        self.assertEqual([m.to for m in mail.outbox[5:]], [["late@example.com"]])
+
+    def test_a_requeued_task_is_not_finished_by_its_old_worker(self):
+        flaky.enqueue(1)
+        stale, = claim("a")
+        Task.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        requeue_stale()
+        fresh, = claim("b")
+        run(stale)  # fails, and would requeue it
+        row = Task.objects.get()
+        self.assertEqual((row.status, row.locked_by), ("running", fresh.locked_by))
+
+    @override_settings(TASKS_DONE_RETENTION=60)
+    def test_old_done_tasks_are_purged(self):
+        old, recent, failed = (flaky.enqueue(n) for n in range(3))
+        Task.objects.filter(pk__in=[old.pk, recent.pk]).update(status="done", finished_at=timezone.now())
+        Task.objects.filter(pk=failed.pk).update(status="failed", finished_at=timezone.now() - timedelta(hours=1))
+        Task.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(purge_finished(), 1)
+        self.assertEqual(set(Task.objects.values_list("pk", flat=True)), {recent.pk, failed.pk})
+
+    def test_unknown_task_names_are_rejected(self):
+        with self.assertRaises(LookupError):
+            enqueue("no.such.task")
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.core.cache import stale_while_revalidate
+from apps.orders.models import DailyCategorySales, DailyProductSales, DailySales, Order
+from apps.products.models import Product
+
+# Each dashboard block is a provider: a function of today's date returning
+# what the template renders. Results are cached per widget for its TTL
+# (DASHBOARD_WIDGET_TTLS) and refreshed in the background once stale.
+
+DEFAULT_TTLS = {
+    "users": 15 * 60,
+    "orders": 60,
+    "trend": 5 * 60,
+    "top_categories": 15 * 60,
+    "top_products": 15 * 60,
+    "recent_orders": 30,
+}
+
+_providers = {}
+
+
+def widget(name):
+    def decorator(fn):
+        _providers[name] = fn
+        return fn
+    return decorator
+
+
+def widget_ttl(name):
+    return getattr(settings, "DASHBOARD_WIDGET_TTLS", {}).get(name, DEFAULT_TTLS.get(name, 60))
+
+
+def load_widgets(refresh=False):
+    """
+    {name: value} for every widget plus {name: computed-at datetime}.
+    `refresh` recomputes everything now (the dashboard's ?refresh=1).
+    """
+    today = timezone.localdate()
+    max_stale = getattr(settings, "DASHBOARD_MAX_STALE", 60 * 60)
+    values, computed = {}, {}
+    for name, provider in _providers.items():
+        value, at = stale_while_revalidate(
+            f"dashboard:{name}:{today.isoformat()}", lambda p=provider: p(today),
+            ttl=widget_ttl(name), max_stale=max_stale, refresh=refresh,
+        )
+        values[name] = value
+        computed[name] = datetime.fromtimestamp(at, tz=dt_timezone.utc)
+    return values, computed
+
+
+@widget("users")
+def users_widget(today):
+    User = get_user_model()
+    total = User.objects.count()
+    guests = User.objects.filter(is_guest=True).count() if hasattr(User, "is_guest") else 0
+    return {
+        "users_total": total,
+        "users_active": User.objects.filter(is_active=True).count(),
+        "users_guests": guests,
+        "users_real": total - guests,
+        "users_last7": User.objects.filter(date_joined__date__gte=today - timedelta(days=6)).count(),
+        "products": Product.objects.count(),
+    }
+
+
+@widget("orders")
+def orders_widget(today):
+    # Status counts and sales from the daily rollups (apps.orders.rollups)
+    by_status = {
+        r["status"]: r["c"]
+        for r in DailySales.objects.values("status").annotate(c=Sum("orders"))
+    }
+    totals = DailySales.objects.aggregate(s=Sum("revenue"), c=Sum("orders"))
+    sales_total = totals["s"] or 0
+    orders_total = totals["c"] or 0
+    sales_7d = DailySales.objects.filter(day__gte=today - timedelta(days=6)).aggregate(s=Sum("revenue"))["s"] or 0
+    return {
+        "orders": orders_total,
+        "pending": by_status.get("pending", 0),
+        "processing": by_status.get("processing", 0),
+        "shipped": by_status.get("shipped", 0),
+        "delivered": by_status.get("delivered", 0),
+        "cancelled": by_status.get("cancelled", 0),
+        "sales_total": sales_total,
+        "sales_7d": sales_7d,
+        "aov": (sales_total / orders_total) if orders_total else 0,
+    }
+
+
+@widget("trend")
+def trend_widget(today):
+    # Orders per day over the last 7 days
+    start = today - timedelta(days=6)
+    counts = {
+        r["day"]: r["c"]
+        for r in DailySales.objects.filter(day__gte=start).values("day").annotate(c=Sum("orders"))
+    }
+    return [{"date": start + timedelta(days=i), "count": int(counts.get(start + timedelta(days=i), 0))} for i in range(7)]
+
+
+@widget("top_categories")
+def top_categories_widget(today):
+    return list(
+        DailyCategorySales.objects.values(name=F("category_name"))
+        .annotate(qty=Sum("units"), revenue=Sum("revenue")).order_by("-revenue")[:5]
+    )
+
+
+@widget("top_products")
+def top_products_widget(today):
+    return list(
+        DailyProductSales.objects.values(name=F("product_name"))
+        .annotate(qty=Sum("units"), revenue=Sum("revenue")).order_by("-revenue")[:5]
+    )
+
+
+@widget("recent_orders")
+def recent_orders_widget(today):
+    return list(Order.objects.select_related("customer").order_by("-created_at")[:10])
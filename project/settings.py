@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     'corsheaders',
 
     # Project apps
+    'apps.core',
     'apps.account',
     'apps.products',
     'apps.orders',
@@ -40,13 +41,17 @@ INSTALLED_APPS = [
     'apps.site_config',
     'apps.marketing',
     'apps.cart',
+    'apps.search',
+    'apps.tasks',
 ]
 
 
 MIDDLEWARE = [
+    'apps.core.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -80,10 +85,103 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Writers queue on the database lock (up to `timeout` seconds) instead
+        # of failing; IMMEDIATE avoids deadlocks when a read upgrades to a write
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file, not shared-cache memory, so concurrent tests get real locking
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# Swap for a shared backend (file/redis/memcached) when running several workers
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'home-ecommerce',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Public catalog/CMS responses (apps.core.cache)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+
+# Full-text search (apps.search): 'auto' uses SQLite FTS5 when available,
+# otherwise the in-process inverted index ('memory')
+SEARCH_BACKEND = 'auto'
+# Seconds between background refreshes of autocomplete popularity (units sold)
+AUTOCOMPLETE_POPULARITY_TTL = 60 * 15
+# Full rebuilds of the autocomplete index: after bulk imports and this often,
+# which is how edits made by other workers reach this one
+AUTOCOMPLETE_REBUILD_TTL = 60 * 60
+
+# In-process worker pool for off-request jobs (apps.core.background);
+# BACKGROUND_SYNC runs them inline instead (useful in tests)
+BACKGROUND_WORKERS = 2
+BACKGROUND_SYNC = False
+
+# Responsive image renders (apps.core.images); formats the installed Pillow
+# cannot encode are skipped
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1024, 1600)
+IMAGE_DERIVATIVE_FORMATS = ('avif', 'webp', 'jpeg')
+
+# Database-backed task queue (apps.tasks), processed by `manage.py run_workers`
+TASKS_RETRY_BACKOFF = 30          # seconds, doubled on every failed attempt
+TASKS_MAX_BACKOFF = 60 * 60
+TASKS_LOCK_TIMEOUT = 60 * 10      # running tasks older than this are requeued
+# Done tasks are deleted after this long (their idempotency keys with them)
+TASKS_DONE_RETENTION = 60 * 60 * 24 * 7
+
+# Checkout pricing (apps.orders.pricing): flat delivery charge, waived when
+# the discounted subtotal reaches FREE_SHIPPING_THRESHOLD (None = never)
+SHIPPING_FLAT_RATE = '60.00'
+FREE_SHIPPING_THRESHOLD = None
+
+# Admin dashboard widgets (project.dashboard): seconds each block is served
+# from cache before a background refresh; stale values are shown for at most
+# DASHBOARD_MAX_STALE more seconds while the refresh runs
+DASHBOARD_WIDGET_TTLS = {
+    'users': 60 * 15,
+    'orders': 60,
+    'trend': 60 * 5,
+    'top_categories': 60 * 15,
+    'top_products': 60 * 15,
+    'recent_orders': 30,
+}
+DASHBOARD_MAX_STALE = 60 * 60
+
+# Anonymous carts (X-Cart-Token) untouched this long are deleted by
+# sweep_anonymous_carts, which also returns their held stock
+ANONYMOUS_CART_TTL = 60 * 60 * 24 * 7
+
+# Idempotency-Key responses (apps.core.idempotency) are replayed for this
+# long; in-progress keys older than the lock timeout are treated as abandoned
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# Request instrumentation (apps.core.instrumentation): the fraction of
+# requests profiled (0 = off, 1 = all). Profiled requests get a Server-Timing
+# header and feed the per-endpoint stats at /api/metrics/; those slower than
+# SLOW_REQUEST_MS are logged with their SQL. A query run
+# DUPLICATE_QUERY_THRESHOLD times in one request is reported as an N+1 suspect.
+INSTRUMENTATION_SAMPLE_RATE = 0.0
+SLOW_REQUEST_MS = 500
+DUPLICATE_QUERY_THRESHOLD = 3
+METRICS_WINDOW = 500           # recent requests per endpoint kept for percentiles
+
+# Cart items hold their stock this long after the last cart change; the
+# release_expired_holds command returns expired holds to stock
+STOCK_HOLD_TTL = 60 * 15
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -27,6 +27,12 @@ urlpatterns = [
 
     # cart
     path ('api/', include('apps.cart.urls')),
+
+    # Core (cache, ...)
+    path('api/', include('apps.core.urls')),
+
+    # Search
+    path('api/', include('apps.search.urls')),
 ]
 
 # Add media files serving during development